@@ -14,21 +14,106 @@ ImageFile.LOAD_TRUNCATED_IMAGES = True
 # custom imports
 if __name__ == "__main__":
     from failure_case_creation.modify_images import change_brightness, change_contrast, change_sharpness, gaussian_noise, shot_noise, impulse_noise, speckle_noise, defocus_blur, glass_blur, motion_blur, zoom_blur, gaussian_blur, snow, frost, fog, spatter, brightness, contrast, saturate, jpeg_compression, pixelate
-    from failure_case_creation.modify_timeseries import offset_failure, precision_degradation, total_failure, drifting_failure
+    from failure_case_creation.modify_timeseries import offset_failure, precision_degradation, total_failure, drifting_failure, stuck_at_failure, dropout_failure, offset_trajectory, drifting_trajectory, precision_degradation_trajectory
     from visualization.visualizeTimeseriesData import plot_IMU_data
     from custom_utils.utils import load_json_from_configs
+    from custom_utils.window_io import WindowReader, read_sampling_rate
+    from data_preprocessing.image_remapping import remap_image
 else:
     # else statement needed when FloorTypeDetectionDataset() class is used as submodule in other project
     from FTDDataset.failure_case_creation.modify_images import change_brightness, change_contrast, change_sharpness, gaussian_noise, shot_noise, impulse_noise, speckle_noise, defocus_blur, glass_blur, motion_blur, zoom_blur, gaussian_blur, snow, frost, fog, spatter, brightness, contrast, saturate, jpeg_compression, pixelate
-    from FTDDataset.failure_case_creation.modify_timeseries import offset_failure, precision_degradation, total_failure, drifting_failure
+    from FTDDataset.failure_case_creation.modify_timeseries import offset_failure, precision_degradation, total_failure, drifting_failure, stuck_at_failure, dropout_failure, offset_trajectory, drifting_trajectory, precision_degradation_trajectory
     from FTDDataset.visualization.visualizeTimeseriesData import plot_IMU_data
     from FTDDataset.custom_utils.utils import load_json_from_configs
+    from FTDDataset.custom_utils.window_io import WindowReader, read_sampling_rate
+    from FTDDataset.data_preprocessing.image_remapping import remap_image
 
 # Ignore warnings
 import warnings  # nopep8
 warnings.filterwarnings("ignore")
 
 
+# Mapping of the sensor lists in the faulty data creation config to the fault functions and a function to get their parameters from the config.
+# NOTE: The order of the lists determines the priority of the faults if they are not chained
+IMAGE_FAULTS_FROM_CONFIG = [
+    ("Cams for brightness", change_brightness, lambda config: {
+     "min": config["brightness_min"], "max": config["brightness_max"]}),
+    ("Cams for contrast", change_contrast, lambda config: {
+     "min": config["contrast_min"], "max": config["contrast_max"]}),
+    ("Cams for sharpness", change_sharpness, lambda config: {
+     "min": config["sharpness_min"], "max": config["sharpness_max"]}),
+    ("Cams for guassian_noise", gaussian_noise,
+     lambda config: {"severity": config["noise intensity"]}),
+    ("Cams for shot_noise", shot_noise,
+     lambda config: {"severity": config["noise intensity"]}),
+    ("Cams for impulse_noise", impulse_noise,
+     lambda config: {"severity": config["noise intensity"]}),
+    ("Cams for speckle_noise", speckle_noise,
+     lambda config: {"severity": config["noise intensity"]}),
+    ("Cams for defocus_blur", defocus_blur, lambda config: {
+     "severity": config["blur intensity"], "reference_resolution": config.get("reference resolution")}),
+    ("Cams for glass_blur", glass_blur, lambda config: {
+     "severity": config["blur intensity"], "reference_resolution": config.get("reference resolution")}),
+    ("Cams for motion_blur", motion_blur, lambda config: {
+     "severity": config["blur intensity"], "reference_resolution": config.get("reference resolution")}),
+    ("Cams for zoom_blur", zoom_blur,
+     lambda config: {"severity": config["blur intensity"]}),
+    ("Cams for gaussian_blur", gaussian_blur, lambda config: {
+     "severity": config["blur intensity"], "reference_resolution": config.get("reference resolution")}),
+    ("Cams for snow", snow, lambda config: {
+     "severity": config["weather intensity"], "reference_resolution": config.get("reference resolution")}),
+    ("Cams for frost", frost, lambda config: {
+     "severity": config["weather intensity"], "reference_resolution": config.get("reference resolution")}),
+    ("Cams for fog", fog, lambda config: {
+     "severity": config["weather intensity"], "reference_resolution": config.get("reference resolution")}),
+    ("Cams for spatter", spatter, lambda config: {
+     "severity": config["weather intensity"], "reference_resolution": config.get("reference resolution")}),
+    ("Cams for new brightness", brightness,
+     lambda config: {"severity": config["digital intensity"]}),
+    ("Cams for new contrast", contrast, lambda config: {
+     "severity": config["digital intensity"]}),
+    ("Cams for saturate", saturate, lambda config: {
+     "severity": config["digital intensity"]}),
+    ("Cams for jpeg_compression", jpeg_compression,
+     lambda config: {"severity": config["digital intensity"]}),
+    ("Cams for pixelate", pixelate, lambda config: {
+     "severity": config["digital intensity"]}),
+]
+TIMESERIES_FAULTS_FROM_CONFIG = [
+    ("Sensors for offset", offset_failure, lambda config: {
+     "min": config["offset_min"], "max": config["offset_max"]}),
+    ("Sensors for drifting", drifting_failure, lambda config: {
+     "min": config["drifting_min"], "max": config["drifting_max"]}),
+    ("Sensors for prec deg", precision_degradation, lambda config: {
+     "var": config["prec_deg_var"], "per_channel": config.get("prec_deg_per_channel", False)}),
+    ("Sensors for tot fail", total_failure, lambda config: {
+     "total_failure_value": config["total_failure_value"]}),
+    ("Sensors for stuck", stuck_at_failure, lambda config: {
+     "min_duration": config["stuck_min_duration"], "max_duration": config["stuck_max_duration"]}),
+    ("Sensors for dropout", dropout_failure, lambda config: {
+     "probability": config["dropout_probability"], "dropout_value": config["dropout_value"]}),
+]
+
+# Options for the random selection of a single fault (function, function to get parameters from config, probability)
+RANDOM_IMAGE_FAULTS = [(function, get_parameters, 0.2)
+                       for _, function, get_parameters in IMAGE_FAULTS_FROM_CONFIG[:3]]
+RANDOM_TIMESERIES_FAULTS = [(function, get_parameters, 0.15)
+                            for _, function, get_parameters in TIMESERIES_FAULTS_FROM_CONFIG[:4]]
+
+# All fault functions which can be used in the custom fault plan of the config
+FAULT_FUNCTIONS = {function.__name__: function for _, function, _ in
+                   IMAGE_FAULTS_FROM_CONFIG + TIMESERIES_FAULTS_FROM_CONFIG}
+
+# Timeseries faults which can be created consistently for a complete measurement by slicing a fault trajectory for each window
+MEASUREMENT_CONSISTENT_FAULTS = {offset_failure: offset_trajectory,
+                                 drifting_failure: drifting_trajectory,
+                                 precision_degradation: precision_degradation_trajectory}
+
+# Fault functions which significantly increase the time needed per data sample
+COMPUTATION_INTENSIVE_FAULTS = [glass_blur,
+                                motion_blur, zoom_blur, snow, frost, fog]
+
+
 class FloorTypeDetectionDataset(Dataset):
     """
         Dataset class for FTDD (Floor Type Detection Dataset).
@@ -57,6 +142,8 @@ class FloorTypeDetectionDataset(Dataset):
         self.run_path = run_path
         self.create_faulty_data = create_faulty_data
         self.faulty_data_creation_config_dict = {}
+        self.fault_plan_description = {}
+        self.fault_creation_transforms = []
 
         # get transformations for data based on configuration
         self.transform = self.__get_composed_transforms()
@@ -69,6 +156,15 @@ class FloorTypeDetectionDataset(Dataset):
         self.filenames_labels_array = pd.read_csv(os.path.join(
             root_dir, "labels.csv"), sep=";", header=0).to_numpy()
 
+        # windows of the timeseries sensors can be stored in different formats (.csv, .npy or stacked, see custom_utils.window_io)
+        self.window_readers = {sensor: WindowReader(os.path.join(root_dir, sensor))
+                               for sensor in self.sensors if not "Cam" in sensor}
+
+        # create fault trajectories for all measurements in the dataset (only done if selected in the config)
+        for fault_creation in self.fault_creation_transforms:
+            fault_creation.prepare_fault_trajectories(
+                root_dir, self.filenames_labels_array[:, 0])
+
     def __get_composed_transforms(self):
         """
             Private method to configure transformation for dataset based on self.preprocessing_config_filename.
@@ -81,42 +177,55 @@ class FloorTypeDetectionDataset(Dataset):
 
         # ## Creating faulty data according to fault config before image preprocessing, if fault config was provided
         if self.create_faulty_data:
-            # only add class for faulty data creation if a path was added
-            transformations_list.append(FTDD_CreateFaultyData(self.run_path,
-                                                              self.faulty_data_creation_config_filename))
+            # faults are split in faults applied before and after rescaling of the images
+            create_faulty_data_before_rescale = FTDD_CreateFaultyData(self.run_path,
+                                                                      self.faulty_data_creation_config_filename)
+            create_faulty_data_after_rescale = FTDD_CreateFaultyData(self.run_path,
+                                                                     self.faulty_data_creation_config_filename, after_rescale=True)
+            transformations_list.append(create_faulty_data_before_rescale)
+            self.fault_creation_transforms.append(
+                create_faulty_data_before_rescale)
 
             # save faulty data creation config dict for logging if it was provided
-            self.faulty_data_creation_config_dict = transformations_list[0].get_config_dict(
+            self.faulty_data_creation_config_dict = create_faulty_data_before_rescale.get_config_dict(
             )
 
+            # save description of the compiled fault plans for logging
+            self.fault_plan_description = {"before_rescale": create_faulty_data_before_rescale.get_fault_plan_description(),
+                                           "after_rescale": create_faulty_data_after_rescale.get_fault_plan_description()}
+
             # print info to user in case computation intensive version is selected
-            if (self.faulty_data_creation_config_dict["images"]["Cams for glass_blur"] != [""] or
-                    self.faulty_data_creation_config_dict["images"]["Cams for motion_blur"] != [""] or
-                    self.faulty_data_creation_config_dict["images"]["Cams for zoom_blur"] != [""] or
-                    self.faulty_data_creation_config_dict["images"]["Cams for snow"] != [""] or
-                    self.faulty_data_creation_config_dict["images"]["Cams for frost"] != [""] or
-                    self.faulty_data_creation_config_dict["images"]["Cams for fog"] != [""] or
-                    self.faulty_data_creation_config_dict["images"]["Cams for new brightness"] != [""] or
-                    self.faulty_data_creation_config_dict["images"]["Cams for saturate"] != [""]):
+            if any(function in COMPUTATION_INTENSIVE_FAULTS for fault_creation in [create_faulty_data_before_rescale, create_faulty_data_after_rescale]
+                   for steps in fault_creation.fault_plan.values() for step in steps for function, _, _ in step):
                 print("\n!!!! Training/ Evaluation might be significantly longer than usual due to selection of computation intensive failure case creation "
-                      "(glass_blur, motion_blur, zoom_blur, snow, frost, fog, new brightness or saturate) !!!!\n")
+                      "(glass_blur, motion_blur, zoom_blur, snow, frost or fog) !!!!\n")
 
         # ## Image preprocessing
         # TODO [Improvement suggestion]: make crop and rescale configurable or detect automatically whether it is needed!
         # ## Crop and Rescale is obsolete here as it is already done in the dataset!
         # transformations_list.append(
         #     FTDD_Crop(self.preprocessing_config_filename))
-        transformations_list.append(FTDD_Rescale(self.run_path,
-                                                 self.preprocessing_config_filename))
+        # ## For a dataset with raw images, FTDD_Remap can replace FTDD_Crop and FTDD_Rescale (including optional fisheye undistortion)
+        # transformations_list.append(
+        #     FTDD_Remap(self.run_path, self.preprocessing_config_filename))
+        rescale = FTDD_Rescale(self.run_path,
+                               self.preprocessing_config_filename)
+        transformations_list.append(rescale)
+
+        # ## Creating faulty data which shall be applied to the rescaled images (only needed if such faults were selected)
+        if self.create_faulty_data and create_faulty_data_after_rescale.fault_plan != {}:
+            transformations_list.append(create_faulty_data_after_rescale)
+            self.fault_creation_transforms.append(
+                create_faulty_data_after_rescale)
+
         transformations_list.append(FTDD_Normalize(self.run_path,
                                                    self.preprocessing_config_filename, self.root_dir))
 
         # ## Transform PIL images and numpy arrays to torch Tensors as final step
         transformations_list.append(FTDD_ToTensor())
 
-        # save preprocessing config dict for logging from first transform (transform at position 1 will be either rescale or normalize with preprocessing config)
-        self.preprocessing_config_dict = transformations_list[1].get_config_dict(
-        )
+        # save preprocessing config dict for logging from rescale transform
+        self.preprocessing_config_dict = rescale.get_config_dict()
 
         return transforms.Compose(transformations_list)
 
@@ -140,10 +249,14 @@ class FloorTypeDetectionDataset(Dataset):
                     self.root_dir, sensor, self.filenames_labels_array[index, 0]+".jpg")
                 data_dict[sensor] = Image.open(file_path)
             else:
-                # data is stored as .csv file for all other sensors
-                file_path = os.path.join(
-                    self.root_dir, sensor, self.filenames_labels_array[index, 0]+".csv")
-                data_dict[sensor] = np.loadtxt(file_path, delimiter=";")
+                # data is stored as window for all other sensors
+                data_dict[sensor] = self.window_readers[sensor].read(
+                    self.filenames_labels_array[index, 0])
+
+        # fault creation needs to know the sample to slice the fault trajectories of the measurement
+        for fault_creation in self.fault_creation_transforms:
+            fault_creation.set_sample_name(
+                self.filenames_labels_array[index, 0])
 
         # perform preprocessing/ transform for data dict
         data_dict = self.transform(data_dict)
@@ -180,6 +293,15 @@ class FloorTypeDetectionDataset(Dataset):
         """
         return self.faulty_data_creation_config_dict
 
+    def get_fault_plan_description(self):
+        """
+            Getter method to get the description of the compiled fault plan self.fault_plan_description.
+
+            Returns:
+                - self.fault_plan_description (dict): Dict containing the list of fault steps for each sensor before and after rescaling
+        """
+        return self.fault_plan_description
+
     def __len__(self):
         """
             Method to get the size of the dataset.
@@ -219,191 +341,248 @@ class FTDD_Transform_Superclass():
 class FTDD_CreateFaultyData(FTDD_Transform_Superclass):
     """
         Class to create faulty data by adding noise, ... to the data.
+
+        The config is compiled once during init to a fault plan, which contains for each sensor an ordered list of steps.
+        Each step is a list of options (function, parameters, probability), of which at most one is applied per data sample:
+            - A step with a single option applies the fault function with the given probability
+            - A step with multiple options randomly selects one of the options (or none if the probabilities sum up to < 1)
+        Image faults can be applied before or after FTDD_Rescale, thus one instance of this class is used for each of both positions
+        and the plan of an instance only contains the steps for its position.
+
+        If "measurement_consistent_faults" is selected in the config, offset, drifting and precision degradation faults are created
+        once for each complete measurement as fault trajectory, so that overlapping windows of the same measurement get the same fault.
+        Whether a fault is applied at all is still selected for each data sample.
     """
 
-    def __call__(self, data_dict: dict):
+    def __init__(self, run_path, config_filename, after_rescale=False):
         """
-            Method to create faulty data in data_dict according to the config from self.config_dict.
+            Init method for FTDD_CreateFaultyData class.
 
             Parameters:
-                - data_dict (dict): Dict containing one data sample from FTDD.
+                - run_path (str): Run path to previous run from where config can be loaded. If run_path == "" the default config from the repo will be used.
+                - config_filename (str): Name of the config JSON file in the configs/ dir
+                - after_rescale (bool): Default = False. Select whether this instance applies the faults which shall be applied before or after FTDD_Rescale.
+        """
+        super().__init__(run_path, config_filename)
+
+        self.after_rescale = after_rescale
+        self.fault_plan = self.__compile_fault_plan()
+
+        # fault trajectories are only available after prepare_fault_trajectories() was called
+        self.fault_trajectories = {}
+        self.sample_positions = {}
+        self.sample_name = None
+
+    def __compile_fault_plan(self):
+        """
+            Private method to compile the config from self.config_dict to the fault plan for all sensors.
 
             Returns:
-                - data_dict (dict): Dict after cropping is applied.
+                - fault_plan (dict): Dict containing the list of steps for each sensor, where sensor name is the key
+        """
+        fault_plan = {}
+
+        # no plan needed if faulty data shall not be created
+        if not self.config_dict["create_faulty_data"]:
+            return fault_plan
+
+        # without chaining only the first fault from the config which is selected for a sensor will be applied
+        # (in the order: faults of the config lists, random faults, custom steps)
+        chain_faults = self.config_dict.get("chain_faults", False)
+        # names of the image faults which shall be applied after rescaling
+        faults_after_rescale = set(
+            self.config_dict["images"].get("Faults after rescale", [""]))
+
+        for config_section, random_faults_key, faults_from_config, random_faults in [
+                ("images", "Cams for random faults", IMAGE_FAULTS_FROM_CONFIG, RANDOM_IMAGE_FAULTS),
+                ("timeseries", "Sensors for random faults", TIMESERIES_FAULTS_FROM_CONFIG, RANDOM_TIMESERIES_FAULTS)]:
+            section_config = self.config_dict[config_section]
+            for sensors_key, function, get_parameters in faults_from_config:
+                for sensor_name in section_config[sensors_key]:
+                    if sensor_name == "":
+                        continue
+                    if sensor_name in fault_plan and not chain_faults:
+                        continue
+                    after_rescale = config_section == "images" and function.__name__ in faults_after_rescale
+                    fault_plan.setdefault(sensor_name, []).append(
+                        (after_rescale, [(function, get_parameters(section_config), 1.0)]))
+
+            # random selection of one of the faults is added as a separate step
+            for sensor_name in section_config.get(random_faults_key, [""]):
+                if sensor_name == "":
+                    continue
+                if sensor_name in fault_plan and not chain_faults:
+                    continue
+                after_rescale = config_section == "images" and all(
+                    function.__name__ in faults_after_rescale for function, _, _ in random_faults)
+                fault_plan.setdefault(sensor_name, []).append(
+                    (after_rescale, [(function, get_parameters(section_config), probability) for function, get_parameters, probability in random_faults]))
+
+        # custom steps from the config will be appended to the steps of each sensor
+        for sensor_name, steps in self.config_dict.get("custom_fault_plan", {}).items():
+            for step in steps:
+                if sensor_name in fault_plan and not chain_faults:
+                    break
+                options = step["one_of"] if "one_of" in step else [step]
+                fault_plan.setdefault(sensor_name, []).append(
+                    (step.get("after_rescale", False), [(FAULT_FUNCTIONS[option["fault"]], option.get("parameters", {}), option.get("probability", 1.0)) for option in options]))
+
+        # only keep the steps for the position of this instance relative to FTDD_Rescale
+        fault_plan = {sensor_name: [step for after_rescale, step in steps if after_rescale == self.after_rescale]
+                      for sensor_name, steps in fault_plan.items()}
+
+        return {sensor_name: steps for sensor_name, steps in fault_plan.items() if steps != []}
+
+    def get_fault_plan_description(self):
         """
-        # modify data only in case create_faulty_data flag is set in config dict
-        if self.config_dict["create_faulty_data"]:
-            # iterate over the complete data_dict
-            for sensor_name in data_dict.keys():
-                # handle images and timeseries data separately
-                if "Cam" in sensor_name:
-                    data_dict[sensor_name] = self.__handle_images__(
-                        data_dict[sensor_name], sensor_name)
-                else:
-                    data_dict[sensor_name] = self.__handle_timeseries_data__(
-                        data_dict[sensor_name], sensor_name)
+            Getter method to get a description of the compiled self.fault_plan which can be used for logging.
 
-        return data_dict
+            Returns:
+                - (dict): Dict containing a list of steps for each sensor, where each step is a list of dicts describing the options
+        """
+        return {sensor_name: [[{"fault": function.__name__, "parameters": parameters, "probability": probability}
+                               for function, parameters, probability in step]
+                              for step in steps]
+                for sensor_name, steps in self.fault_plan.items()}
 
-    def __handle_images__(self, image, sensor_name):
+    def prepare_fault_trajectories(self, root_dir, sample_names):
         """
-            Method to modify provided images according to the config from self.config_dict for sensor.
+            Method to create the fault trajectories for all measurements of the dataset, if "measurement_consistent_faults" is selected in the config.
+            The samples are assigned to measurements based on their timestamps, where a gap > "measurement_gap_ms" starts a new measurement.
+            The time between two rows of a window is taken from the sampling rate stored in the dataset (see custom_utils.window_io.write_sampling_rate()).
+            "sample_period_ms" of the config is only used for datasets which were prepared before the sampling rate was stored and must match data_preparation_main.IMU_sampling_rate.
+
+            Parameters:
+                - root_dir (str): Path to dataset
+                - sample_names (np.array): Names of all samples of the dataset (timestamp strings from labels.csv)
+        """
+        if not self.config_dict.get("measurement_consistent_faults", False):
+            return
+
+        sampling_rate = read_sampling_rate(root_dir)
+        sample_period_ms = self.config_dict.get(
+            "sample_period_ms", 20) if sampling_rate == None else 1000 / sampling_rate
+        measurement_gap_ms = self.config_dict.get("measurement_gap_ms", 1000)
+
+        # sort samples by measurement prefix (if available) and timestamp to detect the start of each measurement
+        sorted_samples = sorted((self.__split_sample_name(sample_name), sample_name)
+                                for sample_name in sample_names)
+        measurement_starts = []
+        measurement_lengths = []
+        previous_prefix, previous_timestamp = None, None
+        for (prefix, timestamp), sample_name in sorted_samples:
+            if prefix != previous_prefix or timestamp - previous_timestamp > measurement_gap_ms:
+                measurement_starts.append(timestamp)
+                measurement_lengths.append(0)
+            row_offset = int(
+                round((timestamp - measurement_starts[-1]) / sample_period_ms))
+            self.sample_positions[sample_name] = (
+                len(measurement_starts) - 1, row_offset)
+            measurement_lengths[-1] = row_offset
+            previous_prefix, previous_timestamp = prefix, timestamp
+
+        for sensor_name, steps in self.fault_plan.items():
+            if not any(function in MEASUREMENT_CONSISTENT_FAULTS for step in steps for function, _, _ in step):
+                continue
+
+            # window length and number of channels are the same for all samples of a sensor
+            window_shape = np.shape(WindowReader(os.path.join(
+                root_dir, sensor_name)).read(sorted_samples[0][1]))
+            num_channels = window_shape[1] if len(window_shape) == 2 else 1
+
+            self.fault_trajectories[sensor_name] = [[[MEASUREMENT_CONSISTENT_FAULTS[function](length + window_shape[0], num_channels, **parameters)
+                                                      for length in measurement_lengths] if function in MEASUREMENT_CONSISTENT_FAULTS else None
+                                                     for function, parameters, _ in step]
+                                                    for step in steps]
+
+    def __split_sample_name(self, sample_name):
+        """
+            Private method to split a sample name to the measurement prefix and the timestamp in ms.
 
             Parameters:
-                - image (PIL.image): Image from FTDD for sensor
-                - sensor_name (str): Name of the sensor
+                - sample_name (str): Name of the sample in the format "[prefix_]HH_MM_SS_mmm"
 
             Returns:
-                - image (PIL.image): Modified image
-        """
-        if sensor_name in self.config_dict['images']["Cams for brightness"]:
-            image = change_brightness(
-                image, self.config_dict["images"]["brightness_min"], self.config_dict["images"]["brightness_max"])
-        elif sensor_name in self.config_dict['images']["Cams for contrast"]:
-            image = change_contrast(
-                image, self.config_dict["images"]["contrast_min"], self.config_dict["images"]["contrast_max"])
-        elif sensor_name in self.config_dict['images']["Cams for sharpness"]:
-            image = change_sharpness(
-                image, self.config_dict["images"]["sharpness_min"], self.config_dict["images"]["sharpness_max"])
-        elif sensor_name in self.config_dict["images"]["Cams for guassian_noise"]:
-            image = gaussian_noise(
-                image, self.config_dict["images"]["noise intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for shot_noise"]:
-            image = shot_noise(
-                image, self.config_dict["images"]["noise intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for impulse_noise"]:
-            image = impulse_noise(
-                image, self.config_dict["images"]["noise intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for speckle_noise"]:
-            image = speckle_noise(
-                image, self.config_dict["images"]["noise intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for defocus_blur"]:
-            image = defocus_blur(
-                image, self.config_dict["images"]["blur intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for glass_blur"]:
-            image = glass_blur(
-                image, self.config_dict["images"]["blur intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for motion_blur"]:
-            image = motion_blur(
-                image, self.config_dict["images"]["blur intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for zoom_blur"]:
-            image = zoom_blur(
-                image, self.config_dict["images"]["blur intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for gaussian_blur"]:
-            image = gaussian_blur(
-                image, self.config_dict["images"]["blur intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for snow"]:
-            image = snow(
-                image, self.config_dict["images"]["weather intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for frost"]:
-            image = frost(
-                image, self.config_dict["images"]["weather intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for fog"]:
-            image = fog(image, self.config_dict["images"]["weather intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for spatter"]:
-            image = spatter(
-                image, self.config_dict["images"]["weather intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for new brightness"]:
-            image = brightness(
-                image, self.config_dict["images"]["digital intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for new contrast"]:
-            image = contrast(
-                image, self.config_dict["images"]["digital intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for saturate"]:
-            image = saturate(
-                image, self.config_dict["images"]["digital intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for jpeg_compression"]:
-            image = jpeg_compression(
-                image, self.config_dict["images"]["digital intensity"])
-        elif sensor_name in self.config_dict["images"]["Cams for pixelate"]:
-            image = pixelate(
-                image, self.config_dict["images"]["digital intensity"])
-        return image
-
-    def __handle_timeseries_data__(self, data, sensor_name):
-        """
-            Method to modify provided timeseries data according to the config from self.config_dict for sensor.
+                - (str): Measurement prefix ("" if sample name has no prefix)
+                - (int): Timestamp of the sample in ms
+        """
+        name_parts = sample_name.split("_")
+        hours, minutes, seconds, millis = [int(part)
+                                           for part in name_parts[-4:]]
+        return "_".join(name_parts[:-4]), ((hours * 60 + minutes) * 60 + seconds) * 1000 + millis
+
+    def set_sample_name(self, sample_name):
+        """
+            Setter method for the name of the next data sample, which is needed to slice the fault trajectories.
 
             Parameters:
-                - data (np.array): Data sample from FTDD for sensor
-                - sensor_name (str): Name of the sensor
+                - sample_name (str): Name of the sample (timestamp string from labels.csv)
+        """
+        self.sample_name = sample_name
+
+    def __call__(self, data_dict: dict):
+        """
+            Method to create faulty data in data_dict according to self.fault_plan.
+
+            Parameters:
+                - data_dict (dict): Dict containing one data sample from FTDD.
 
             Returns:
-                - data (np.array): Modified data
-        """
-        if sensor_name in set(self.config_dict["timeseries"]["Sensors for offset"]):
-            data = offset_failure(
-                data, self.config_dict["timeseries"]["offset_min"], self.config_dict["timeseries"]["offset_max"])
-        elif sensor_name in self.config_dict["timeseries"]["Sensors for drifting"]:
-            data = drifting_failure(
-                data, self.config_dict["timeseries"]["drifting_min"], self.config_dict["timeseries"]["drifting_max"])
-        elif sensor_name in self.config_dict["timeseries"]["Sensors for prec deg"]:
-            data = precision_degradation(
-                data, self.config_dict["timeseries"]["prec_deg_var"])
-        elif sensor_name in self.config_dict["timeseries"]["Sensors for tot fail"]:
-            data = total_failure(
-                data, self.config_dict["timeseries"]["total_failure_value"])
-        else:
-            pass
+                - data_dict (dict): Dict after faults are applied.
+        """
+        for sensor_name, steps in self.fault_plan.items():
+            if sensor_name in data_dict:
+                data_dict[sensor_name] = self.__apply_steps(
+                    data_dict[sensor_name], steps, self.fault_trajectories.get(sensor_name))
 
-        return data
+        return data_dict
 
-    def __handle_timeseries_data_randomly__(self, data, sensor_name):
+    def __apply_steps(self, data, steps, trajectories=None):
         """
-            Method to modify provided timeseries data according to the config from self.config_dict for sensor.
-            NOTE: Currently unused!
+            Private method to apply all steps of the fault plan for one sensor to data.
 
             Parameters:
-                - data (np.array): Data sample from FTDD for sensor
-                - sensor_name (str): Name of the sensor
+                - data (PIL.image or np.array): Data sample from FTDD for the sensor
+                - steps (list): List of steps from self.fault_plan for the sensor
+                - trajectories (list): Default = None. Fault trajectories for each option of the steps (None if not available)
 
             Returns:
-                - data (np.array): Modified data
-        """
-        # randomly select one of three possible faults with 15% chance each
-        selection_value = torch.rand(1)
-        if selection_value < 0.15:
-            data = offset_failure(
-                data, self.config_dict["timeseries"]["offset_min"], self.config_dict["timeseries"]["offset_max"])
-        elif selection_value < 0.3:
-            data = drifting_failure(
-                data, self.config_dict["timeseries"]["drifting_min"], self.config_dict["timeseries"]["drifting_max"])
-        elif selection_value < 0.45:
-            data = precision_degradation(
-                data, self.config_dict["timeseries"]["prec_deg_var"])
-        elif selection_value < 0.6:
-            data = total_failure(
-                data, self.config_dict["timeseries"]["total_failure_value"])
-        else:
-            pass
+                - data (PIL.image or np.array): Modified data
+        """
+        for step_index, step in enumerate(steps):
+            if len(step) == 1 and step[0][2] >= 1:
+                # no random number needed for faults which shall always be applied
+                data = self.__apply_fault(data, step[0], trajectories and trajectories[step_index][0])
+                continue
+
+            selection_value = torch.rand(1).item()
+            for option_index, option in enumerate(step):
+                if selection_value < option[2]:
+                    data = self.__apply_fault(data, option, trajectories and trajectories[step_index][option_index])
+                    break
+                selection_value -= option[2]
+
         return data
 
-    def __handle_images_randomly__(self, image, sensor_name):
+    def __apply_fault(self, data, option, measurement_trajectories=None):
         """
-            Method to modify provided images according to the config from self.config_dict for sensor.
-            NOTE: Currently unused!
+            Private method to apply a single fault to data, either by calling the fault function or by slicing the fault trajectory.
 
             Parameters:
-                - image (PIL.image): Image from FTDD for sensor
-                - sensor_name (str): Name of the sensor
+                - data (PIL.image or np.array): Data sample from FTDD for the sensor
+                - option (tuple): Option of a step from self.fault_plan (function, parameters, probability)
+                - measurement_trajectories (list): Default = None. Fault trajectories for all measurements (None if not available)
 
             Returns:
-                - image (PIL.image): Modified image
-        """
-        # randomly select one of three possible faults with 20% chance each
-        selection_value = torch.rand(1)
-        if selection_value < 0.2:
-            image = change_brightness(
-                image, self.config_dict["images"]["brightness_min"], self.config_dict["images"]["brightness_max"])
-        elif selection_value < 0.4:
-            image = change_contrast(
-                image, self.config_dict["images"]["contrast_min"], self.config_dict["images"]["contrast_max"])
-        elif selection_value < 0.6:
-            image = change_sharpness(
-                image, self.config_dict["images"]["sharpness_min"], self.config_dict["images"]["sharpness_max"])
-        else:
-            pass
-        return image
+                - data (PIL.image or np.array): Modified data
+        """
+        if measurement_trajectories is None or self.sample_name not in self.sample_positions:
+            function, parameters, _ = option
+            return function(data, **parameters)
+
+        measurement_index, row_offset = self.sample_positions[self.sample_name]
+        fault = measurement_trajectories[measurement_index][row_offset:row_offset + len(data)]
+        return data + (fault[:, 0] if np.ndim(data) == 1 else fault)
 
 
 class FTDD_Crop(FTDD_Transform_Superclass):
@@ -473,6 +652,47 @@ class FTDD_Rescale(FTDD_Transform_Superclass):
         return data_dict
 
 
+class FTDD_Remap(FTDD_Transform_Superclass):
+    """
+        Class to crop, rescale and optionally undistort raw images by a single remap for preprocessing of FTDD (see data_preprocessing/image_remapping.py).
+        Undistortion is done if "undistort_images" is enabled in the config for all cameras which have a fisheye calibration.
+    """
+
+    def __init__(self, run_path, config_filename, calibration_filename="fisheye_calibration.json"):
+        """
+            Init method for FTDD_Remap class.
+
+            Parameters:
+                - run_path (str): Run path to previous run from where config can be loaded. If run_path == "" the default config from the repo will be used.
+                - config_filename (str): Name of the config JSON file in the configs/ dir
+                - calibration_filename (str): Name of the JSON file with the fisheye calibration in the configs/ dir (default = "fisheye_calibration.json")
+        """
+        super().__init__(run_path, config_filename)
+
+        self.calibration_dict = {}
+        if self.config_dict.get("undistort_images", False):
+            self.calibration_dict = load_json_from_configs(
+                run_path, calibration_filename)
+
+    def __call__(self, data_dict: dict):
+        """
+            Method to remap all images in data_dict according to the config from self.config_dict.
+
+            Parameters:
+                - data_dict (dict): Dict containing one data sample from FTDD.
+
+            Returns:
+                - data_dict (dict): Dict after remapping is applied.
+        """
+        # transform only needed for cameras, other data shall stay unchanged
+        for sensor_name in data_dict.keys():
+            if "Cam" in sensor_name:
+                data_dict[sensor_name] = remap_image(data_dict[sensor_name], self.config_dict[sensor_name],
+                                                     self.calibration_dict.get(sensor_name), True, int(self.config_dict.get("remapping_supersampling", 4)))
+
+        return data_dict
+
+
 class FTDD_ToTensor():
     """
         Class to convert images and numpy arrays to Tensors as final step for preprocessing of FTDD.
@@ -0,0 +1,149 @@
+import os
+import gin
+import json
+import time
+import shutil
+
+# custom imports
+from benchmarking.measurement_generator import generate_measurement
+from data_preparation.preparation_metrics import METRICS_FILENAME
+from data_preparation_main import data_preparation_main
+
+
+def benchmark_data_preparation(benchmark_path, durations_min=[1, 10, 60], num_cameras=10, variants=None, gin_config_path="./configs/data_preparation_config.gin", regenerate_measurements=False):
+    """
+        Function to benchmark the complete data preparation and each of its steps for synthetic measurements of different durations.
+        The measurements are generated by benchmarking.measurement_generator.generate_measurement() and are reused by later runs, as generating
+        long measurements takes some time. The results are printed and stored as benchmark_results.json in benchmark_path.
+
+        NOTE: A measurement of 60 min with 10 cameras needs about 25 GB of disk space, which is needed two more times for the temp dir and the prepared measurement.
+
+        Parameters:
+            - benchmark_path (str): Path to dir where the generated measurements, the temp dirs, the prepared measurements and the results are stored
+            - durations_min (list): Default = [1, 10, 60]. Durations of the measurements in minutes
+            - num_cameras (int): Default = 10. Number of camera dirs for the generated measurements
+            - variants (dict): Default = None. Dict containing the list of gin bindings for each variant which shall be benchmarked (in addition to gin_config_path)
+                               If None, the file based and the in-memory data preparation are benchmarked.
+            - gin_config_path (str): Default = "./configs/data_preparation_config.gin". Gin config which is used for all variants
+            - regenerate_measurements (bool): Default = False. Select whether already generated measurements shall be generated again
+
+        Returns:
+            - results (list): List containing a dict with the duration, variant, total wall time and metrics of each step for each run
+    """
+    if variants == None:
+        variants = {"file_based": [],
+                    "in_memory": ["data_preparation_main.in_memory_preparation = True"]}
+
+    results = []
+    for duration_min in durations_min:
+        # each measurement gets its own base dir, as the name of the measurement only depends on the starting time
+        measurement_base_path = os.path.join(
+            benchmark_path, "measurements", f"{duration_min}_min_{num_cameras}_cameras")
+        if regenerate_measurements and os.path.exists(measurement_base_path):
+            shutil.rmtree(measurement_base_path)
+
+        if os.path.exists(measurement_base_path):
+            measurement_path = os.path.join(
+                measurement_base_path, os.listdir(measurement_base_path)[0])
+            print(f"Use already generated measurement {measurement_path}")
+        else:
+            print(
+                f"Generate measurement of {duration_min} min with {num_cameras} cameras")
+            start_time = time.perf_counter()
+            measurement_path = generate_measurement(
+                measurement_base_path, duration_s=duration_min * 60, num_cameras=num_cameras)
+            print(
+                f"Generated measurement {measurement_path} in {time.perf_counter() - start_time:.2f} s")
+
+        num_images, measurement_size_bytes = get_measurement_size(
+            measurement_path)
+
+        for variant_name, bindings in variants.items():
+            gin.clear_config()
+            gin.parse_config_files_and_bindings([gin_config_path], bindings)
+
+            temp_path = os.path.join(benchmark_path, "temp")
+            dataset_path = os.path.join(benchmark_path, "prepared_measurement")
+            for path in [temp_path, dataset_path]:
+                if os.path.exists(path):
+                    shutil.rmtree(path)
+
+            print(
+                f"Start data preparation of {duration_min} min measurement for variant '{variant_name}'")
+            start_time = time.perf_counter()
+            data_preparation_main(
+                measurement_path, temp_path=temp_path, dataset_path=dataset_path, copy_measurement=True)
+            wall_time = time.perf_counter() - start_time
+
+            with open(os.path.join(dataset_path, METRICS_FILENAME), "r") as f:
+                report = json.load(f)
+
+            results.append({"duration_min": duration_min,
+                            "num_cameras": num_cameras,
+                            "variant": variant_name,
+                            "bindings": bindings,
+                            "num_images": num_images,
+                            "measurement_size_mb": measurement_size_bytes / (1024 * 1024),
+                            "wall_time_s": wall_time,
+                            "images_per_s": num_images / wall_time,
+                            "steps": report["steps"],
+                            "total": report["total"]})
+            print_benchmark_result(results[-1])
+
+            # remove the prepared measurement to free the disk space for the next run
+            for path in [temp_path, dataset_path]:
+                shutil.rmtree(path)
+
+            # store the results after each run, so that they are available even if a later run fails
+            with open(os.path.join(benchmark_path, "benchmark_results.json"), "w") as f:
+                json.dump(results, f, indent=3)
+
+    return results
+
+
+def get_measurement_size(measurement_path):
+    """
+        Function to get the number of images and the size of all files of a measurement.
+
+        Parameters:
+            - measurement_path (str): Path to the measurement
+
+        Returns:
+            - num_images (int): Number of images of all cameras
+            - measurement_size_bytes (int): Size of all files in bytes
+    """
+    num_images = 0
+    measurement_size_bytes = 0
+    for root, dirs, files in os.walk(measurement_path):
+        for file in files:
+            if file.endswith(".jpg"):
+                num_images += 1
+            measurement_size_bytes += os.path.getsize(
+                os.path.join(root, file))
+
+    return num_images, measurement_size_bytes
+
+
+def print_benchmark_result(result):
+    """
+        Function to print the total wall time and the wall and CPU time of each step for the result of a run of benchmark_data_preparation().
+
+        Parameters:
+            - result (dict): Result of a single run (see benchmark_data_preparation())
+    """
+    print(f"Data preparation of {result['duration_min']} min measurement ({result['num_images']} images, {result['measurement_size_mb']:.0f} MB) "
+          f"for variant '{result['variant']}' took {result['wall_time_s']:.2f} s ({result['images_per_s']:.1f} images/s)")
+    for step_name, step_metrics in result["steps"].items():
+        print(f"\t{step_name}: {step_metrics['wall_time_s']:.2f} s wall time, "
+              f"{step_metrics['cpu_time_s'] + step_metrics['cpu_time_children_s']:.2f} s CPU time")
+
+
+if __name__ == "__main__":
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    benchmark_path = os.path.join(file_dir, "benchmark")
+
+    results = benchmark_data_preparation(benchmark_path)
+
+    print("\n### Summary ###")
+    for result in results:
+        print(f"{result['duration_min']} min, {result['variant']}: {result['wall_time_s']:.2f} s ({result['images_per_s']:.1f} images/s)")
@@ -0,0 +1,303 @@
+import os
+import io
+import json
+import numpy as np
+from datetime import datetime, timedelta
+from PIL import Image
+
+# custom imports
+from custom_utils.csv_io import write_csv_data
+
+# stereo cameras in the order they are used for less than 10 cameras (each stereo camera has a dir for the left and one for the right images)
+STEREO_CAMERAS = ["BellyCam", "HeadCam", "LeftCam", "ChinCam", "RightCam"]
+# number of the PC which captures the images of the stereo camera, which is also the number of its time diff in the info.json
+CAMERA_PCS = {"ChinCam": 13, "HeadCam": 13,
+              "LeftCam": 14, "RightCam": 14, "BellyCam": 15}
+# period of the samples of the prepared measurement in ms
+IMAGE_PERIOD_MS = 200
+# capturing period of the stereo cameras in ms (BellyCam captures images with 10 FPS, all others with 5 FPS)
+CAMERA_PERIODS_MS = {"ChinCam": 200, "HeadCam": 200,
+                     "LeftCam": 200, "RightCam": 200, "BellyCam": 100}
+# number of channels for each timeseries sensor (same as in testdata/measurement_25_07__15_03)
+TIMESERIES_SENSORS = {"accelerometer": 3, "bodyHeight": 1, "footForce": 4, "footRaiseHeight": 1,
+                      "gyroscope": 3, "mode": 1, "temperature": 1, "velocity": 3, "yawSpeed": 1}
+
+# the IMU provides the data with 50 Hz, but it's polled with ~100 Hz (900 values in 9.756 s in testdata/measurement_25_07__15_03)
+IMU_PERIOD_MS = 20
+POLLING_PERIOD_MS = 10.84
+# number of polled values stored in a single .csv file
+CSV_CHUNK_SIZE = 900
+
+
+def generate_measurement(measurement_base_path, duration_s=60, num_cameras=10, start_timestamp=datetime(2023, 7, 25, 15, 3, 16), floor_type="tiles",
+                         frame_drop_probability=0.01, image_drop_probability=0.002, image_size=(928, 800), num_image_variants=8, jpeg_quality=85, seed=0):
+    """
+        Function to generate a synthetic raw measurement with the same structure as the measurements from the Unitree Go1, so that the data preparation
+        can be benchmarked with measurements of any duration. The measurement dir is named like the real measurements ("measurement_dd_mm__hh_mm").
+
+        Characteristics of the generated data:
+            - Images of each stereo camera have the same timestamps for left and right in the filenames "Left_hh_mm_ss_xxx.jpg" and "Right_hh_mm_ss_xxx.jpg"
+              based on the clock of the PC of the camera (shifted by the time diff from the info.json).
+            - Images are captured with 5 FPS (BellyCam with 10 FPS) with a jitter of +- 5 % of the capturing period. Each camera starts 300 - 800 ms after the IMU.
+            - Frames are dropped for both images of a stereo camera with frame_drop_probability and single images with image_drop_probability.
+              No two subsequent frames are dropped, as gaps of 1 s or more between images are not supported by the data preparation.
+              BellyCam images are never dropped, as the removal of every second BellyCam image (see get_obsolete_images_at_beginning()) only works without gaps.
+            - Images are random textures stored as JPEG with a similar size as the real images, where num_image_variants different images are used for each camera.
+            - IMU data of all sensors is a 50 Hz signal polled with ~100 Hz, so that most values occur twice and some only once or three times.
+            - IMU data is stored in .csv files with CSV_CHUNK_SIZE values which are named by the timestamp of their first value.
+
+        Parameters:
+            - measurement_base_path (str): Path to dir where the measurement dir shall be created
+            - duration_s (float): Default = 60. Duration of the IMU measurement in seconds
+            - num_cameras (int): Default = 10. Number of camera dirs (must be even, as stereo cameras are used in the order of STEREO_CAMERAS)
+            - start_timestamp (datetime.datetime): Default = 25.07.2023 15:03:16. Timestamp of the first IMU value
+            - floor_type (str): Default = "tiles". Label of the measurement (see configs/label_mapping.json)
+            - frame_drop_probability (float): Default = 0.01. Probability that a frame is missing for both images of a stereo camera
+            - image_drop_probability (float): Default = 0.002. Probability that a single image of a stereo camera is missing
+            - image_size (tuple): Default = (928, 800). Size (width, height) of the images
+            - num_image_variants (int): Default = 8. Number of different images for each camera, which are encoded once and written for all frames
+            - jpeg_quality (int): Default = 85. JPEG quality of the images
+            - seed (int): Default = 0. Seed for the random number generator, so that the same measurement is generated for the same parameters
+
+        Returns:
+            - measurement_path (str): Path to the generated measurement
+    """
+    if num_cameras % 2 != 0 or num_cameras < 2 or num_cameras > 2 * len(STEREO_CAMERAS):
+        raise Exception(
+            f"Number of cameras must be even and between 2 and {2 * len(STEREO_CAMERAS)}, but it's {num_cameras}!")
+
+    rng = np.random.default_rng(seed)
+    duration_ms = int(duration_s * 1000)
+
+    measurement_path = os.path.join(
+        measurement_base_path, start_timestamp.strftime("measurement_%d_%m__%H_%M"))
+    os.makedirs(measurement_path, exist_ok=True)
+
+    time_diff_data = get_time_diff_data(rng)
+    with open(os.path.join(measurement_path, "info.json"), "w") as f:
+        json.dump({"measurement_date": start_timestamp.strftime("%d.%m.%Y"),
+                   "floor type": floor_type,
+                   **time_diff_data,
+                   "starting_time": start_timestamp.strftime("%H:%M:%S"),
+                   "end_time": (start_timestamp + timedelta(milliseconds=duration_ms)).strftime("%H:%M:%S")}, f, indent=3)
+
+    # IMU data
+    polling_timestamps_ms = get_polling_timestamps(duration_ms, rng)
+    # index of the 50 Hz value which is returned for each polling of the IMU
+    value_indices = (polling_timestamps_ms // IMU_PERIOD_MS).astype(int)
+    IMU_data = generate_IMU_data(value_indices[-1] + 1, rng)
+    for sensor, data in IMU_data.items():
+        write_timeseries_chunks(os.path.join(measurement_path, sensor),
+                                data[value_indices], polling_timestamps_ms, start_timestamp)
+
+    # images
+    for stereo_camera in STEREO_CAMERAS[:num_cameras // 2]:
+        time_diff = time_diff_data[f"time_diff_{CAMERA_PCS[stereo_camera]}_in_ms"]
+        # timestamps of the local PC (= IMU) must be converted to the clock of the PC of the camera
+        clock_offset_ms = - \
+            time_diff["corrected"] if time_diff["later timestamp on"] == "local PC" else time_diff["corrected"]
+
+        # images of cameras with a higher frame rate (BellyCam) are never dropped
+        if CAMERA_PERIODS_MS[stereo_camera] == IMAGE_PERIOD_MS:
+            camera_frame_drop_probability = frame_drop_probability
+            camera_image_drop_probability = image_drop_probability
+        else:
+            camera_frame_drop_probability = 0
+            camera_image_drop_probability = 0
+
+        frame_timestamps_ms = get_frame_timestamps(
+            duration_ms, CAMERA_PERIODS_MS[stereo_camera], camera_frame_drop_probability, rng)
+        image_variants = create_image_variants(
+            image_size, num_image_variants, jpeg_quality, rng)
+
+        for side in ["Left", "Right"]:
+            camera_path = os.path.join(
+                measurement_path, stereo_camera + side)
+            os.makedirs(camera_path, exist_ok=True)
+            for index, frame_timestamp_ms in enumerate(frame_timestamps_ms):
+                if rng.random() < camera_image_drop_probability:
+                    continue
+                timestamp = start_timestamp + \
+                    timedelta(milliseconds=round(
+                        frame_timestamp_ms + clock_offset_ms))
+                with open(os.path.join(camera_path, f"{side}_{get_timestamp_string(timestamp)}.jpg"), "wb") as f:
+                    f.write(image_variants[index % num_image_variants])
+
+    return measurement_path
+
+
+def get_time_diff_data(rng):
+    """
+        Function to create random time diffs between the local PC (which stores the IMU data) and the PCs of the cameras in the format of the info.json.
+
+        Parameters:
+            - rng (np.random.Generator): Random number generator
+
+        Returns:
+            - (dict): Dict containing "time_diff_13_in_ms", "time_diff_14_in_ms" and "time_diff_15_in_ms"
+    """
+    time_diff_data = {}
+    for pc in sorted(set(CAMERA_PCS.values())):
+        time_diff = float(rng.uniform(200, 2000))
+        time_diff_data[f"time_diff_{pc}_in_ms"] = {"normal": time_diff,
+                                                   "corrected": time_diff,
+                                                   "duration": float(rng.uniform(150, 300)),
+                                                   "later timestamp on": str(rng.choice(["local PC", "remote PC"]))}
+    return time_diff_data
+
+
+def get_polling_timestamps(duration_ms, rng):
+    """
+        Function to get the timestamps (relative to the first value) when the IMU was polled.
+        The polling period is POLLING_PERIOD_MS with a small jitter and rare delays of 20 - 30 ms (e.g. due to other processes on the PC).
+
+        Parameters:
+            - duration_ms (int): Duration of the IMU measurement in ms
+            - rng (np.random.Generator): Random number generator
+
+        Returns:
+            - (np.array): Timestamps in ms
+    """
+    num_values = int(duration_ms / POLLING_PERIOD_MS) + 1
+    periods = POLLING_PERIOD_MS + rng.uniform(-0.3, 0.3, num_values)
+    periods[rng.random(num_values) < 0.002] += rng.uniform(20, 30)
+    periods[0] = 0
+
+    polling_timestamps_ms = np.cumsum(periods)
+    return polling_timestamps_ms[polling_timestamps_ms < duration_ms]
+
+
+def generate_IMU_data(num_values, rng):
+    """
+        Function to generate the 50 Hz signals of all timeseries sensors for a robot walking with a gait frequency of 2 Hz.
+        The values are stored as float32 like the values provided by the Unitree Go1.
+
+        Parameters:
+            - num_values (int): Number of values for each sensor
+            - rng (np.random.Generator): Random number generator
+
+        Returns:
+            - (dict): Dict containing an array with shape (num_values, number of channels) for each sensor in TIMESERIES_SENSORS
+    """
+    phase = 2 * np.pi * 2 * np.arange(num_values) * IMU_PERIOD_MS / 1000
+    legs_phase = phase[:, None] + np.array([0, np.pi, np.pi, 0])
+
+    def noise(scale, num_channels):
+        return rng.normal(0, scale, (num_values, num_channels))
+
+    IMU_data = {"accelerometer": np.array([0.1, -0.15, 9.75]) + 1.5 * np.sin(phase[:, None] + np.array([0, 1, 2])) + noise(0.3, 3),
+                "bodyHeight": 0.28 + 0.02 * np.sin(phase[:, None]) + noise(0.005, 1),
+                "footForce": np.round(np.clip(280 + 300 * np.sin(legs_phase), 0, None)),
+                "footRaiseHeight": np.zeros((num_values, 1)),
+                "gyroscope": 0.5 * np.sin(phase[:, None] + np.array([0.5, 1.5, 2.5])) + noise(0.2, 3),
+                "mode": np.full((num_values, 1), 2.0),
+                "temperature": np.full((num_values, 1), 79.0),
+                "velocity": np.array([0.25, 0, 0]) + noise(0.05, 3),
+                "yawSpeed": 0.3 * np.sin(phase[:, None] / 4) + noise(0.1, 1)}
+
+    return {sensor: data.astype(np.float32) for sensor, data in IMU_data.items()}
+
+
+def write_timeseries_chunks(sensor_path, data, polling_timestamps_ms, start_timestamp):
+    """
+        Function to store the polled values of a sensor in .csv files with CSV_CHUNK_SIZE values, which are named by the timestamp of their first value.
+
+        Parameters:
+            - sensor_path (str): Path to the dir of the sensor
+            - data (np.array): Polled values of the sensor
+            - polling_timestamps_ms (np.array): Timestamps of the polled values in ms relative to start_timestamp
+            - start_timestamp (datetime.datetime): Timestamp of the first value
+    """
+    os.makedirs(sensor_path, exist_ok=True)
+    for chunk_start in range(0, len(data), CSV_CHUNK_SIZE):
+        timestamp = start_timestamp + \
+            timedelta(milliseconds=int(polling_timestamps_ms[chunk_start]))
+        write_csv_data(os.path.join(sensor_path, get_timestamp_string(timestamp) + ".csv"),
+                       data[chunk_start:chunk_start + CSV_CHUNK_SIZE])
+
+
+def get_frame_timestamps(duration_ms, period_ms, frame_drop_probability, rng):
+    """
+        Function to get the timestamps (relative to the first IMU value) of all frames of a stereo camera.
+        The camera starts 300 - 800 ms after the IMU and stops up to 500 ms before the end of the IMU measurement.
+
+        Parameters:
+            - duration_ms (int): Duration of the IMU measurement in ms
+            - period_ms (int): Capturing period of the camera in ms
+            - frame_drop_probability (float): Probability that a frame is missing (but never two subsequent frames)
+            - rng (np.random.Generator): Random number generator
+
+        Returns:
+            - (np.array): Timestamps in ms
+    """
+    start_ms = rng.uniform(300, 800)
+    end_ms = duration_ms - rng.uniform(0, 500)
+    frame_timestamps_ms = np.arange(start_ms, end_ms, period_ms)
+    frame_timestamps_ms += rng.uniform(-0.05, 0.05,
+                                       len(frame_timestamps_ms)) * period_ms
+
+    dropped_frames = rng.random(len(frame_timestamps_ms)) < frame_drop_probability
+    # first frame is kept and the frame after a dropped frame is never dropped
+    dropped_frames[0] = False
+    dropped_frames[1:] &= ~dropped_frames[:-1]
+
+    return frame_timestamps_ms[~dropped_frames]
+
+
+def create_image_variants(image_size, num_image_variants, jpeg_quality, rng):
+    """
+        Function to create random textures encoded as JPEG, which have about the same file size and decoding time as the real images.
+
+        Parameters:
+            - image_size (tuple): Size (width, height) of the images
+            - num_image_variants (int): Number of images to create
+            - jpeg_quality (int): JPEG quality of the images
+            - rng (np.random.Generator): Random number generator
+
+        Returns:
+            - (list): List with the encoded images (bytes)
+    """
+    image_variants = []
+    for _ in range(num_image_variants):
+        # smooth texture from upscaled random pixels with additional noise
+        low_resolution_image = Image.fromarray(rng.integers(
+            0, 256, (max(1, image_size[1] // 29), max(1, image_size[0] // 29), 3), dtype=np.uint8))
+        image = np.asarray(low_resolution_image.resize(
+            image_size, Image.BICUBIC), dtype=np.float32) + rng.normal(0, 4, (image_size[1], image_size[0], 3))
+
+        image_bytes = io.BytesIO()
+        Image.fromarray(np.clip(image, 0, 255).astype(np.uint8)).save(
+            image_bytes, format="JPEG", quality=jpeg_quality)
+        image_variants.append(image_bytes.getvalue())
+
+    return image_variants
+
+
+def get_timestamp_string(timestamp):
+    """
+        Function to convert a timestamp to the format "hh_mm_ss_xxx" (where xxx are the milliseconds) which is used in the filenames of the measurements.
+
+        Parameters:
+            - timestamp (datetime.datetime): Timestamp to convert
+
+        Returns:
+            - (str): Timestamp string
+    """
+    return timestamp.strftime("%H_%M_%S_") + f"{timestamp.microsecond // 1000:03d}"
+
+
+if __name__ == "__main__":
+    import time
+
+    start_time = time.perf_counter()
+    measurement_path = generate_measurement(
+        "./temp/generated_measurements", duration_s=60)
+    print(
+        f"Generated measurement {measurement_path} in {time.perf_counter() - start_time:.2f} s")
+
+    for root, dirs, files in os.walk(measurement_path):
+        for dir in sorted(dirs):
+            filenames = sorted(os.listdir(os.path.join(root, dir)))
+            print(
+                f"{dir}: {len(filenames)} files from {filenames[0]} to {filenames[-1]}")
+        break
@@ -0,0 +1,212 @@
+import gin
+import itertools
+import numpy as np
+
+# number format of np.savetxt(), which is used for all IMU data
+CSV_NUMBER_FORMAT = "%.18e"
+
+
+def read_csv_with_genfromtxt(file, delimiter=";", max_rows=None):
+    """
+        Function to read numeric data from a .csv file with np.genfromtxt(), which is the reference for all other readers.
+
+        Parameters:
+            - file (str, file or list): Path to the .csv file, already opened file or list of lines
+            - delimiter (str): Default = ";". Delimiter between the values of a row
+            - max_rows (int): Default = None. Maximum number of rows to read from the start of the file (None = all rows)
+
+        Returns:
+            - (np.array): Data of the file (single rows and columns as 1D array, missing values as NaN)
+    """
+    return np.genfromtxt(file, delimiter=delimiter, max_rows=max_rows)
+
+
+def read_csv_with_loadtxt(file, delimiter=";", max_rows=None):
+    """
+        Function to read numeric data from a .csv file with the same result as read_csv_with_genfromtxt().
+        np.loadtxt() parses the file in C (since NumPy 1.23) and is therefore much faster than np.genfromtxt(), which parses each value in Python.
+        As np.loadtxt() doesn't support missing or invalid values, the file is read by np.genfromtxt() in this case, which replaces them by NaN.
+
+        Parameters:
+            - file (str, file or list): Path to the .csv file, already opened file or list of lines
+            - delimiter (str): Default = ";". Delimiter between the values of a row
+            - max_rows (int): Default = None. Maximum number of rows to read from the start of the file (None = all rows)
+
+        Returns:
+            - (np.array): Data of the file (single rows and columns as 1D array, missing values as NaN)
+    """
+    start_position = file.tell() if hasattr(file, "tell") else None
+    try:
+        return np.loadtxt(file, delimiter=delimiter, max_rows=max_rows)
+    except ValueError:
+        # already opened file must be read again from the start
+        if start_position != None:
+            file.seek(start_position)
+        return np.genfromtxt(file, delimiter=delimiter, max_rows=max_rows)
+
+
+def write_csv_with_savetxt(file_path, data, delimiter=";"):
+    """
+        Function to write numeric data to a .csv file with np.savetxt(), which is the reference for all other writers.
+
+        Parameters:
+            - file_path (str or file): Path to the .csv file or already opened file (data is appended)
+            - data (np.array): 1D (single column) or 2D array with the data
+            - delimiter (str): Default = ";". Delimiter between the values of a row
+    """
+    np.savetxt(file_path, data, delimiter=delimiter)
+
+
+def write_csv_with_format_string(file_path, data, delimiter=";"):
+    """
+        Function to write numeric data to a .csv file with the same content as write_csv_with_savetxt().
+        Instead of formatting each row separately, all values are formatted by a single format string for the whole file.
+
+        Parameters:
+            - file_path (str or file): Path to the .csv file or already opened file (data is appended)
+            - data (np.array): 1D (single column) or 2D array with the data
+            - delimiter (str): Default = ";". Delimiter between the values of a row
+    """
+    data = np.asarray(data)
+    if np.ndim(data) == 1:
+        # 1D array is written as single column like by np.savetxt()
+        data = data.reshape(-1, 1)
+    elif np.ndim(data) != 2:
+        raise ValueError(
+            f"Expected 1D or 2D array, got {np.ndim(data)}D array instead")
+
+    row_format = delimiter.join([CSV_NUMBER_FORMAT] * data.shape[1]) + "\n"
+    content = (row_format * data.shape[0]) % tuple(data.ravel().tolist())
+    if isinstance(file_path, str):
+        with open(file_path, "w") as f:
+            f.write(content)
+    else:
+        file_path.write(content)
+
+
+# reader and writer of each backend, all backends read and write the same data
+CSV_BACKENDS = {"numpy": (read_csv_with_genfromtxt, write_csv_with_savetxt),
+                "fast": (read_csv_with_loadtxt, write_csv_with_format_string)}
+
+
+@gin.configurable
+def get_csv_backend(backend="fast"):
+    """
+        Function to get the backend which is used for reading and writing IMU data, if no backend is provided explicitly.
+
+        Parameters:
+            - backend (str): Default = "fast". Name of the backend (see CSV_BACKENDS)
+
+        Returns:
+            - (str): Name of the backend
+    """
+    if backend not in CSV_BACKENDS:
+        raise Exception(
+            f"Unknown CSV backend '{backend}', select one of {list(CSV_BACKENDS)}")
+    return backend
+
+
+def read_csv_data(file, delimiter=";", backend=None, max_rows=None):
+    """
+        Function to read numeric data like IMU data from a .csv file with the same result as np.genfromtxt(file, delimiter=delimiter).
+
+        Parameters:
+            - file (str, file or list): Path to the .csv file, already opened file or list of lines
+            - delimiter (str): Default = ";". Delimiter between the values of a row
+            - backend (str): Default = None. Name of the backend (see CSV_BACKENDS), None -> backend from get_csv_backend()
+            - max_rows (int): Default = None. Maximum number of rows to read from the start of the file (None = all rows)
+
+        Returns:
+            - (np.array): Data of the file (single rows and columns as 1D array, missing values as NaN)
+    """
+    if backend == None:
+        backend = get_csv_backend()
+    return CSV_BACKENDS[backend][0](file, delimiter, max_rows)
+
+
+def write_csv_data(file_path, data, delimiter=";", backend=None):
+    """
+        Function to write numeric data like IMU data to a .csv file with the same content as np.savetxt(file_path, data, delimiter=delimiter).
+
+        Parameters:
+            - file_path (str or file): Path to the .csv file or already opened file (data is appended)
+            - data (np.array): 1D (single column) or 2D array with the data
+            - delimiter (str): Default = ";". Delimiter between the values of a row
+            - backend (str): Default = None. Name of the backend (see CSV_BACKENDS), None -> backend from get_csv_backend()
+    """
+    if backend == None:
+        backend = get_csv_backend()
+    CSV_BACKENDS[backend][1](file_path, data, delimiter)
+
+
+def read_csv_chunk(file, chunk_size, delimiter=";", backend=None):
+    """
+        Function to read the next rows of an already opened .csv file, so that long files can be processed chunk by chunk.
+
+        Parameters:
+            - file (file): Opened .csv file
+            - chunk_size (int): Maximum number of rows to read
+            - delimiter (str): Default = ";". Delimiter between the values of a row
+            - backend (str): Default = None. Name of the backend (see CSV_BACKENDS), None -> backend from get_csv_backend()
+
+        Returns:
+            - (np.array): 2D array with the data of the rows (also for single rows and columns), no rows at the end of the file
+    """
+    lines = [line for line in itertools.islice(
+        file, chunk_size) if line.strip() != ""]
+    if lines == []:
+        return np.empty((0, 0))
+    return np.reshape(read_csv_data(lines, delimiter, backend), (len(lines), -1))
+
+
+if __name__ == "__main__":
+    import os
+    import time
+    import tempfile
+
+    # check that all backends read and write exactly the same data as NumPy for the IMU data of a measurement
+    measurement_path = r"./testdata/measurement_25_07__15_03"
+    backends = list(CSV_BACKENDS)
+
+    file_paths = []
+    for sensor in sorted(os.listdir(measurement_path)):
+        sensor_path = os.path.join(measurement_path, sensor)
+        if os.path.isdir(sensor_path) and not "Cam" in sensor:
+            file_paths.extend(os.path.join(sensor_path, filename)
+                              for filename in sorted(os.listdir(sensor_path)))
+
+    durations = {backend: [0, 0] for backend in backends}
+    with tempfile.TemporaryDirectory() as temp_path:
+        for file_path in file_paths:
+            reference_data = read_csv_with_genfromtxt(file_path)
+            written_files = {}
+            for backend in backends:
+                start_time = time.perf_counter()
+                data = read_csv_data(file_path, backend=backend)
+                durations[backend][0] += time.perf_counter() - start_time
+                if data.shape != reference_data.shape or not np.array_equal(data, reference_data, equal_nan=True):
+                    raise Exception(
+                        f"Backend '{backend}' read different data from {file_path}")
+                if not np.array_equal(read_csv_data(file_path, backend=backend, max_rows=10), reference_data[:10], equal_nan=True):
+                    raise Exception(
+                        f"Backend '{backend}' read different first rows from {file_path}")
+
+                written_files[backend] = os.path.join(
+                    temp_path, f"{backend}.csv")
+                start_time = time.perf_counter()
+                write_csv_data(written_files[backend],
+                               reference_data, backend=backend)
+                durations[backend][1] += time.perf_counter() - start_time
+
+            contents = set()
+            for backend, written_file in written_files.items():
+                with open(written_file, "r") as f:
+                    contents.add(f.read())
+            if len(contents) != 1:
+                raise Exception(
+                    f"Backends wrote different files for the data of {file_path}")
+
+    print(f"All backends read and wrote identical data for {len(file_paths)} files")
+    for backend, (read_duration, write_duration) in durations.items():
+        print(
+            f"{backend}: {read_duration:.2f} s reading, {write_duration:.2f} s writing")
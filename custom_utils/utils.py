@@ -1,10 +1,15 @@
 import os
-from distutils.dir_util import copy_tree
 import shutil
 import json
 import zipfile
 import logging
 
+# strategies for copying files (see copy_file())
+COPY_STRATEGIES = ["copy", "hardlink", "reflink", "move"]
+
+# ioctl request code to clone a file on Linux filesystems with copy-on-write support (e.g. btrfs, xfs)
+FICLONE = 0x40049409
+
 
 def clean_temp_dir():
     """
@@ -38,7 +43,113 @@ def clean_results_dir():
             os.remove(os.path.join(root, file))
 
 
-def copy_measurement_to_temp(measurement_path):
+def reflink_file(source_path, destination_path):
+    """
+        Util function to create a copy-on-write clone of a file, which takes no additional disk space till one of the files is modified.
+
+        Parameters:
+            - source_path (str): Path to the file which shall be cloned
+            - destination_path (str): Path where the clone shall be created (must not exist)
+
+        Returns:
+            - (bool): True if the clone was created, False if the filesystem or OS doesn't support it
+    """
+    try:
+        import fcntl
+    except ImportError:
+        # not available on Windows
+        return False
+
+    try:
+        with open(source_path, "rb") as source_file, open(destination_path, "wb") as destination_file:
+            fcntl.ioctl(destination_file.fileno(),
+                        FICLONE, source_file.fileno())
+    except OSError:
+        if os.path.exists(destination_path):
+            os.remove(destination_path)
+        return False
+
+    shutil.copystat(source_path, destination_path)
+    return True
+
+
+def copy_file(source_path, destination_path, copy_strategy="copy"):
+    """
+        Util function to copy a single file with the selected copy strategy.
+        An existing file at destination_path is removed first, so that a file which is hardlinked to another location is never modified.
+
+        Parameters:
+            - source_path (str): Path to the file which shall be copied
+            - destination_path (str): Path where the file shall be copied to
+            - copy_strategy (str): Default = "copy". One of the following strategies:
+                                   "copy": Copy the content of the file
+                                   "hardlink": Create a hardlink, which takes no additional disk space (falls back to "copy" e.g. for different filesystems)
+                                   "reflink": Create a copy-on-write clone, which takes no additional disk space (falls back to "copy" if not supported by the filesystem)
+                                   "move": Move the file, so it's not available at source_path anymore (copy and delete for different filesystems)
+    """
+    if copy_strategy not in COPY_STRATEGIES:
+        raise Exception(
+            f"Copy strategy '{copy_strategy}' is not supported! Supported strategies are: {COPY_STRATEGIES}")
+
+    if os.path.lexists(destination_path):
+        os.remove(destination_path)
+
+    if copy_strategy == "move":
+        shutil.move(source_path, destination_path)
+        return
+    elif copy_strategy == "hardlink":
+        try:
+            os.link(source_path, destination_path)
+            return
+        except OSError:
+            # e.g. different filesystems or filesystem without hardlinks
+            pass
+    elif copy_strategy == "reflink":
+        if reflink_file(source_path, destination_path):
+            return
+
+    shutil.copy2(source_path, destination_path)
+
+
+def copy_dir(source_path, destination_path, copy_strategy="copy"):
+    """
+        Util function to copy all files from source_path including all sub dirs to destination_path with the selected copy strategy.
+        Existing files in destination_path are replaced, other files in destination_path are kept.
+        For copy_strategy == "move" only the empty dir source_path is left afterwards.
+
+        Parameters:
+            - source_path (str): Path to the dir which shall be copied
+            - destination_path (str): Path to the dir where the files shall be copied to (will be created if needed)
+            - copy_strategy (str): Default = "copy". Strategy for copying the files (see copy_file())
+
+        Returns:
+            - copied_files (list): List of paths of all files in destination_path which were copied
+    """
+    if not os.path.isdir(source_path):
+        raise Exception(f"Cannot copy '{source_path}' as it's not a directory")
+
+    copied_files = []
+    for root, dirs, files in os.walk(source_path):
+        destination_root = os.path.join(
+            destination_path, os.path.relpath(root, source_path))
+        os.makedirs(destination_root, exist_ok=True)
+
+        for file in files:
+            destination_file = os.path.join(destination_root, file)
+            copy_file(os.path.join(root, file),
+                      destination_file, copy_strategy)
+            copied_files.append(destination_file)
+
+    if copy_strategy == "move":
+        # remove the empty sub dirs which are left (source_path itself is kept)
+        for root, dirs, files in os.walk(source_path, topdown=False):
+            for dir in dirs:
+                os.rmdir(os.path.join(root, dir))
+
+    return copied_files
+
+
+def copy_measurement_to_temp(measurement_path, temp_path=None, copy_strategy="copy"):
     """
         Util function to copy a measurement from measurement_path to the temp/ dir in the repository for further preprocessing.
         If measurement_path points to a zip file, the zip file will be extracted to temp/ instead.
@@ -46,12 +157,21 @@ def copy_measurement_to_temp(measurement_path):
         Parameters:
             - measurement_path: Path to the directory of the measurement which includes all the sensor data and the info.json file.
                                 NOTE: If measurement_path ends with ".zip", this file will be extracted instead.
+            - temp_path (str): Path to the directory where the measurement shall be copied to (Default = None)
+                               If temp_path == None, then the default path will be taken "../temp"
+            - copy_strategy (str): Default = "copy". Strategy for copying the files (see copy_file())
+                                   NOTE: "move" is not allowed, as the raw measurement must never be changed.
     """
-    file_dir = os.path.dirname(os.path.abspath(__file__))
-    temp_path = os.path.join(file_dir, os.pardir, "temp")
+    if temp_path == None:
+        file_dir = os.path.dirname(os.path.abspath(__file__))
+        temp_path = os.path.join(file_dir, os.pardir, "temp")
+
+    if copy_strategy == "move":
+        raise Exception(
+            f"Copy strategy 'move' is not allowed for the raw measurement {measurement_path}")
 
     logging.info(
-        f"{measurement_path} will be copied/ extracted to {temp_path}")
+        f"{measurement_path} will be copied/ extracted to {temp_path} (copy strategy '{copy_strategy}')")
 
     if ".zip" == measurement_path[-4:]:
         # unzip zip file to temp path if measurement path point to zip file
@@ -59,12 +179,12 @@ def copy_measurement_to_temp(measurement_path):
             zip_file.extractall(temp_path)
     else:
         # if measurement path contains files, directly copy the measurement path content
-        copy_tree(measurement_path, temp_path)
+        copy_dir(measurement_path, temp_path, copy_strategy)
 
     logging.info(f"Files were successfully copied to {temp_path}")
 
 
-def copy_prepared_dataset(temp_path=None, dataset_path=None):
+def copy_prepared_dataset(temp_path=None, dataset_path=None, copy_strategy="copy"):
     """
         Util function to copy a prepared dataset from the temp/ dir in the repository to dataset_path.
         If dataset_path is equal to None, the dataset will be copied to results/ dir in the repository.
@@ -74,6 +194,7 @@ def copy_prepared_dataset(temp_path=None, dataset_path=None):
                                If temp_path == None, then the default path will be taken "../temp"
             - dataset_path (str): Path to the directory where the prepared dataset shall be copied to (Default = None)
                                If temp_path == None, then the default path will be taken "../results"
+            - copy_strategy (str): Default = "copy". Strategy for copying the files (see copy_file())
     """
     file_dir = os.path.dirname(os.path.abspath(__file__))
     if temp_path == None:
@@ -82,10 +203,11 @@ def copy_prepared_dataset(temp_path=None, dataset_path=None):
     if dataset_path == None:
         dataset_path = os.path.join(file_dir, os.pardir, "results")
 
-    logging.info(f"Prepared dataset will be copied to {dataset_path}")
+    logging.info(
+        f"Prepared dataset will be copied to {dataset_path} (copy strategy '{copy_strategy}')")
 
     # if measurement path contains files, directly copy the measurement path content
-    copy_tree(temp_path, dataset_path)
+    copy_dir(temp_path, dataset_path, copy_strategy)
 
     logging.info(f"Files were successfully copied to {dataset_path}")
 
@@ -140,6 +262,12 @@ class CustomLogger():
                 - log_dir_path (str): Path to dir where the log file shall be stored
                 - stream_log (bool): boolean flag for plotting to console or not
         """
+        # remove file handlers from previous runs which were not stopped (e.g. due to an exception during the run)
+        for handler in self.logger.handlers[:]:
+            if isinstance(handler, logging.FileHandler):
+                self.logger.removeHandler(handler)
+                handler.close()
+
         # create log file
         log_file_path = os.path.join(log_dir_path, "data_preparation.log")
         with open(log_file_path, "a"):
@@ -153,3 +281,14 @@ class CustomLogger():
         if stream_log:
             self.stream_handler = logging.StreamHandler()
             self.logger.addHandler(self.stream_handler)
+
+    def stop_logger(self):
+        """
+            Remove and close the handlers which were added by start_logger(), so that following runs don't log to this log file.
+        """
+        for handler_name in ["file_handler", "stream_handler"]:
+            handler = getattr(self, handler_name, None)
+            if handler != None:
+                self.logger.removeHandler(handler)
+                handler.close()
+                setattr(self, handler_name, None)
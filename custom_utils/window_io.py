@@ -0,0 +1,349 @@
+import os
+import gin
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# differentiation needed to support execution of file directly and to allow usage by FloorTypeDetectionDataset as submodule in other projects
+if __name__ == "__main__":
+    from csv_io import read_csv_data, write_csv_data
+elif __name__.startswith("FTDDataset."):
+    from FTDDataset.custom_utils.csv_io import read_csv_data, write_csv_data
+else:
+    from custom_utils.csv_io import read_csv_data, write_csv_data
+
+# formats for storing the windows of the timeseries sensors:
+#   - "csv": one .csv file per window (human readable)
+#   - "npy": one .npy file per window
+#   - "stacked": one .npy file with all windows of a measurement per sensor and a .txt file with the sample name of each window
+WINDOW_FORMATS = ["csv", "npy", "stacked"]
+# file extensions of windows which are stored as one file per window (windows are stored as .npy files during preparation for "stacked")
+WINDOW_FILE_EXTENSIONS = [".csv", ".npy"]
+# stacked windows are stored as "stacked_<stack name>.npy" and "stacked_<stack name>.txt" in the dir of the sensor
+STACKED_WINDOWS_PREFIX = "stacked_"
+# file in the prepared measurement/ dataset which stores the sampling rate of the windows of the timeseries sensors
+SAMPLING_RATE_FILENAME = "IMU_sampling_rate.json"
+
+
+def get_window_file_extension(window_format):
+    """
+        Function to get the file extension of the windows which are stored as one file per window during the data preparation.
+
+        Parameters:
+            - window_format (str): Format of the windows (see WINDOW_FORMATS)
+
+        Returns:
+            - (str): File extension of the windows (".csv" or ".npy")
+    """
+    if window_format not in WINDOW_FORMATS:
+        raise Exception(
+            f"Unknown window format '{window_format}', select one of {WINDOW_FORMATS}")
+    return ".csv" if window_format == "csv" else ".npy"
+
+
+def read_window(file_path, max_rows=None, memory_map=False):
+    """
+        Function to read a window which is stored as one file (format is selected by the file extension).
+
+        Parameters:
+            - file_path (str): Path to the .csv or .npy file
+            - max_rows (int): Default = None. Maximum number of rows to read from the start of the window (None = all rows)
+            - memory_map (bool): Default = False. If True, .npy files are memory-mapped instead of being loaded, so that only the used rows are read from disk
+
+        Returns:
+            - (np.array): Data of the window
+    """
+    if file_path.endswith(".npy"):
+        if memory_map:
+            # copy of the used rows closes the memory-map directly, as the number of open files is limited
+            return np.array(np.load(file_path, mmap_mode="r")[:max_rows])
+        window = np.load(file_path)
+        return window if max_rows == None else window[:max_rows]
+    return read_csv_data(file_path, max_rows=max_rows)
+
+
+@gin.configurable
+def read_windows(file_paths, max_rows=None, num_workers=0, memory_map=False):
+    """
+        Function to read many windows (or complete IMU data files) concurrently by num_workers threads.
+        Threads are used, as reading many small files mostly waits for the filesystem and the data doesn't need to be transferred between processes.
+
+        Parameters:
+            - file_paths (list): Paths to the .csv or .npy files
+            - max_rows (int): Default = None. Maximum number of rows to read from the start of each window (None = all rows)
+            - num_workers (int): Default = 0. Number of threads for reading (0 -> one thread for each CPU core, 1 -> no separate thread will be used)
+            - memory_map (bool): Default = False. If True, .npy files are memory-mapped (see read_window()), which only pays off for large files like long windows on slow storage
+
+        Returns:
+            - (list): Data of each window in the order of file_paths
+    """
+    if num_workers == 0:
+        num_workers = os.cpu_count()
+
+    if num_workers == 1 or len(file_paths) <= 1:
+        return [read_window(file_path, max_rows, memory_map) for file_path in file_paths]
+
+    with ThreadPoolExecutor(max_workers=min(num_workers, len(file_paths))) as executor:
+        return list(executor.map(lambda file_path: read_window(file_path, max_rows, memory_map), file_paths))
+
+
+def write_window(file_path, window):
+    """
+        Function to write a window to a single file (format is selected by the file extension).
+
+        Parameters:
+            - file_path (str): Path to the .csv or .npy file
+            - window (np.array): Data of the window
+    """
+    if file_path.endswith(".npy"):
+        np.save(file_path, window)
+    else:
+        write_csv_data(file_path, window)
+
+
+def is_stacked_windows_file(filename):
+    """
+        Function to check whether a file in the dir of a sensor belongs to stacked windows.
+
+        Parameters:
+            - filename (str): Name of the file
+
+        Returns:
+            - (bool): True if the file contains stacked windows or their sample names
+    """
+    return filename.startswith(STACKED_WINDOWS_PREFIX)
+
+
+def get_stacked_windows_filenames(stack_name):
+    """
+        Function to get the names of the files which store the stacked windows of stack_name.
+
+        Parameters:
+            - stack_name (str): Name of the stacked windows (e.g. name of the measurement)
+
+        Returns:
+            - (str): Name of the .npy file with the windows
+            - (str): Name of the .txt file with the sample names
+    """
+    return f"{STACKED_WINDOWS_PREFIX}{stack_name}.npy", f"{STACKED_WINDOWS_PREFIX}{stack_name}.txt"
+
+
+def get_stack_names(sensor_path):
+    """
+        Function to get the names of all stacked windows in the dir of a sensor.
+
+        Parameters:
+            - sensor_path (str): Path to the dir of the sensor
+
+        Returns:
+            - (list): Sorted list of the stack names
+    """
+    with os.scandir(sensor_path) as entries:
+        return sorted(entry.name[len(STACKED_WINDOWS_PREFIX):-4] for entry in entries
+                      if is_stacked_windows_file(entry.name) and entry.name.endswith(".txt"))
+
+
+def write_stacked_windows(sensor_path, stack_name, sample_names, windows):
+    """
+        Function to store windows of a sensor as stacked windows.
+
+        Parameters:
+            - sensor_path (str): Path to the dir of the sensor
+            - stack_name (str): Name of the stacked windows, which must be unique in the dir (e.g. name of the measurement)
+            - sample_names (list): Sample name of each window
+            - windows (list or np.array): Windows in the same order as sample_names, which must all have the same shape
+    """
+    windows_filename, sample_names_filename = get_stacked_windows_filenames(
+        stack_name)
+    np.save(os.path.join(sensor_path, windows_filename), np.asarray(windows))
+    write_stacked_sample_names(sensor_path, stack_name, sample_names)
+
+
+def write_stacked_sample_names(sensor_path, stack_name, sample_names):
+    """
+        Function to store the sample names of stacked windows (see write_stacked_windows()).
+
+        Parameters:
+            - sensor_path (str): Path to the dir of the sensor
+            - stack_name (str): Name of the stacked windows
+            - sample_names (list): Sample name of each window
+    """
+    with open(os.path.join(sensor_path, get_stacked_windows_filenames(stack_name)[1]), "w") as f:
+        f.writelines(f"{sample_name}\n" for sample_name in sample_names)
+
+
+def read_stacked_sample_names(sensor_path, stack_name):
+    """
+        Function to read the sample names of stacked windows.
+
+        Parameters:
+            - sensor_path (str): Path to the dir of the sensor
+            - stack_name (str): Name of the stacked windows
+
+        Returns:
+            - (list): Sample name of each window in the order of the stacked windows
+    """
+    with open(os.path.join(sensor_path, get_stacked_windows_filenames(stack_name)[1]), "r") as f:
+        return f.read().splitlines()
+
+
+def write_sampling_rate(dataset_path, sampling_rate):
+    """
+        Function to store the sampling rate of the windows in a prepared measurement or dataset, so that the time between two rows of a window is known when the dataset is used.
+
+        Parameters:
+            - dataset_path (str): Path to the prepared measurement or dataset
+            - sampling_rate (float): Sampling rate of the windows in Hz
+    """
+    with open(os.path.join(dataset_path, SAMPLING_RATE_FILENAME), "w") as f:
+        json.dump({"IMU_sampling_rate": sampling_rate}, f, indent=3)
+
+
+def read_sampling_rate(dataset_path):
+    """
+        Function to read the sampling rate of the windows of a prepared measurement or dataset (see write_sampling_rate()).
+
+        Parameters:
+            - dataset_path (str): Path to the prepared measurement or dataset
+
+        Returns:
+            - (float): Sampling rate of the windows in Hz (None for data which was prepared before the sampling rate was stored)
+    """
+    file_path = os.path.join(dataset_path, SAMPLING_RATE_FILENAME)
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, "r") as f:
+        return json.load(f)["IMU_sampling_rate"]
+
+
+class WindowReader():
+    """
+        Class to read the windows of a timeseries sensor by their sample names, regardless of the format they are stored in (see WINDOW_FORMATS).
+
+        Usage:
+            Create a reader for the dir of the sensor and call read() for each sample name.
+            The dir is scanned once when the reader is created, thus windows which are written afterwards are not found.
+
+        Data:
+            - Stacked windows are memory-mapped when they are read for the first time, so that only the needed windows are loaded from disk.
+              They are not mapped during init, so that a reader can be passed to new processes (e.g. workers of a DataLoader).
+    """
+
+    def __init__(self, sensor_path):
+        """
+            Init method which scans the dir of the sensor for windows.
+
+            Parameters:
+                - sensor_path (str): Path to the dir of the sensor
+        """
+        self.sensor_path = sensor_path
+        # file of each sample stored as single file and stack name and position of each stacked sample
+        self.window_filenames = {}
+        self.stacked_windows_positions = {}
+        self.stacked_windows = {}
+
+        with os.scandir(sensor_path) as entries:
+            for entry in entries:
+                if not is_stacked_windows_file(entry.name) and entry.name[-4:] in WINDOW_FILE_EXTENSIONS:
+                    self.window_filenames[entry.name[:-4]] = entry.name
+
+        for stack_name in get_stack_names(sensor_path):
+            for position, sample_name in enumerate(read_stacked_sample_names(sensor_path, stack_name)):
+                self.stacked_windows_positions[sample_name] = (
+                    stack_name, position)
+
+    def get_sample_names(self):
+        """
+            Method to get the names of all samples of the sensor.
+
+            Returns:
+                - (list): Sorted list of the sample names
+        """
+        return sorted(list(self.window_filenames) + list(self.stacked_windows_positions))
+
+    def read(self, sample_name):
+        """
+            Method to read the window of a sample.
+
+            Parameters:
+                - sample_name (str): Name of the sample (timestamp string from labels.csv)
+
+            Returns:
+                - (np.array): Data of the window
+        """
+        if sample_name in self.stacked_windows_positions:
+            stack_name, position = self.stacked_windows_positions[sample_name]
+            # copy, so that the window can be modified like a window read from a single file
+            return np.array(self.__get_stacked_windows(stack_name)[position])
+
+        if sample_name not in self.window_filenames:
+            raise Exception(
+                f"No window found for sample '{sample_name}' in {self.sensor_path}")
+        return read_window(os.path.join(self.sensor_path, self.window_filenames[sample_name]))
+
+    def read_all(self, max_rows=None):
+        """
+            Method to read the windows of all samples in the order of get_sample_names().
+            Windows stored as single files are read concurrently by read_windows() and stacked windows are sliced from their memory-mapped stack.
+
+            Parameters:
+                - max_rows (int): Default = None. Maximum number of rows to read from the start of each window (None = all rows)
+
+            Returns:
+                - (list): Data of each window (read-only, must be copied before it's modified)
+        """
+        sample_names = list(self.window_filenames)
+        windows = dict(zip(sample_names, read_windows([os.path.join(
+            self.sensor_path, self.window_filenames[sample_name]) for sample_name in sample_names], max_rows)))
+
+        for sample_name, (stack_name, position) in self.stacked_windows_positions.items():
+            windows[sample_name] = self.__get_stacked_windows(stack_name)[
+                position, :max_rows]
+
+        return [windows[sample_name] for sample_name in self.get_sample_names()]
+
+    def __get_stacked_windows(self, stack_name):
+        """
+            Private method to get the memory-mapped stacked windows of stack_name (mapped when they are needed for the first time).
+
+            Parameters:
+                - stack_name (str): Name of the stacked windows
+
+            Returns:
+                - (np.memmap): Read-only array with all windows of the stack
+        """
+        if stack_name not in self.stacked_windows:
+            self.stacked_windows[stack_name] = np.load(os.path.join(
+                self.sensor_path, get_stacked_windows_filenames(stack_name)[0]), mmap_mode="r")
+        return self.stacked_windows[stack_name]
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # store the same windows in all formats and check that the reader returns identical data
+    windows = np.random.default_rng(0).normal(size=(5, 50, 3))
+    sample_names = [f"15_03_17_{millis:03d}" for millis in range(0, 1000, 200)]
+
+    with tempfile.TemporaryDirectory() as temp_path:
+        for window_format in WINDOW_FORMATS:
+            sensor_path = os.path.join(temp_path, window_format)
+            os.makedirs(sensor_path)
+            if window_format == "stacked":
+                write_stacked_windows(
+                    sensor_path, "example", sample_names, windows)
+            else:
+                for sample_name, window in zip(sample_names, windows):
+                    write_window(os.path.join(sensor_path, sample_name +
+                                 get_window_file_extension(window_format)), window)
+
+            window_reader = WindowReader(sensor_path)
+            for sample_name, window in zip(window_reader.get_sample_names(), windows):
+                if not np.array_equal(window_reader.read(sample_name), window):
+                    raise Exception(
+                        f"Window of sample '{sample_name}' differs for format '{window_format}'")
+            if not np.array_equal(window_reader.read_all(max_rows=10), windows[:, :10]):
+                raise Exception(
+                    f"First rows of the windows differ for format '{window_format}'")
+            print(
+                f"Format '{window_format}': {len(os.listdir(sensor_path))} files for {len(windows)} windows")
@@ -1,16 +1,19 @@
 import os
-import glob
+import sys
 from datetime import datetime, timedelta
-import shutil
 
 # differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
 if __name__ == "__main__":
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
     from timestamp_evaluation import get_timestamp_from_picture, get_timestamp_string_from_timestamp
+    from measurement_index import MeasurementIndex
 else:
     from data_preparation.timestamp_evaluation import get_timestamp_from_picture, get_timestamp_string_from_timestamp
+    from data_preparation.measurement_index import MeasurementIndex
 
 
-def remove_obsolete_images_at_beginning(measurement_path, camera_name, earliest_timestamp):
+def remove_obsolete_images_at_beginning(measurement_path, camera_name, earliest_timestamp, measurement_index=None):
     """
         Function to remove all images in the directory of camera_name in measurement_path before earliest_timestamp.
         If camera_name == "BellyCam", additionally the data will be downsampled, that it only contains images every ~200 ms
@@ -21,33 +24,52 @@ def remove_obsolete_images_at_beginning(measurement_path, camera_name, earliest_
             - measurement_path (str): Path to the measurement
             - camera_name (str): Name of the camera to perform the function for
             - earliest_timestamp (datetime.datetime): Timestamp to use for further calculations
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
+    """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+
+    # remove all images which are obsolete
+    obsolete_filenames = get_obsolete_images_at_beginning(
+        measurement_index.get_filenames(camera_name), camera_name, earliest_timestamp)
+    for obsolete_filename in obsolete_filenames:
+        measurement_index.delete_file(camera_name, obsolete_filename)
+
+
+def get_obsolete_images_at_beginning(filenames, camera_name, earliest_timestamp):
+    """
+        Function to determine all images of camera_name before earliest_timestamp (and every second BellyCam image) without changing any files.
+        See remove_obsolete_images_at_beginning() for details.
+
+        Parameters:
+            - filenames (list): Sorted list of the filenames of all images of the camera
+            - camera_name (str): Name of the camera to perform the function for
+            - earliest_timestamp (datetime.datetime): Timestamp to use for further calculations
+
+        Returns:
+            - obsolete_filenames (list): List of the filenames of all obsolete images
     """
     # local variables
     reference_timestamp = earliest_timestamp
     restarted_for_right_camera_image_flag = True
+    obsolete_filenames = []
 
     # extract measurement date from earliest timestamp for get_timestamp_from_picture()
     measurement_date = datetime(year=earliest_timestamp.year,
                                 month=earliest_timestamp.month, day=earliest_timestamp.day)
 
-    # extract list of all files from camera directory
-    files_glob_pattern = os.path.join(measurement_path, camera_name, "*.jpg")
-    cam_files = glob.glob(files_glob_pattern)
-    cam_files.sort()
-
     # Check whether camera contains images of both stereo cameras
-    if cam_files[0].split(os.sep)[-1][0] != cam_files[-1].split(os.sep)[-1][0]:
+    if filenames[0][0] != filenames[-1][0]:
         print(f"Camera {camera_name} contains two picture Types!")
         restarted_for_right_camera_image_flag = False
 
     # iterate over all files and check if file has to be removed
-    for index, cam_file in enumerate(cam_files):
-        # stop for loop when index + 1 would be out of index range for cam_files
-        if (index + 1) > (len(cam_files) - 1):
+    for index, current_filename in enumerate(filenames):
+        # stop for loop when index + 1 would be out of index range for filenames
+        if (index + 1) > (len(filenames) - 1):
             break
 
         # get timestamp of file
-        current_filename = cam_file.split(os.sep)[-1]
         current_timestamp = get_timestamp_from_picture(
             current_filename, measurement_date)
 
@@ -60,21 +82,23 @@ def remove_obsolete_images_at_beginning(measurement_path, camera_name, earliest_
 
         if current_timestamp < earliest_timestamp:
             # remove all files before the earliest timestamp
-            os.remove(cam_file)
+            obsolete_filenames.append(current_filename)
         elif (current_timestamp > earliest_timestamp) and ("BellyCam" in camera_name):
             # BellyCam images are captured every 100 ms instead of 200 ms, thus every second image shall be removed
             if timedelta() < (current_timestamp - reference_timestamp) < timedelta(milliseconds=190):
                 # remove a file, if the timedelta to the reference_timestamp is > 0 ms and < 190 ms
-                os.remove(cam_file)
+                obsolete_filenames.append(current_filename)
 
                 # update reference_timestamp with timestamp of the next file
-                next_filename = cam_files[index + 1].split(os.sep)[-1]
+                next_filename = filenames[index + 1]
                 next_timestamp = get_timestamp_from_picture(
                     next_filename, measurement_date)
                 reference_timestamp = next_timestamp
 
+    return obsolete_filenames
 
-def unify_image_timestamps(measurement_path, starting_timestamp):
+
+def unify_image_timestamps(measurement_path, starting_timestamp, measurement_index=None):
     """
         Function to unify timestamps in filenames for all cameras.
         As a result all cameras will have images with the same timestamps starting at starting_timestamp incrementing by 200 ms.
@@ -82,19 +106,16 @@ def unify_image_timestamps(measurement_path, starting_timestamp):
         Parameters:
             - measurement_path (str): Path to the measurement
             - earliest_timestamp (datetime.datetime): Timestamp to use for first image name
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
 
         Returns:
             - earliest_last_image_timestamp (datetime.datetime): Timestamp of the earliest last image from all cameras
     """
-    cameras_list = []
-    camera_info_dict = {}
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
 
     # get list of all cameras
-    for root, dirs, files in os.walk(measurement_path):
-        for dir in dirs:
-            if "Cam" in dir:
-                cameras_list.append(dir)
-                camera_info_dict[dir] = {}
+    cameras_list = measurement_index.get_cameras()
 
     # initialize variables to search for camera with earliest last image (no camera should contain older images than this one)
     camera_earliest_last_image = ""
@@ -104,7 +125,7 @@ def unify_image_timestamps(measurement_path, starting_timestamp):
     # perform renaming of images for all cameras
     for camera in cameras_list:
         last_timestamp = rename_image_timestamps_for_single_camera(
-            measurement_path, camera, starting_timestamp)
+            measurement_path, camera, starting_timestamp, measurement_index)
 
         if last_timestamp < earliest_last_image_timestamp:
             earliest_last_image_timestamp = last_timestamp
@@ -116,10 +137,11 @@ def unify_image_timestamps(measurement_path, starting_timestamp):
     return earliest_last_image_timestamp
 
 
-def rename_image_timestamps_for_single_camera(measurement_path, camera_name, starting_timestamp):
+def rename_image_timestamps_for_single_camera(measurement_path, camera_name, starting_timestamp, measurement_index=None):
     """
         Function to rename the timestamps in the image filenames for camera_name.
         As a result the the images will have filenames starting at starting_timestamp incrementing by 200 ms
+        The images are only renamed (in two phases via temporary names, if a new filename is still used by another image), so no image data is copied.
 
         Prerequisites:
             - Images in dir camera_name were already prepared by function remove_obsolete_images()
@@ -128,18 +150,59 @@ def rename_image_timestamps_for_single_camera(measurement_path, camera_name, sta
             - measurement_path (str): Path to the measurement
             - camera_name (str): Name of the camera to perform renaming for
             - earliest_timestamp (datetime.datetime): Timestamp to use for first image name
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
 
         Returns:
             - previous_timestamp_new_files (datetime.datetime): Timestamp of the last image
             - list_missing_timestamp_strings (list): List of all timestamp strings which are missing for this camera
     """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+
     # get all currently available files = with old timestamp
-    glob_pattern = os.path.join(measurement_path, camera_name, "*.jpg")
-    files_with_old_timestamp = glob.glob(glob_pattern)
-    files_with_old_timestamp.sort()
+    files_with_old_timestamp = measurement_index.get_filenames(camera_name)
+
+    new_timestamps = get_unified_image_timestamps(
+        files_with_old_timestamp, camera_name, starting_timestamp)
 
+    # determine new filenames for all images first
+    files_with_new_timestamp = [get_timestamp_string_from_timestamp(
+        timestamp_for_new_file) + ".jpg" for timestamp_for_new_file in new_timestamps]
+
+    # if a new filename is still used by another image, all images get a temporary name first, so that no image is replaced before it was renamed
+    old_files_set = set(files_with_old_timestamp)
+    if any(new_file in old_files_set and new_file != cam_file for cam_file, new_file in zip(files_with_old_timestamp, files_with_new_timestamp)):
+        temporary_files = [cam_file + ".renaming" for cam_file in files_with_old_timestamp]
+        for cam_file, temporary_file in zip(files_with_old_timestamp, temporary_files):
+            measurement_index.rename_file(
+                camera_name, cam_file, temporary_file)
+        files_with_old_timestamp = temporary_files
+
+    # rename every file with new timestamp (only metadata is changed)
+    # NOTE: If multiple images get the same new timestamp, the later image replaces the previous one
+    for cam_file, new_file in zip(files_with_old_timestamp, files_with_new_timestamp):
+        if cam_file != new_file:
+            measurement_index.rename_file(camera_name, cam_file, new_file)
+
+    return new_timestamps[-1]
+
+
+def get_unified_image_timestamps(filenames, camera_name, starting_timestamp):
+    """
+        Function to determine the new timestamps of the images of camera_name without changing any files.
+        See rename_image_timestamps_for_single_camera() for details.
+        NOTE: If multiple images get the same new timestamp, only the last one of them shall be kept.
+
+        Parameters:
+            - filenames (list): Sorted list of the filenames of all images of the camera
+            - camera_name (str): Name of the camera to perform renaming for
+            - starting_timestamp (datetime.datetime): Timestamp to use for first image name
+
+        Returns:
+            - new_timestamps (list): List of the new timestamps (datetime.datetime) for all images of filenames
+    """
     # check for each camera whether it contains both types of stereo camera images
-    if files_with_old_timestamp[0].split(os.sep)[-1][0] != files_with_old_timestamp[-1].split(os.sep)[-1][0]:
+    if filenames[0][0] != filenames[-1][0]:
         raise Exception(
             f"Images of both stereo cameras for '{camera_name}' are stored in the same directory! This is not supported!")
 
@@ -154,13 +217,12 @@ def rename_image_timestamps_for_single_camera(measurement_path, camera_name, sta
     previous_timestamp_new_files = starting_timestamp
     # list to store strings of all timestamps that are missing
     list_missing_timestamp_strings = []
+    # list to store the new timestamps of all images
+    new_timestamps = []
 
-    # copy every file and name the new file with new timestamp
-    for index, cam_file in enumerate(files_with_old_timestamp):
-        new_filename = ""  # reset variable for new filename for each loop
-
+    # calculate new timestamp for every file
+    for index, current_filename in enumerate(filenames):
         # get timestamp of current file
-        current_filename = cam_file.split(os.sep)[-1]
         current_timestamp = get_timestamp_from_picture(
             current_filename, measurement_date)
 
@@ -192,25 +254,16 @@ def rename_image_timestamps_for_single_camera(measurement_path, camera_name, sta
                 print(
                     f"For camera {camera_name} image with timestamp {get_timestamp_string_from_timestamp(current_timestamp)} is second images in this period! Only this file will be stored!")
 
-        # get new filename based previous_timestamp_new_files
+        # get new timestamp based previous_timestamp_new_files
         timestamp_for_new_file = previous_timestamp_new_files + \
             passed_capturing_periods_between_images * \
             timedelta(milliseconds=200)
-        new_filename = get_timestamp_string_from_timestamp(
-            timestamp_for_new_file)
+        new_timestamps.append(timestamp_for_new_file)
 
         # update previous timestamp for next image
         previous_timestamp_present_files = current_timestamp
         previous_timestamp_new_files = timestamp_for_new_file
 
-        # copy image and name it with new timestamp
-        path_new_file = os.path.join(
-            measurement_path, camera_name, new_filename+".jpg")
-        shutil.copy(cam_file, path_new_file)
-
-        # remove old file
-        os.remove(cam_file)
-
     # print(
     #     f"Images for camera '{camera_name}' are now renamed starting at timestamp {get_timestamp_string_from_timestamp(starting_timestamp)}")
     if list_missing_timestamp_strings != []:
@@ -218,7 +271,7 @@ def rename_image_timestamps_for_single_camera(measurement_path, camera_name, sta
         print(
             f"The following timestamps are missing for camera {camera_name}: {list_missing_timestamp_strings}")
 
-    return previous_timestamp_new_files
+    return new_timestamps
 
 
 if __name__ == "__main__":
@@ -1,17 +1,28 @@
 
-from os import path
 import os
+import sys
 import pandas as pd
 import numpy as np
 import gin
 
+# differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
+if __name__ == "__main__":
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from custom_utils.window_io import WindowReader
+    from measurement_index import MeasurementIndex
+else:
+    from custom_utils.window_io import WindowReader
+    from data_preparation.measurement_index import MeasurementIndex
+
 
-def get_incomplete_data_samples(dataset_path):
+def get_incomplete_data_samples(dataset_path, measurement_index=None):
     """
         Function to determine all data samples (identified by it's timestamp) where not all data is present from.
 
         Parameters:
             - dataset_path (str): Path to the dataset
+            - measurement_index (MeasurementIndex): Index of the files of the dataset (default = None -> index will be created)
 
         Returns:
             - incomplete_samples_set (set): Set containing all timestamp strings for which at least one sensors does not provide data
@@ -25,29 +36,21 @@ def get_incomplete_data_samples(dataset_path):
     filenames_array = pd.read_csv(os.path.join(
         dataset_path, "labels.csv"), sep=";", header=0).to_numpy()[:, 0]
 
-    # get list of all sensors in the dataset
-    sensors = []
-    for root, dirs, files in os.walk(dataset_path):
-        for sensor in dirs:
-            sensors.append(sensor)
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(dataset_path)
 
     # check for all timestamps/ filenames whether every sensor has an data sample for it
     for index, filename in enumerate(filenames_array):
-        for sensor in sensors:
-            # create exact filename for sensor based on the sensor name
-            if "Cam" in sensor:
-                # data is stored as .jpg file for all cameras
-                file_path = os.path.join(
-                    dataset_path, sensor, filenames_array[index]+".jpg")
-            else:
-                # data is stored as .csv file for all other sensors
-                file_path = os.path.join(
-                    dataset_path, sensor, filenames_array[index]+".csv")
+        for sensor in measurement_index.sensors:
+            # create exact filename for sensor based on the sensor name (.jpg files for cameras and .csv or .npy files for other sensors)
+            sample_filename = measurement_index.get_data_filename(
+                sensor, filenames_array[index])
 
             # append the filename and the exact filename to the lists
-            if not path.exists(file_path):
+            if not measurement_index.contains(sensor, sample_filename):
                 incomplete_samples_list.append(filename)
-                complete_incomplete_samples_list.append(file_path)
+                complete_incomplete_samples_list.append(
+                    measurement_index.get_file_path(sensor, sample_filename))
 
     # convert incomplete_samples_list to a set to remove doubled values
     incomplete_samples_set = set(incomplete_samples_list)
@@ -82,10 +85,10 @@ def get_list_of_corrupt_IMU_files(dataset_path, corrupt_threshold):
 
     corrupt_files_list = []
 
+    # windows can be stored in any format (see custom_utils.window_io)
+    window_reader = WindowReader(os.path.join(dataset_path, IMU_sensor))
     for index, filename in enumerate(filenames_array):
-        file_path = os.path.join(
-            dataset_path, IMU_sensor, filename+".csv")
-        data = np.loadtxt(file_path, delimiter=";")
+        data = window_reader.read(filename)
 
         # get counts of unique elements to determine max occurrence within file
         unique, counts = np.unique(data, return_counts=True)
@@ -97,37 +100,28 @@ def get_list_of_corrupt_IMU_files(dataset_path, corrupt_threshold):
     return corrupt_files_list
 
 
-def delete_incomplete_data_samples(dataset_path, incomplete_samples_set):
+def delete_incomplete_data_samples(dataset_path, incomplete_samples_set, measurement_index=None):
     """
         Function to delete all incomplete data samples (where not all data for each sensors is present from) based on provided incomplete_samples_set.
 
         Parameters:
             - dataset_path (str): Path to the dataset
             - incomplete_samples_set (set): Set containing all timestamp strings for which at least one sensors does not provide data
+            - measurement_index (MeasurementIndex): Index of the files of the dataset (default = None -> index will be created)
     """
-    # get list of all sensors
-    sensors = []
-    for root, dirs, files in os.walk(dataset_path):
-        for sensor in dirs:
-            sensors.append(sensor)
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(dataset_path)
 
     # remove samples of incomplete_samples_set for all sensors
     for sample_name in incomplete_samples_set:
-        for sensor in sensors:
-            if "Cam" in sensor:
-                # cameras have .jpg files
-                filename = os.path.join(
-                    dataset_path, sensor, sample_name+".jpg")
-            else:
-                # other sensors have .csv files
-                filename = os.path.join(
-                    dataset_path, sensor, sample_name+".csv")
-
-            # use try/except, to handle case where file is already missing (which is always the case for at least sensor)
-            try:
-                os.remove(filename)
-            except:
-                pass
+        for sensor in measurement_index.sensors:
+            # cameras have .jpg files and other sensors .csv or .npy files
+            filename = measurement_index.get_data_filename(
+                sensor, sample_name)
+
+            # check whether file is present, to handle case where file is already missing (which is always the case for at least sensor)
+            if measurement_index.contains(sensor, filename):
+                measurement_index.delete_file(sensor, filename)
 
 
 def update_labels_csv(dataset_path, incomplete_samples_set):
@@ -0,0 +1,394 @@
+import os
+import sys
+import json
+import logging
+import numpy as np
+
+# differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
+if __name__ == "__main__":
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from custom_utils.csv_io import read_csv_data
+    from custom_utils.window_io import get_window_file_extension, write_window, write_stacked_windows
+    from timestamp_evaluation import get_data_from_info_dict_for_timestamp_evaluation, get_timestamp_from_timestamp_string, get_timestamp_from_picture, get_timestamp_string_from_timestamp, get_synchronized_timestamps_for_camera_timestamps, get_last_allowed_timestamp
+    from timeseries_preparation import TimeseriesDownsamplingForWholeMeasurement, create_sliding_windows_for_all_sensors, remove_obsolete_values_from_data, resample_IMU_data, IMU_SAMPLING_RATE
+    from image_preparation import get_obsolete_images_at_beginning, get_unified_image_timestamps
+    from measurement_source import get_measurement_source
+    from measurement_combination import get_namespaced_sample_name
+else:
+    from custom_utils.csv_io import read_csv_data
+    from custom_utils.window_io import get_window_file_extension, write_window, write_stacked_windows
+    from data_preparation.timestamp_evaluation import get_data_from_info_dict_for_timestamp_evaluation, get_timestamp_from_timestamp_string, get_timestamp_from_picture, get_timestamp_string_from_timestamp, get_synchronized_timestamps_for_camera_timestamps, get_last_allowed_timestamp
+    from data_preparation.timeseries_preparation import TimeseriesDownsamplingForWholeMeasurement, create_sliding_windows_for_all_sensors, remove_obsolete_values_from_data, resample_IMU_data, IMU_SAMPLING_RATE
+    from data_preparation.image_preparation import get_obsolete_images_at_beginning, get_unified_image_timestamps
+    from data_preparation.measurement_source import get_measurement_source
+    from data_preparation.measurement_combination import get_namespaced_sample_name
+
+
+class Measurement():
+    """
+        Class for the in-memory data preparation of a measurement.
+
+        Background:
+            The file based data preparation writes and reads the IMU data multiple times as text files and renames/ deletes images in several steps.
+            This class instead loads each file once, performs all preparation steps on the data in memory and writes the prepared measurement once at the end.
+            The results are the same as for the file based data preparation in data_preparation_main().
+
+        Usage:
+            Provide the path to the measurement dir or .zip file as a parameter when creating the object.
+            A .zip file is not extracted, instead only the needed files are read directly from the archive.
+            Call the methods for the preparation steps in the same order as the functions are called in data_preparation_main().
+            Call the method Measurement.save() afterwards to write the prepared measurement.
+
+        Data:
+            - self.timeseries_data (dict): Dict containing for each timeseries sensor a dict of all data arrays (downsampled data or windows) where the timestamp string is the key
+            - self.sampling_rate (float): Sampling rate of the data in self.timeseries_data in Hz (changed by Measurement.create_sliding_windows())
+            - self.images (dict): Dict containing for each camera a dict of the paths to the images (relative to the measurement) where the image name (timestamp string after renaming) is the key
+    """
+
+    def __init__(self, measurement_path):
+        """
+            Init method which gets the info from info.json and the list of all files of the measurement (no data is loaded yet).
+
+            Parameters:
+                - measurement_path (str): Path to the measurement dir (can also be a .zip file)
+        """
+        self.measurement_path = measurement_path
+        self.source = get_measurement_source(measurement_path)
+
+        with self.source.open("info.json") as f:
+            info_dict = json.load(f)
+        self.measurement_date, self.time_diff_data = get_data_from_info_dict_for_timestamp_evaluation(
+            info_dict)
+        self.label = info_dict["floor type"]
+
+        # get all sensors of the measurement in the same order as in the file based data preparation
+        self.sensors = self.source.list_dirs()
+
+        # the downsampler is used with the data in memory only
+        self.timeseries_downsampler = TimeseriesDownsamplingForWholeMeasurement(
+            measurement_path)
+        self.timeseries_downsampler.find_timeseries_sensors(self.sensors)
+        self.timeseries_sensors = self.timeseries_downsampler.timeseries_sensors
+        self.cameras = [sensor for sensor in self.sensors if "Cam" in sensor]
+
+        self.timeseries_data = {}
+        self.sampling_rate = IMU_SAMPLING_RATE
+        self.images = {}
+        for camera in self.cameras:
+            self.images[camera] = {cam_file[:-4]: f"{camera}/{cam_file}"
+                                   for cam_file in self.source.list_files(camera) if ".jpg" == cam_file[-4:]}
+
+        self.labels = []
+
+    def downsample_timeseries_data(self):
+        """
+            Method to load all timeseries data and perform the downsampling for each file (see TimeseriesDownsamplingForWholeMeasurement).
+        """
+        filenames = [file for file in self.source.list_files(
+            self.timeseries_sensors[0]) if ".csv" == file[-4:]]
+
+        for sensor in self.timeseries_sensors:
+            self.timeseries_data[sensor] = {}
+
+        for filename in filenames:
+            logging.info(f"\nStart downsampling for file '{filename}'")
+            data_dict = {}
+            for sensor in self.timeseries_sensors:
+                with self.source.open(f"{sensor}/{filename}") as f:
+                    data_dict[sensor] = read_csv_data(f)
+
+            downsampled_data_dict = self.timeseries_downsampler.downsample_data_dict(
+                data_dict, filename)
+            for sensor in self.timeseries_sensors:
+                self.timeseries_data[sensor][filename[:-4]
+                                             ] = downsampled_data_dict[sensor]
+
+    def get_earliest_timestamp_from_IMU(self):
+        """
+            Method to get the earliest timestamp of the IMU data (similar to get_earliest_timestamp_from_IMU()).
+
+            Returns:
+                - (datetime.datetime): Earliest timestamp of the first timeseries sensor
+        """
+        earliest_timestamp_string = sorted(
+            self.timeseries_data[self.timeseries_sensors[0]])[0]
+        return get_timestamp_from_timestamp_string(earliest_timestamp_string, self.measurement_date)
+
+    def create_sliding_windows(self, window_size, normalization=False, sampling_rate=50):
+        """
+            Method to replace the downsampled data of all timeseries sensors by the sliding windows (see create_sliding_windows_and_save_them()).
+
+            Parameters:
+                - window_size (int): Size of the windows to create
+                - normalization (bool): Select whether to apply normalization (Z Score normalization)
+                - sampling_rate (float): Default = 50. Sampling rate of the windows in Hz (see resample_IMU_data())
+        """
+        earliest_timestamp = self.get_earliest_timestamp_from_IMU()
+
+        data_dict = {sensor: np.concatenate([self.timeseries_data[sensor][timestamp_string]
+                                             for timestamp_string in sorted(self.timeseries_data[sensor])])
+                     for sensor in self.timeseries_sensors}
+        # all sensors are resampled and windowed at once, as they share the same timestamps
+        data_dict = resample_IMU_data(data_dict, sampling_rate)
+        self.sampling_rate = sampling_rate
+        windows_dict = create_sliding_windows_for_all_sensors(
+            data_dict, earliest_timestamp, window_size, normalization, sampling_rate)
+        for sensor in self.timeseries_sensors:
+            self.timeseries_data[sensor] = dict(windows_dict[sensor])
+
+    def get_synchronized_timestamps(self):
+        """
+            Method to get the synchronized timestamps for all cameras and the IMU data (see get_synchronized_timestamps()).
+
+            Returns:
+                - (dict): Dictionary containing the closest timestamps for each camera and the earliest timestamp of the IMU measurements
+        """
+        camera_timestamps = {camera: [get_timestamp_from_picture(image_name + ".jpg", self.measurement_date) for image_name in sorted(self.images[camera])]
+                             for camera in self.cameras}
+
+        if camera_timestamps == {}:
+            raise Exception(
+                f"No camera directory present in directory {self.measurement_path}\nIt only contains the following dirs: {self.sensors}")
+
+        return get_synchronized_timestamps_for_camera_timestamps(camera_timestamps, self.time_diff_data, self.get_earliest_timestamp_from_IMU())
+
+    def remove_obsolete_values(self, sensor_name, reference_timestamp):
+        """
+            Method to remove data points in the first window of sensor_name which are before reference_timestamp (see remove_obsolete_values()).
+
+            Parameters:
+                - sensor_name (str): Name of the sensor to perform the function for
+                - reference_timestamp (datetime.datetime): Timestamp to use as reference for data removal
+        """
+        first_timestamp_string = sorted(self.timeseries_data[sensor_name])[0]
+        earliest_timestamp = get_timestamp_from_timestamp_string(
+            first_timestamp_string, self.measurement_date)
+
+        if earliest_timestamp > reference_timestamp:
+            raise Exception(
+                f"Reference timestamp is before earliest available timestamp. Thus execution will be aborted.")
+
+        data = remove_obsolete_values_from_data(
+            self.timeseries_data[sensor_name][first_timestamp_string], sensor_name, earliest_timestamp, reference_timestamp, self.sampling_rate)
+
+        if data is not None:
+            # store data with corrected timestamp as name (a complete window with this timestamp is kept, see remove_obsolete_values())
+            new_timestamp_string = get_timestamp_string_from_timestamp(
+                reference_timestamp)
+            if new_timestamp_string not in self.timeseries_data[sensor_name]:
+                self.timeseries_data[sensor_name][new_timestamp_string] = data
+            del self.timeseries_data[sensor_name][first_timestamp_string]
+
+    def remove_obsolete_images_at_beginning(self, camera_name, earliest_timestamp):
+        """
+            Method to remove all images of camera_name before earliest_timestamp (see remove_obsolete_images_at_beginning()).
+
+            Parameters:
+                - camera_name (str): Name of the camera to perform the function for
+                - earliest_timestamp (datetime.datetime): Timestamp to use for further calculations
+        """
+        obsolete_filenames = get_obsolete_images_at_beginning(
+            [image_name + ".jpg" for image_name in sorted(self.images[camera_name])], camera_name, earliest_timestamp)
+
+        for obsolete_filename in obsolete_filenames:
+            del self.images[camera_name][obsolete_filename[:-4]]
+
+    def unify_image_timestamps(self, starting_timestamp):
+        """
+            Method to unify timestamps of the image names for all cameras (see unify_image_timestamps()).
+
+            Parameters:
+                - starting_timestamp (datetime.datetime): Timestamp to use for first image name
+
+            Returns:
+                - earliest_last_image_timestamp (datetime.datetime): Timestamp of the earliest last image from all cameras
+        """
+        camera_earliest_last_image = ""
+        earliest_last_image_timestamp = None
+
+        for camera in self.cameras:
+            image_names = sorted(self.images[camera])
+            new_timestamps = get_unified_image_timestamps(
+                [image_name + ".jpg" for image_name in image_names], camera, starting_timestamp)
+
+            # if multiple images get the same new timestamp, the last image will be kept
+            renamed_images = {}
+            for image_name, new_timestamp in zip(image_names, new_timestamps):
+                renamed_images[get_timestamp_string_from_timestamp(
+                    new_timestamp)] = self.images[camera][image_name]
+            self.images[camera] = renamed_images
+
+            if earliest_last_image_timestamp == None or new_timestamps[-1] < earliest_last_image_timestamp:
+                earliest_last_image_timestamp = new_timestamps[-1]
+                camera_earliest_last_image = camera
+
+        print(
+            f"\nCamera with earliest last image is '{camera_earliest_last_image}' with timestamp {get_timestamp_string_from_timestamp(earliest_last_image_timestamp)}")
+
+        return earliest_last_image_timestamp
+
+    def remove_obsolete_data_at_end(self, last_allowed_timestamp_images):
+        """
+            Method to remove all data after the last timestamp which is available for all sensors (see remove_obsolete_data_at_end()).
+
+            Parameters:
+                - last_allowed_timestamp_images (datetime.datetime): Last allowed timestamp of the images
+        """
+        last_timestamp_string_IMU = sorted(
+            self.timeseries_data[self.timeseries_sensors[0]])[-1]
+        last_allowed_timestamp_IMU = get_timestamp_from_timestamp_string(
+            last_timestamp_string_IMU, self.measurement_date)
+
+        last_allowed_timestamp, deletion_for_IMU_needed = get_last_allowed_timestamp(
+            last_allowed_timestamp_IMU, last_allowed_timestamp_images)
+
+        for sensor_name, samples in list(self.timeseries_data.items()) + list(self.images.items()):
+            if not deletion_for_IMU_needed and sensor_name in self.timeseries_data:
+                # skip IMU data, if there is no data to delete for IMU
+                continue
+            for sample_name in list(samples):
+                if get_timestamp_from_timestamp_string(sample_name, self.measurement_date) > last_allowed_timestamp:
+                    del samples[sample_name]
+
+    def create_labels(self):
+        """
+            Method to create the labels for all samples based on the label from info.json (see create_label_csv()).
+            Like for the file based data preparation, the sample names are taken from the last sensor of the measurement.
+        """
+        samples = self.__get_samples_of_sensor(self.sensors[-1])
+        self.labels = [[sample_name, self.label]
+                       for sample_name in sorted(samples)]
+
+        logging.info("Labels were created.")
+
+    def remove_incomplete_data_samples(self):
+        """
+            Method to remove all samples from labels for which at least one sensor doesn't provide data (see get_incomplete_data_samples()).
+        """
+        incomplete_samples_set = set()
+        logging.info(
+            f"The files for the following timestamps will be deleted now:")
+        for sample_name, _ in self.labels:
+            for sensor in self.sensors:
+                if sample_name not in self.__get_samples_of_sensor(sensor):
+                    incomplete_samples_set.add(sample_name)
+                    logging.info(os.path.join(
+                        sensor, sample_name + (".jpg" if "Cam" in sensor else ".csv")))
+
+        # remove samples of incomplete_samples_set for all sensors
+        for sample_name in incomplete_samples_set:
+            for sensor in self.sensors:
+                self.__get_samples_of_sensor(sensor).pop(sample_name, None)
+
+        self.labels = [[sample_name, label] for sample_name,
+                       label in self.labels if sample_name not in incomplete_samples_set]
+
+    def __get_samples_of_sensor(self, sensor):
+        """
+            Private method to get the dict of samples for sensor.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+
+            Returns:
+                - (dict): Dict of all samples of the sensor, where the sample name is the key
+        """
+        if "Cam" in sensor:
+            return self.images[sensor]
+        else:
+            return self.timeseries_data[sensor]
+
+    def save(self, dataset_path, image_preprocessing_function=None, copy_strategy="copy", image_save_options=None, namespace=None, window_format="csv", stack_name=None):
+        """
+            Method to write the prepared measurement to dataset_path (including labels.csv and all files from the top level of the measurement like info.json).
+            If namespace is provided, only the samples are written with namespaced sample names (see get_namespaced_sample_name()), so that they can be written
+            directly to the final dataset of multiple measurements. labels.csv must be stored by save_labels() in this case.
+            The measurement source is closed afterwards.
+
+            Parameters:
+                - dataset_path (str): Path to dir where the prepared measurement shall be stored
+                - image_preprocessing_function (function): Default = None. Function with parameters (PIL.Image, camera name) which returns the preprocessed image.
+                                                           If None, the images will be copied without any changes.
+                - copy_strategy (str): Default = "copy". Strategy for copying files without changes from the measurement (see custom_utils.utils.copy_file())
+                - image_save_options (dict): Default = None. Options which are passed to PIL.Image.save() for the preprocessed images (e.g. JPEG quality)
+                - namespace (str): Default = None. Namespace of the measurement in the final dataset at dataset_path
+                - window_format (str): Default = "csv". Format of the windows of the timeseries sensors (see custom_utils.window_io.WINDOW_FORMATS)
+                - stack_name (str): Default = None. Name of the stacked windows for window_format == "stacked" (None -> namespace or name of the measurement)
+        """
+        # PIL is only needed for image preprocessing
+        from PIL import Image
+
+        if image_save_options == None:
+            image_save_options = {}
+
+        os.makedirs(dataset_path, exist_ok=True)
+
+        if namespace == None:
+            # copy all files from the top level of the measurement, like info.json
+            for file in self.source.list_files():
+                self.source.copy_file(file, dataset_path, copy_strategy)
+
+        if window_format == "stacked" and stack_name == None:
+            stack_name = namespace if namespace != None else os.path.basename(
+                os.path.normpath(self.measurement_path)).replace(".zip", "")
+
+        for sensor in self.timeseries_sensors:
+            os.makedirs(os.path.join(dataset_path, sensor), exist_ok=True)
+            if window_format == "stacked":
+                # windows are stacked in the order of their sample names like by stack_windows_and_save_them()
+                sample_names = sorted(self.timeseries_data[sensor])
+                write_stacked_windows(os.path.join(dataset_path, sensor), stack_name, [self.__get_filename(sample_name, "", namespace) for sample_name in sample_names],
+                                      [self.timeseries_data[sensor][sample_name] for sample_name in sample_names])
+            else:
+                window_file_extension = get_window_file_extension(
+                    window_format)
+                for sample_name, window in self.timeseries_data[sensor].items():
+                    write_window(os.path.join(dataset_path, sensor,
+                                 self.__get_filename(sample_name, window_file_extension, namespace)), window)
+
+        for camera in self.cameras:
+            os.makedirs(os.path.join(dataset_path, camera), exist_ok=True)
+            for sample_name, image_path in self.images[camera].items():
+                new_image_path = os.path.join(
+                    dataset_path, camera, self.__get_filename(sample_name, ".jpg", namespace))
+                if image_preprocessing_function == None:
+                    self.source.copy_file(
+                        image_path, new_image_path, copy_strategy)
+                else:
+                    with self.source.open(image_path) as f:
+                        image_preprocessing_function(
+                            Image.open(f), camera).save(new_image_path, **image_save_options)
+            logging.info(f"Finished saving of images for {camera}!")
+
+        if namespace == None:
+            self.save_labels(dataset_path)
+        self.source.close()
+
+        logging.info(f"Prepared measurement was stored in {dataset_path}")
+
+    def save_labels(self, dir_path):
+        """
+            Method to store the labels of all samples as labels.csv in dir_path (same format as create_label_csv()).
+
+            Parameters:
+                - dir_path (str): Path to dir where labels.csv shall be stored
+        """
+        np.savetxt(os.path.join(dir_path, "labels.csv"),
+                   self.labels, delimiter=";", header="timestamp;label", fmt="%s")
+
+    def __get_filename(self, sample_name, extension, namespace=None):
+        """
+            Private method to get the filename of a sample in the dataset.
+
+            Parameters:
+                - sample_name (str): Name of the sample (timestamp string)
+                - extension (str): File extension including the dot
+                - namespace (str): Default = None. Namespace of the measurement in the final dataset (see get_namespaced_sample_name())
+
+            Returns:
+                - (str): Filename of the sample
+        """
+        if namespace == None:
+            return sample_name + extension
+        return get_namespaced_sample_name(namespace, sample_name + extension)
@@ -1,16 +1,38 @@
 import os
-from distutils.dir_util import copy_tree
+import sys
+import gin
+import logging
 import pandas as pd
 import numpy as np
 
+# differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
+if __name__ == "__main__":
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from custom_utils.utils import copy_dir, copy_file
+    from custom_utils.window_io import get_stack_names, get_stacked_windows_filenames, read_stacked_sample_names, write_stacked_sample_names, read_sampling_rate
+    from preparation_cache import remove_preparation_key
+    from preparation_metrics import METRICS_FILENAME
+    from measurement_index import MeasurementIndex
+else:
+    from custom_utils.utils import copy_dir, copy_file
+    from custom_utils.window_io import get_stack_names, get_stacked_windows_filenames, read_stacked_sample_names, write_stacked_sample_names, read_sampling_rate
+    from data_preparation.preparation_cache import remove_preparation_key
+    from data_preparation.preparation_metrics import METRICS_FILENAME
+    from data_preparation.measurement_index import MeasurementIndex
+
 
-def combine_measurements_to_dataset(prepared_measurements_base_path, dataset_path):
+@gin.configurable
+def combine_measurements_to_dataset(prepared_measurements_base_path, dataset_path, measurement_names=None, copy_strategy="copy"):
     """
         Function combine multiple prepared datasets to a single dataset.
 
         Parameters:
             - prepared_measurements_base_path (str): Path to dir where the prepared measurements are currently stored
             - dataset_path (str): Path to dir where the measurements shall be copied to
+            - measurement_names (list): List of measurement dirs in prepared_measurements_base_path which shall be added to the dataset (default = None -> all measurements will be added)
+            - copy_strategy (str): Strategy for copying the measurements to the dataset (default = "copy"), see custom_utils.utils.copy_file() for details.
+                                   NOTE: For "move" the measurements must be prepared again for the next dataset, as they are removed from prepared_measurements_base_path.
     """
     print(
         f"Start creating dataset from measurements at path: {prepared_measurements_base_path}")
@@ -18,15 +40,34 @@ def combine_measurements_to_dataset(prepared_measurements_base_path, dataset_pat
     measurement_names_for_logging = []
     # perform data preparation for every measurement in the measurement base path
     for root, dirs, files in os.walk(prepared_measurements_base_path):
+        if measurement_names != None:
+            # ignore prepared measurements from previous runs which shall not be part of the dataset
+            dirs = [dir for dir in dirs if dir in measurement_names]
         measurement_names_for_logging = dirs
+
+        # the windows of all measurements must have the same sampling rate, as the dataset stores only one (checked before anything is copied)
+        # measurements which were prepared before the sampling rate was stored are not considered
+        sampling_rates = set(read_sampling_rate(os.path.join(root, measurement_dir))
+                             for measurement_dir in dirs) - {None}
+        if len(sampling_rates) > 1:
+            raise Exception(
+                f"Measurements were prepared with different sampling rates of the IMU data ({sampling_rates}), prepare them again with the same data_preparation_main.IMU_sampling_rate")
+
         for measurement_dir in dirs:
             measurement_path = os.path.join(root, measurement_dir)
 
-            copy_measurement_to_dataset(measurement_path, dataset_path)
-
+            # labels must be loaded before the measurement is potentially moved
             label_mapping_list.append(
                 get_labels_timestamp_mapping(measurement_path))
 
+            copy_measurement_to_dataset(
+                measurement_path, dataset_path, copy_strategy)
+
+            if copy_strategy == "move":
+                # moved measurements are not available anymore for the next run
+                remove_preparation_key(measurement_path)
+                os.rmdir(measurement_path)
+
         # break after first for loop to only explore the top level of measurement_base_path
         break
 
@@ -36,8 +77,10 @@ def combine_measurements_to_dataset(prepared_measurements_base_path, dataset_pat
         combined_label_mapping = np.append(
             combined_label_mapping, np.asarray(label_mapping_list[i]), axis=0)
 
-    # save labels file with all labels
+    # save labels file with all labels (old file is removed first, as it might be a hardlink to labels.csv of a measurement)
     combined_label_file_path = os.path.join(dataset_path, "labels.csv")
+    if os.path.exists(combined_label_file_path):
+        os.remove(combined_label_file_path)
     np.savetxt(combined_label_file_path,
                combined_label_mapping, delimiter=";", header="timestamp;label", fmt="%s")
     print(f"Saved new label file at {combined_label_file_path}")
@@ -46,6 +89,9 @@ def combine_measurements_to_dataset(prepared_measurements_base_path, dataset_pat
     print("\nRemove obsolete files from dataset")
     os.remove(os.path.join(dataset_path, "data_preparation.log"))
     os.remove(os.path.join(dataset_path, "info.json"))
+    # metrics report is only available for measurements which were prepared after it was introduced
+    if os.path.exists(os.path.join(dataset_path, METRICS_FILENAME)):
+        os.remove(os.path.join(dataset_path, METRICS_FILENAME))
 
     # print infos about measurements added to dataset
     print(
@@ -57,16 +103,139 @@ def combine_measurements_to_dataset(prepared_measurements_base_path, dataset_pat
         print(f"- {measurement}")
 
 
-def copy_measurement_to_dataset(measurement_path, dataset_path):
+def copy_measurement_to_dataset(measurement_path, dataset_path, copy_strategy="copy"):
     """
         Function to copy the data from the measurement at measurement_path to the dataset at dataset_path.
 
         Parameters:
             - measurement_path (str): Path to dir where the measurement is currently stored
             - dataset_path (str): Path to dir where the measurement shall be copied to
+            - copy_strategy (str): Strategy for copying the files (default = "copy"), see custom_utils.utils.copy_file() for details
+    """
+    print(
+        f"Copy files from {measurement_path} to {dataset_path} (copy strategy '{copy_strategy}')")
+    copy_dir(measurement_path, dataset_path, copy_strategy)
+
+
+def get_namespaced_sample_name(namespace, sample_name):
+    """
+        Function to get the name of a sample in a dataset of multiple measurements, so that samples of measurements with the same timestamps don't collide.
+        The format "<namespace>_hh_mm_ss_xxx" is supported by the FloorTypeDetectionDataset class, which assigns the samples to measurements by the namespace.
+
+        Parameters:
+            - namespace (str): Namespace of the measurement (name of the measurement dir)
+            - sample_name (str): Name of the sample in the prepared measurement (timestamp string, optionally with file extension)
+
+        Returns:
+            - (str): Name of the sample in the dataset
+    """
+    return f"{namespace}_{sample_name}"
+
+
+def is_sample_of_namespace(filename, namespace):
+    """
+        Function to check whether a file of the dataset belongs to the measurement with namespace (see get_namespaced_sample_name()).
+
+        Parameters:
+            - filename (str): Name of the file in the format "<namespace>_hh_mm_ss_xxx.jpg" or "<namespace>_hh_mm_ss_xxx.csv"
+            - namespace (str): Namespace of the measurement
+
+        Returns:
+            - (bool): True if the file belongs to the measurement
+    """
+    # the namespace is everything before the four parts of the timestamp (comparing only the start would also match e.g. "<namespace>_2")
+    return filename[:-4].rsplit("_", 4)[0] == namespace
+
+
+def write_measurement_to_dataset(measurement_path, dataset_path, namespace, copy_strategy="copy", measurement_index=None):
+    """
+        Function to write all samples of a prepared measurement directly to the final dataset with namespaced sample names (see get_namespaced_sample_name()).
+        Only the files of the sensor dirs are written, labels.csv and all other files of the measurement are kept in measurement_path for merge_measurement_labels().
+        Stacked windows (see custom_utils.window_io) are written with the namespace as stack name.
+
+        Parameters:
+            - measurement_path (str): Path to dir where the prepared measurement is currently stored
+            - dataset_path (str): Path to dir of the final dataset
+            - namespace (str): Namespace of the measurement in the dataset
+            - copy_strategy (str): Strategy for copying the files (default = "copy"), see custom_utils.utils.copy_file() for details
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
     """
-    print(f"Copy files from {measurement_path} to {dataset_path}")
-    copy_tree(measurement_path, dataset_path)
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+
+    logging.info(
+        f"Write samples from {measurement_path} to {dataset_path} with namespace '{namespace}' (copy strategy '{copy_strategy}')")
+    for sensor in measurement_index.sensors:
+        os.makedirs(os.path.join(dataset_path, sensor), exist_ok=True)
+        for filename in measurement_index.get_filenames(sensor):
+            copy_file(measurement_index.get_file_path(sensor, filename),
+                      os.path.join(dataset_path, sensor, get_namespaced_sample_name(namespace, filename)), copy_strategy)
+
+        if not "Cam" in sensor:
+            sensor_path = os.path.join(measurement_path, sensor)
+            for stack_name in get_stack_names(sensor_path):
+                copy_file(os.path.join(sensor_path, get_stacked_windows_filenames(stack_name)[0]),
+                          os.path.join(dataset_path, sensor, get_stacked_windows_filenames(namespace)[0]), copy_strategy)
+                write_stacked_sample_names(os.path.join(dataset_path, sensor), namespace, [get_namespaced_sample_name(namespace, sample_name)
+                                                                                           for sample_name in read_stacked_sample_names(sensor_path, stack_name)])
+
+
+def remove_measurement_from_dataset(dataset_path, namespace):
+    """
+        Function to remove all samples of a measurement from the final dataset, e.g. if its data preparation failed after some samples were written.
+
+        Parameters:
+            - dataset_path (str): Path to dir of the final dataset
+            - namespace (str): Namespace of the measurement in the dataset
+    """
+    if not os.path.exists(dataset_path):
+        return
+
+    measurement_index = MeasurementIndex(dataset_path)
+    for sensor in measurement_index.sensors:
+        for filename in measurement_index.get_filenames(sensor):
+            if is_sample_of_namespace(filename, namespace):
+                measurement_index.delete_file(sensor, filename)
+
+        # stacked windows of the measurement (see write_measurement_to_dataset())
+        for filename in get_stacked_windows_filenames(namespace):
+            if measurement_index.contains(sensor, filename):
+                measurement_index.delete_file(sensor, filename)
+
+
+def merge_measurement_labels(dataset_path, prepared_measurement_paths):
+    """
+        Function to merge the labels of all measurements which were written to the final dataset by write_measurement_to_dataset() to labels.csv of the dataset.
+
+        Parameters:
+            - dataset_path (str): Path to dir of the final dataset
+            - prepared_measurement_paths (dict): Dict containing the path to the prepared measurement (where its labels.csv is stored) for each namespace
+
+        Returns:
+            - (int): Number of samples in the dataset
+    """
+    print(f"\nMerge label files of all measurements to {dataset_path}")
+    label_mapping_list = []
+    for namespace in sorted(prepared_measurement_paths):
+        label_mapping = get_labels_timestamp_mapping(
+            prepared_measurement_paths[namespace])
+        label_mapping[:, 0] = [get_namespaced_sample_name(namespace, sample_name)
+                               for sample_name in label_mapping[:, 0]]
+        label_mapping_list.append(label_mapping)
+
+    combined_label_mapping = np.concatenate(label_mapping_list, axis=0)
+    np.savetxt(os.path.join(dataset_path, "labels.csv"),
+               combined_label_mapping, delimiter=";", header="timestamp;label", fmt="%s")
+
+    print(
+        f"\nDataset was successfully created and can be found here: {dataset_path}")
+    print("\nPlease update the datasheet.md file manually with the following details:")
+    print(f"Total instances in the dataset: {len(combined_label_mapping)}")
+    print("The following measurements are included:")
+    for namespace in sorted(prepared_measurement_paths):
+        print(f"- {namespace}")
+
+    return len(combined_label_mapping)
 
 
 def get_labels_timestamp_mapping(measurement_path):
@@ -0,0 +1,284 @@
+import os
+import sys
+from datetime import timedelta
+
+# differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
+if __name__ == "__main__":
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from custom_utils.window_io import WINDOW_FILE_EXTENSIONS, is_stacked_windows_file
+else:
+    from custom_utils.window_io import WINDOW_FILE_EXTENSIONS, is_stacked_windows_file
+
+
+class MeasurementIndex():
+    """
+        Class to index all files of a measurement (or dataset) once, so that the preparation steps don't need to list the dirs again.
+
+        Background:
+            Most preparation steps need the sorted list of files of one or all sensors. Listing the dirs again for each step takes a lot of time
+            for large camera dirs, especially on network storage. Thus the index is created once with os.scandir() and all steps which delete,
+            rename or write files update the index by using the methods of this class.
+
+        Usage:
+            Create the index after the raw measurement was copied and pass it to all preparation steps via the parameter measurement_index.
+            All files must be changed by the methods delete_file(), rename_file() and add_file(), otherwise the index is outdated.
+
+        Data:
+            - self.sensors (list): List of all sensor dirs in the order of os.walk()
+            - self.files (dict): Dict containing for each sensor a dict with the sizes of all files where the filename is the key
+                                 (None till the size is requested, as determining the size needs an additional system call for each file on Linux)
+    """
+
+    def __init__(self, measurement_path):
+        """
+            Init method which scans all sensor dirs of the measurement.
+
+            Parameters:
+                - measurement_path (str): Path to the measurement
+        """
+        self.measurement_path = measurement_path
+        self.sensors = []
+        self.files = {}
+
+        # caches which are reset for a sensor as soon as its files change
+        self.__sorted_filenames = {}
+        self.__timestamps_ms = {}
+
+        with os.scandir(measurement_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    self.sensors.append(entry.name)
+                    self.files[entry.name] = self.__scan_sensor_dir(
+                        entry.path)
+
+    def __scan_sensor_dir(self, sensor_path):
+        """
+            Private method to get all files in the dir sensor_path.
+
+            Parameters:
+                - sensor_path (str): Path to the dir of the sensor
+
+            Returns:
+                - (dict): Dict with all files where the filename is the key (sizes are not determined yet)
+        """
+        with os.scandir(sensor_path) as entries:
+            return {entry.name: None for entry in entries if entry.is_file()}
+
+    def __get_data_file_extensions(self, sensor):
+        """
+            Private method to get the possible file extensions of the data files of sensor.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+
+            Returns:
+                - (tuple): (".jpg",) for cameras and (".csv", ".npy") for all other sensors (windows can be stored in both formats)
+        """
+        return (".jpg",) if "Cam" in sensor else tuple(WINDOW_FILE_EXTENSIONS)
+
+    def __reset_cache(self, sensor):
+        """
+            Private method to reset the cached sorted filenames of sensor after its files were changed.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+        """
+        self.__sorted_filenames.pop(sensor, None)
+
+    def get_cameras(self):
+        """
+            Method to get all camera dirs of the measurement.
+
+            Returns:
+                - (list): List of all sensors with "Cam" in the name
+        """
+        return [sensor for sensor in self.sensors if "Cam" in sensor]
+
+    def get_timeseries_sensors(self):
+        """
+            Method to get all timeseries sensor dirs of the measurement.
+
+            Returns:
+                - (list): List of all sensors without "Cam" in the name
+        """
+        return [sensor for sensor in self.sensors if not "Cam" in sensor]
+
+    def get_filenames(self, sensor):
+        """
+            Method to get the sorted filenames of all data files of sensor (.jpg files for cameras and .csv or .npy files for all other sensors).
+            Stacked windows are no data files of a single sample and thus not included (see custom_utils.window_io).
+
+            Parameters:
+                - sensor (str): Name of the sensor
+
+            Returns:
+                - (list): Sorted list of the filenames
+        """
+        if sensor not in self.__sorted_filenames:
+            extensions = self.__get_data_file_extensions(sensor)
+            self.__sorted_filenames[sensor] = sorted(
+                filename for filename in self.files[sensor] if filename.endswith(extensions) and not is_stacked_windows_file(filename))
+
+        return list(self.__sorted_filenames[sensor])
+
+    def get_data_filename(self, sensor, sample_name):
+        """
+            Method to get the name of the data file of a sample of sensor.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+                - sample_name (str): Name of the sample (timestamp string)
+
+            Returns:
+                - (str): Name of the existing data file (name with the first possible file extension if no data file exists for the sample)
+        """
+        extensions = self.__get_data_file_extensions(sensor)
+        for extension in extensions:
+            if self.contains(sensor, sample_name + extension):
+                return sample_name + extension
+
+        return sample_name + extensions[0]
+
+    def get_file_path(self, sensor, filename):
+        """
+            Method to get the path of a file of sensor.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+                - filename (str): Name of the file
+
+            Returns:
+                - (str): Path to the file
+        """
+        return os.path.join(self.measurement_path, sensor, filename)
+
+    def get_file_paths(self, sensor):
+        """
+            Method to get the paths of all data files of sensor sorted by their filenames.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+
+            Returns:
+                - (list): Sorted list of the paths
+        """
+        return [self.get_file_path(sensor, filename) for filename in self.get_filenames(sensor)]
+
+    def contains(self, sensor, filename):
+        """
+            Method to check whether the file exists for sensor.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+                - filename (str): Name of the file
+
+            Returns:
+                - (bool): True if the file exists
+        """
+        return sensor in self.files and filename in self.files[sensor]
+
+    def get_size(self, sensor, filename):
+        """
+            Method to get the size of a file of sensor (determined once on the first request).
+
+            Parameters:
+                - sensor (str): Name of the sensor
+                - filename (str): Name of the file
+
+            Returns:
+                - (int): Size of the file in bytes
+        """
+        if self.files[sensor][filename] == None:
+            self.files[sensor][filename] = os.path.getsize(
+                self.get_file_path(sensor, filename))
+
+        return self.files[sensor][filename]
+
+    def get_timestamp_ms(self, filename):
+        """
+            Method to get the timestamp from a filename as milliseconds since midnight (same formats as for get_timestamp_from_picture()).
+
+            Parameters:
+                - filename (str): Name of a file in the format "hh_mm_ss_xxx.csv", "hh_mm_ss_xxx.npy", "Left_hh_mm_ss_xxx.jpg" or "Right_hh_mm_ss_xxx.jpg"
+
+            Returns:
+                - (int): Milliseconds since midnight
+        """
+        if filename not in self.__timestamps_ms:
+            timestamp_string = filename[:-4]
+            if filename[0] == "L":
+                timestamp_string = filename[5:-4]
+            elif filename[0] == "R":
+                timestamp_string = filename[6:-4]
+
+            hours, minutes, seconds, millis = [
+                int(part) for part in timestamp_string.split("_")]
+            self.__timestamps_ms[filename] = (
+                (hours * 60 + minutes) * 60 + seconds) * 1000 + millis
+
+        return self.__timestamps_ms[filename]
+
+    def get_timestamps(self, sensor, measurement_date):
+        """
+            Method to get the timestamps of all data files of sensor sorted by their filenames.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+                - measurement_date (datetime.datetime): Date of the measurement for the timestamps
+
+            Returns:
+                - (list): List of the timestamps (datetime.datetime)
+        """
+        return [measurement_date + timedelta(milliseconds=self.get_timestamp_ms(filename)) for filename in self.get_filenames(sensor)]
+
+    def add_file(self, sensor, filename):
+        """
+            Method to add a file to the index which was written (or overwritten) by a preparation step.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+                - filename (str): Name of the file
+        """
+        if sensor not in self.files:
+            self.sensors.append(sensor)
+            self.files[sensor] = {}
+
+        # size of the file will be determined again if requested
+        self.files[sensor][filename] = None
+        self.__reset_cache(sensor)
+
+    def delete_file(self, sensor, filename):
+        """
+            Method to delete a file and remove it from the index.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+                - filename (str): Name of the file
+        """
+        os.remove(self.get_file_path(sensor, filename))
+        del self.files[sensor][filename]
+        self.__reset_cache(sensor)
+
+    def rename_file(self, sensor, filename, new_filename):
+        """
+            Method to rename a file (an existing file with new_filename will be replaced) and update the index.
+
+            Parameters:
+                - sensor (str): Name of the sensor
+                - filename (str): Current name of the file
+                - new_filename (str): New name of the file
+        """
+        os.replace(self.get_file_path(sensor, filename),
+                   self.get_file_path(sensor, new_filename))
+        self.files[sensor][new_filename] = self.files[sensor].pop(filename)
+        self.__reset_cache(sensor)
+
+
+if __name__ == "__main__":
+    measurement_path = r"./testdata/measurement_25_07__15_03"
+
+    measurement_index = MeasurementIndex(measurement_path)
+    for sensor in measurement_index.sensors:
+        filenames = measurement_index.get_filenames(sensor)
+        print(f"{sensor}: {len(filenames)} files from {filenames[0]} to {filenames[-1]}")
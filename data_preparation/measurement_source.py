@@ -0,0 +1,213 @@
+import os
+import sys
+import shutil
+import zipfile
+
+# differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
+if __name__ == "__main__":
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from custom_utils.utils import copy_file
+else:
+    from custom_utils.utils import copy_file
+
+
+def get_measurement_source(measurement_path):
+    """
+        Function to get the matching measurement source for measurement_path.
+
+        Parameters:
+            - measurement_path (str): Path to dir where the measurement is stored (can also be a .zip file)
+
+        Returns:
+            - (DirectoryMeasurementSource or ZipMeasurementSource): Measurement source to read the files of the measurement
+    """
+    if ".zip" == measurement_path[-4:]:
+        return ZipMeasurementSource(measurement_path)
+    else:
+        return DirectoryMeasurementSource(measurement_path)
+
+
+class DirectoryMeasurementSource():
+    """
+        Class to read the files of a measurement which is stored in a directory.
+
+        Usage:
+            All paths of files are relative to the measurement dir with "/" as separator (e.g. "accelerometer/15_03_25_914.csv").
+            ZipMeasurementSource provides the same methods, so that both can be used by the in-memory data preparation.
+    """
+
+    def __init__(self, measurement_path):
+        """
+            Init method which stores the path to the measurement dir.
+
+            Parameters:
+                - measurement_path (str): Path to the measurement dir
+        """
+        self.measurement_path = measurement_path
+
+    def list_dirs(self):
+        """
+            Method to get all dirs at the top level of the measurement (in the same order as os.walk()).
+
+            Returns:
+                - (list): List of dir names
+        """
+        for root, dirs, files in os.walk(self.measurement_path):
+            return dirs
+        return []
+
+    def list_files(self, dir_name=""):
+        """
+            Method to get all files of a dir of the measurement.
+
+            Parameters:
+                - dir_name (str): Default = "". Name of the dir, where "" is the top level of the measurement
+
+            Returns:
+                - (list): Sorted list of file names
+        """
+        for root, dirs, files in os.walk(os.path.join(self.measurement_path, dir_name)):
+            return sorted(files)
+        return []
+
+    def open(self, file_path):
+        """
+            Method to open a file of the measurement for reading in binary mode.
+
+            Parameters:
+                - file_path (str): Path of the file relative to the measurement dir
+
+            Returns:
+                - (file object): Opened file
+        """
+        return open(os.path.join(self.measurement_path, *file_path.split("/")), "rb")
+
+    def copy_file(self, file_path, destination_path, copy_strategy="copy"):
+        """
+            Method to copy a file of the measurement to destination_path.
+
+            Parameters:
+                - file_path (str): Path of the file relative to the measurement dir
+                - destination_path (str): Path where the file shall be stored (can also be a dir)
+                - copy_strategy (str): Default = "copy". Strategy for copying the file (see custom_utils.utils.copy_file()), "move" is not allowed for the raw measurement
+        """
+        if copy_strategy == "move":
+            raise Exception(
+                f"Copy strategy 'move' is not allowed for the raw measurement {self.measurement_path}")
+
+        if os.path.isdir(destination_path):
+            destination_path = os.path.join(
+                destination_path, file_path.split("/")[-1])
+
+        copy_file(os.path.join(self.measurement_path,
+                  *file_path.split("/")), destination_path, copy_strategy)
+
+    def close(self):
+        """
+            Method for compatibility with ZipMeasurementSource (nothing to close for a dir).
+        """
+        pass
+
+
+class ZipMeasurementSource():
+    """
+        Class to read the files of a measurement directly from a .zip file without extracting it.
+
+        Usage:
+            The content of the .zip file must be the same as for a measurement dir (info.json and the sensor dirs at the top level).
+            All paths of files are relative to the top level of the .zip file with "/" as separator (e.g. "accelerometer/15_03_25_914.csv").
+            Only the files which are read are decompressed. Call close() if the source is not needed anymore.
+    """
+
+    def __init__(self, measurement_path):
+        """
+            Init method which opens the .zip file and creates an index of all dirs and files from its table of contents.
+
+            Parameters:
+                - measurement_path (str): Path to the .zip file of the measurement
+        """
+        self.measurement_path = measurement_path
+        self.zip_file = zipfile.ZipFile(measurement_path, "r")
+
+        # dict containing the files for each dir in the order of the archive, where "" is the top level
+        self.files = {"": []}
+        # dict to get the name of the member in the archive for each file path
+        self.members = {}
+        for member in self.zip_file.namelist():
+            file_path = member[2:] if member.startswith("./") else member
+            dir_name, _, file_name = file_path.rpartition("/")
+            if "/" in dir_name:
+                # files in sub dirs of the sensor dirs are not part of a measurement
+                continue
+
+            if dir_name not in self.files:
+                self.files[dir_name] = []
+            if file_name != "":
+                self.files[dir_name].append(file_name)
+                self.members[file_path] = member
+
+    def list_dirs(self):
+        """
+            Method to get all dirs at the top level of the measurement (in the order of the archive).
+
+            Returns:
+                - (list): List of dir names
+        """
+        return [dir_name for dir_name in self.files if dir_name != ""]
+
+    def list_files(self, dir_name=""):
+        """
+            Method to get all files of a dir of the measurement.
+
+            Parameters:
+                - dir_name (str): Default = "". Name of the dir, where "" is the top level of the measurement
+
+            Returns:
+                - (list): Sorted list of file names
+        """
+        return sorted(self.files.get(dir_name, []))
+
+    def open(self, file_path):
+        """
+            Method to open a file of the measurement for reading in binary mode (decompressed while reading).
+
+            Parameters:
+                - file_path (str): Path of the file relative to the top level of the .zip file
+
+            Returns:
+                - (file object): Opened file
+        """
+        return self.zip_file.open(self.members[file_path], "r")
+
+    def copy_file(self, file_path, destination_path, copy_strategy="copy"):
+        """
+            Method to extract a single file of the measurement to destination_path.
+
+            Parameters:
+                - file_path (str): Path of the file relative to the top level of the .zip file
+                - destination_path (str): Path where the file shall be stored (can also be a dir)
+                - copy_strategy (str): Default = "copy". Only for compatibility with DirectoryMeasurementSource, as files must always be extracted
+        """
+        if os.path.isdir(destination_path):
+            destination_path = os.path.join(
+                destination_path, file_path.split("/")[-1])
+
+        with self.open(file_path) as source_file, open(destination_path, "wb") as destination_file:
+            shutil.copyfileobj(source_file, destination_file)
+
+    def close(self):
+        """
+            Method to close the .zip file.
+        """
+        self.zip_file.close()
+
+
+if __name__ == "__main__":
+    measurement_path = r"./testdata/measurement_25_07__15_03"
+
+    measurement_source = get_measurement_source(measurement_path)
+    for dir_name in measurement_source.list_dirs():
+        print(
+            f"{dir_name}: {len(measurement_source.list_files(dir_name))} files")
+    measurement_source.close()
@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import shutil
+import zipfile
+import threading
+import traceback
+
+# differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
+if __name__ == "__main__":
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from custom_utils.utils import copy_measurement_to_temp
+    from preparation_metrics import exclude_current_thread_from_counting, include_current_thread_in_counting
+else:
+    from custom_utils.utils import copy_measurement_to_temp
+    from data_preparation.preparation_metrics import exclude_current_thread_from_counting, include_current_thread_in_counting
+
+
+def get_measurement_size(measurement_path):
+    """
+        Function to get the size of a raw measurement after it's copied or extracted to the staging area.
+
+        Parameters:
+            - measurement_path (str): Path to dir where the measurement is stored (can also be a .zip file)
+
+        Returns:
+            - (int): Size of all files of the measurement in bytes (uncompressed size for a .zip file)
+    """
+    if ".zip" == measurement_path[-4:]:
+        with zipfile.ZipFile(measurement_path, "r") as zip_file:
+            return sum(info.file_size for info in zip_file.infolist())
+
+    measurement_size = 0
+    for root, dirs, files in os.walk(measurement_path):
+        for file in files:
+            measurement_size += os.path.getsize(os.path.join(root, file))
+    return measurement_size
+
+
+def release_staged_measurement(temp_path):
+    """
+        Function to remove the data of a staged measurement after its data preparation finished.
+        Only the sub dirs (sensor data) are removed, files at the top level like data_preparation.log and labels.csv are kept.
+
+        Parameters:
+            - temp_path (str): Path to the temp dir of the measurement
+    """
+    if not os.path.exists(temp_path):
+        return
+
+    with os.scandir(temp_path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                shutil.rmtree(entry.path)
+
+
+class MeasurementStager():
+    """
+        Class to copy (stage) raw measurements to their temp dirs in a background thread, while previously staged measurements are prepared.
+
+        Background:
+            Copying a measurement to its temp dir is pure I/O, while the data preparation afterwards is mostly compute. Staging the next measurements
+            in a thread overlaps both. The staging area is bounded by a disk budget, so that the peak disk usage doesn't grow with the number of measurements.
+
+        Usage:
+            Provide the list of (measurement_path, temp_path) in the order in which the measurements shall be prepared and call start().
+            Iterate over the stager to get the staged measurements (blocks until the next one is staged) and call release() for each of them
+            as soon as its data preparation finished, which frees its part of the disk budget for the next measurements.
+
+        Data:
+            - Each staged measurement is returned as tuple (measurement_path, temp_path, error_message), where error_message is "" if staging was successful
+              and the traceback otherwise (in this case the measurement must be released as well).
+            - A measurement which is larger than the whole budget is only staged if no other measurement is staged, so that the pipeline never stops.
+    """
+
+    def __init__(self, staging_list, disk_budget_bytes=None, copy_strategy="copy"):
+        """
+            Init method which stores the measurements to stage (staging is not started yet).
+
+            Parameters:
+                - staging_list (list): List of tuples (measurement_path, temp_path) for all measurements in the order they shall be staged
+                - disk_budget_bytes (int): Default = None. Maximum size of all staged measurements which were not released yet (None = no limit)
+                - copy_strategy (str): Default = "copy". Strategy for copying the measurements (see custom_utils.utils.copy_file()), "move" is not allowed
+        """
+        self.staging_list = list(staging_list)
+        self.disk_budget_bytes = disk_budget_bytes
+        self.copy_strategy = copy_strategy
+
+        self.used_bytes = 0
+        self.staged_sizes = {}
+        self.staged_measurements = []
+        self.num_returned = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(
+            target=self.__stage_all_measurements, daemon=True)
+
+    def start(self):
+        """
+            Method to start staging in the background thread.
+        """
+        self.thread.start()
+
+    def __stage_all_measurements(self):
+        """
+            Private method which stages all measurements of self.staging_list one after another, as long as the disk budget allows it.
+            The file operations of the thread are excluded from the metrics, as they belong to the next measurements and not to the steps
+            of the measurement which is prepared in the same process meanwhile.
+        """
+        exclude_current_thread_from_counting()
+        try:
+            for measurement_path, temp_path in self.staging_list:
+                self.__stage_measurement(measurement_path, temp_path)
+        finally:
+            include_current_thread_in_counting()
+
+    def __stage_measurement(self, measurement_path, temp_path):
+        """
+            Private method which stages a single measurement as soon as the disk budget allows it.
+
+            Parameters:
+                - measurement_path (str): Path to dir where the measurement is stored (can also be a .zip file)
+                - temp_path (str): Path to the temp dir of the measurement
+        """
+        error_message = ""
+        try:
+            measurement_size = get_measurement_size(measurement_path)
+        except Exception:
+            measurement_size = 0
+            error_message = traceback.format_exc()
+
+        # wait till enough staged measurements were released (a measurement is always staged if the staging area is empty)
+        with self.condition:
+            while self.disk_budget_bytes != None and self.used_bytes > 0 and self.used_bytes + measurement_size > self.disk_budget_bytes:
+                self.condition.wait()
+            self.used_bytes += measurement_size
+            self.staged_sizes[temp_path] = measurement_size
+
+        if error_message == "":
+            try:
+                start_time = time.perf_counter()
+                if os.path.exists(temp_path):
+                    shutil.rmtree(temp_path)
+                os.makedirs(temp_path)
+                copy_measurement_to_temp(
+                    measurement_path, temp_path, self.copy_strategy)
+                print(
+                    f"Staged {measurement_path} ({measurement_size / (1024 * 1024):.0f} MB) in {time.perf_counter() - start_time:.2f} s")
+            except Exception:
+                error_message = traceback.format_exc()
+
+        with self.condition:
+            self.staged_measurements.append(
+                (measurement_path, temp_path, error_message))
+            self.condition.notify_all()
+
+    def __iter__(self):
+        """
+            Method to iterate over all staged measurements in the order of staging (blocks until the next measurement is staged).
+
+            Returns:
+                - (generator): Generator of tuples (measurement_path, temp_path, error_message)
+        """
+        while self.num_returned < len(self.staging_list):
+            with self.condition:
+                while len(self.staged_measurements) <= self.num_returned:
+                    self.condition.wait()
+                staged_measurement = self.staged_measurements[self.num_returned]
+            self.num_returned += 1
+            yield staged_measurement
+
+    def release(self, temp_path):
+        """
+            Method to remove the data of a staged measurement (see release_staged_measurement()) and free its part of the disk budget.
+            Can be called from any thread.
+
+            Parameters:
+                - temp_path (str): Path to the temp dir of the measurement
+        """
+        release_staged_measurement(temp_path)
+        with self.condition:
+            self.used_bytes -= self.staged_sizes.pop(temp_path, 0)
+            self.condition.notify_all()
+
+
+if __name__ == "__main__":
+    measurement_base_path = r"./testdata"
+    temp_base_path = r"./temp/staging_example"
+
+    staging_list = [(os.path.join(measurement_base_path, measurement_name), os.path.join(temp_base_path, measurement_name))
+                    for measurement_name in sorted(os.listdir(measurement_base_path))]
+
+    # budget of 1 byte means that only one measurement is staged at a time
+    stager = MeasurementStager(staging_list, disk_budget_bytes=1)
+    stager.start()
+    for measurement_path, temp_path, error_message in stager:
+        print(f"{measurement_path} is staged at {temp_path} {error_message}")
+        stager.release(temp_path)
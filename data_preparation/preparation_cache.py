@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+import zipfile
+
+# increase the version if the data preparation itself was changed, so that all measurements will be prepared again
+PREPARATION_VERSION = 2
+
+# gin scopes and single bindings which have no influence on the prepared measurements and are therefore ignored for the preparation key
+SCOPES_WITHOUT_INFLUENCE_ON_RESULTS = [
+    "prepare_all_measurements", "get_list_of_corrupt_IMU_files", "combine_measurements_to_dataset"]
+BINDINGS_WITHOUT_INFLUENCE_ON_RESULTS = ["data_preparation_main.copy_strategy",
+                                         "preprocess_images_in_parallel.num_workers", "preprocess_images_in_parallel.chunk_size", "get_csv_backend.backend",
+                                         "read_windows.num_workers", "read_windows.memory_map", "create_sliding_windows_for_all_sensors_and_save_them.num_workers"]
+
+# content of these files will not be hashed (only name and size) as they make up most of the raw data
+IMAGE_FILE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+
+PREPARATION_KEY_FILE_SUFFIX = ".preparation_key.json"
+
+
+def get_measurement_fingerprint(measurement_path):
+    """
+        Function to determine a fingerprint of the raw content of a measurement.
+        For a measurement dir the relative path and size of all files and the content of all non image files is used.
+        For a .zip file the name, size and CRC of all files in the archive is used, so that the archive doesn't need to be extracted.
+
+        Parameters:
+            - measurement_path (str): Path to dir where the measurement is stored (can also be a .zip file)
+
+        Returns:
+            - (str): Hex digest of the fingerprint
+    """
+    fingerprint = hashlib.sha256()
+
+    if ".zip" == measurement_path[-4:]:
+        with zipfile.ZipFile(measurement_path, "r") as zip_file:
+            for info in sorted(zip_file.infolist(), key=lambda info: info.filename):
+                fingerprint.update(
+                    f"{info.filename};{info.file_size};{info.CRC}\n".encode())
+        return fingerprint.hexdigest()
+
+    for root, dirs, files in os.walk(measurement_path):
+        # sort dirs in place to get the same order for every run
+        dirs.sort()
+        for file in sorted(files):
+            file_path = os.path.join(root, file)
+            relative_path = os.path.relpath(
+                file_path, measurement_path).replace(os.sep, "/")
+            fingerprint.update(
+                f"{relative_path};{os.path.getsize(file_path)}\n".encode())
+
+            if os.path.splitext(file)[1].lower() not in IMAGE_FILE_EXTENSIONS:
+                with open(file_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        fingerprint.update(chunk)
+
+    return fingerprint.hexdigest()
+
+
+def get_relevant_gin_config(gin_config_str):
+    """
+        Function to remove comments and bindings without influence on the prepared measurements from a gin config string.
+
+        Parameters:
+            - gin_config_str (str): Gin config string (e.g. from gin.config_str())
+
+        Returns:
+            - (str): Gin config string which only contains the relevant bindings
+    """
+    relevant_lines = []
+    for line in gin_config_str.splitlines():
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        if any(line.startswith(f"{scope}.") for scope in SCOPES_WITHOUT_INFLUENCE_ON_RESULTS):
+            continue
+        if line.split("=")[0].strip() in BINDINGS_WITHOUT_INFLUENCE_ON_RESULTS:
+            continue
+        relevant_lines.append(line)
+
+    return "\n".join(relevant_lines)
+
+
+def get_preparation_key(measurement_path, gin_config_str, preprocessing_config_dict):
+    """
+        Function to determine the key of a measurement, which changes as soon as the raw data or the config for the data preparation changes.
+
+        Parameters:
+            - measurement_path (str): Path to dir where the measurement is stored (can also be a .zip file)
+            - gin_config_str (str): Gin config which is used for the data preparation
+            - preprocessing_config_dict (dict): Dict from preprocessing_config.json which is used for the data preparation
+
+        Returns:
+            - (str): Hex digest of the preparation key
+    """
+    key_content = {"version": PREPARATION_VERSION,
+                   "measurement": get_measurement_fingerprint(measurement_path),
+                   "gin_config": get_relevant_gin_config(gin_config_str),
+                   "preprocessing_config": preprocessing_config_dict}
+
+    return hashlib.sha256(json.dumps(key_content, sort_keys=True).encode()).hexdigest()
+
+
+def get_preparation_key_file_path(prepared_measurement_path):
+    """
+        Function to get the path of the file where the preparation key of the prepared measurement is stored (next to the dir of the prepared measurement).
+
+        Parameters:
+            - prepared_measurement_path (str): Path to dir where the prepared measurement is stored
+
+        Returns:
+            - (str): Path to the preparation key file
+    """
+    return os.path.normpath(prepared_measurement_path) + PREPARATION_KEY_FILE_SUFFIX
+
+
+def is_preparation_up_to_date(prepared_measurement_path, preparation_key):
+    """
+        Function to check whether the prepared measurement exists and was prepared with the same preparation key.
+
+        Parameters:
+            - prepared_measurement_path (str): Path to dir where the prepared measurement is stored
+            - preparation_key (str): Current preparation key of the measurement
+
+        Returns:
+            - (bool): True if the prepared measurement can be used without preparing it again
+    """
+    key_file_path = get_preparation_key_file_path(prepared_measurement_path)
+    if not os.path.isdir(prepared_measurement_path) or not os.path.isfile(key_file_path):
+        return False
+
+    try:
+        with open(key_file_path, "r") as f:
+            stored_key = json.load(f)["preparation_key"]
+    except (ValueError, KeyError):
+        return False
+
+    return stored_key == preparation_key
+
+
+def store_preparation_key(prepared_measurement_path, measurement_path, preparation_key):
+    """
+        Function to store the preparation key next to the prepared measurement. Shall only be called after the preparation was successful,
+        so that measurements from interrupted runs are prepared again.
+
+        Parameters:
+            - prepared_measurement_path (str): Path to dir where the prepared measurement is stored
+            - measurement_path (str): Path to dir where the raw measurement is stored (only stored for information)
+            - preparation_key (str): Preparation key of the measurement
+    """
+    key_file_path = get_preparation_key_file_path(prepared_measurement_path)
+
+    # write to temporary file first, so that the key file is never incomplete
+    with open(key_file_path + ".tmp", "w") as f:
+        json.dump({"measurement_path": measurement_path,
+                  "preparation_key": preparation_key}, f, indent=3)
+    os.replace(key_file_path + ".tmp", key_file_path)
+
+
+def remove_preparation_key(prepared_measurement_path):
+    """
+        Function to remove the preparation key of a prepared measurement (e.g. before it is prepared again).
+
+        Parameters:
+            - prepared_measurement_path (str): Path to dir where the prepared measurement is stored
+    """
+    key_file_path = get_preparation_key_file_path(prepared_measurement_path)
+    if os.path.exists(key_file_path):
+        os.remove(key_file_path)
+
+
+if __name__ == "__main__":
+    measurement_path = r"./testdata/measurement_25_07__15_03"
+
+    print(f"Fingerprint of {measurement_path}: {get_measurement_fingerprint(measurement_path)}")
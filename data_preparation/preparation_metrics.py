@@ -0,0 +1,463 @@
+import os
+import sys
+import json
+import time
+import threading
+
+# optional modules to determine the amount of bytes read/ written and the peak memory usage
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# name of the report which is stored next to data_preparation.log of each measurement
+METRICS_FILENAME = "data_preparation_metrics.json"
+# name of the report which is stored in the result dir for all measurements prepared by prepare_all_measurements()
+METRICS_SUMMARY_FILENAME = "data_preparation_metrics_summary.json"
+
+# counters which are summed up for each step (bytes are None if they can't be determined on the OS)
+COUNTER_NAMES = ["files_read", "files_written", "files_deleted",
+                 "files_renamed", "bytes_read", "bytes_written"]
+
+# file operations of this process which are counted by file_operation_audit_hook()
+file_operation_counters = {"files_read": 0, "files_written": 0,
+                           "files_deleted": 0, "files_renamed": 0}
+# counters of worker processes which were reported by add_worker_counters()
+worker_counters = {name: 0 for name in COUNTER_NAMES}
+audit_hook_installed = False
+# threads whose file operations are not counted (thread identifier -> native thread id), e.g. the thread of a MeasurementStager
+# which copies the next measurement in this process while the current measurement is prepared
+excluded_threads = {}
+# bytes of excluded threads which already finished, as they stay part of the counters of this process (None if they couldn't be determined)
+excluded_thread_bytes = {"bytes_read": 0, "bytes_written": 0}
+# lock, so that the bytes of a thread are subtracted exactly once while it's included again
+excluded_threads_lock = threading.Lock()
+# disabled while the metrics themselves are determined, as this also opens files (e.g. /proc/self/io)
+counting_enabled = True
+
+
+def file_operation_audit_hook(event, args):
+    """
+        Audit hook to count all files which are opened, deleted or renamed by this process (see sys.addaudithook()).
+        Hardlinks are counted as written files, as they replace a copy of the file. File operations of excluded threads are not counted.
+
+        Parameters:
+            - event (str): Name of the audit event
+            - args (tuple): Arguments of the audit event
+    """
+    if not counting_enabled or threading.get_ident() in excluded_threads:
+        return
+
+    if event == "open":
+        path, mode, flags = args
+        if path == None or isinstance(path, int):
+            # already opened file descriptors are not counted again
+            return
+        if isinstance(path, str) and path.startswith("/proc/"):
+            # pseudo files of the OS (e.g. read to determine the bytes of a thread) are no file operations of the preparation
+            return
+        if mode == None:
+            # os.open() provides only the flags
+            is_writing = flags & (os.O_WRONLY | os.O_RDWR | os.O_APPEND) != 0
+        else:
+            is_writing = any(character in mode for character in "wax+")
+        if is_writing:
+            file_operation_counters["files_written"] += 1
+        else:
+            file_operation_counters["files_read"] += 1
+    elif event == "os.remove":
+        file_operation_counters["files_deleted"] += 1
+    elif event == "os.rename":
+        # also raised by os.replace()
+        file_operation_counters["files_renamed"] += 1
+    elif event == "os.link":
+        file_operation_counters["files_written"] += 1
+
+
+def install_file_operation_counter():
+    """
+        Function to install file_operation_audit_hook() for this process, if it's not installed yet (audit hooks can't be removed again).
+    """
+    global audit_hook_installed
+    if not audit_hook_installed:
+        sys.addaudithook(file_operation_audit_hook)
+        audit_hook_installed = True
+
+
+def set_counting_enabled(enabled):
+    """
+        Function to enable or disable the counting of file operations by file_operation_audit_hook().
+
+        Parameters:
+            - enabled (bool): True if file operations shall be counted
+    """
+    global counting_enabled
+    counting_enabled = enabled
+
+
+def get_thread_bytes(native_thread_id):
+    """
+        Function to get the bytes read and written by a thread of this process since its start (only possible on Linux).
+
+        Parameters:
+            - native_thread_id (int): Native id of the thread (see threading.get_native_id())
+
+        Returns:
+            - (dict): Dict containing "bytes_read" and "bytes_written" (None if not available)
+    """
+    thread_bytes = {}
+    try:
+        with open(f"/proc/self/task/{native_thread_id}/io", "r") as f:
+            for line in f:
+                name, value = line.split(":")
+                # same counters as read_chars and write_chars of psutil
+                if name == "rchar":
+                    thread_bytes["bytes_read"] = int(value)
+                elif name == "wchar":
+                    thread_bytes["bytes_written"] = int(value)
+    except OSError:
+        return None
+    if len(thread_bytes) != 2:
+        return None
+    return thread_bytes
+
+
+def exclude_current_thread_from_counting():
+    """
+        Function to exclude the file operations and bytes of the calling thread from the counters of this process,
+        e.g. for a thread which copies data in the background that doesn't belong to the measured steps.
+        Call include_current_thread_in_counting() from the same thread before it finishes.
+    """
+    excluded_threads[threading.get_ident()] = threading.get_native_id()
+
+
+def include_current_thread_in_counting():
+    """
+        Function to count the file operations of the calling thread again after exclude_current_thread_from_counting().
+        Its bytes up to now stay excluded, as they remain part of the counters of this process.
+    """
+    with excluded_threads_lock:
+        # the thread is still excluded, thus reading its counters isn't counted
+        thread_bytes = get_thread_bytes(threading.get_native_id())
+        for name in excluded_thread_bytes:
+            if thread_bytes == None or excluded_thread_bytes[name] == None:
+                excluded_thread_bytes[name] = None
+            else:
+                excluded_thread_bytes[name] += thread_bytes[name]
+        excluded_threads.pop(threading.get_ident(), None)
+
+
+def reset_excluded_threads():
+    """
+        Function to reset the excluded threads in a forked child process, as only the forking thread exists in the child
+        and the counters of the child don't contain the bytes of the threads of its parent.
+    """
+    global excluded_threads_lock
+    excluded_threads.clear()
+    for name in excluded_thread_bytes:
+        excluded_thread_bytes[name] = 0
+    # the lock might have been held by another thread of the parent at the time of the fork
+    excluded_threads_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    # not available on Windows, where child processes are spawned and thus start without excluded threads
+    os.register_at_fork(after_in_child=reset_excluded_threads)
+
+
+def get_process_counters():
+    """
+        Function to get the current values of all counters of this process including the counters reported by worker processes.
+        The counters are summed up since the start of the process, thus only the difference between two calls is meaningful.
+        Bytes of excluded threads are subtracted, if they can't be determined the bytes are not available.
+
+        Returns:
+            - (dict): Dict containing the value for each counter in COUNTER_NAMES
+    """
+    counters = dict(file_operation_counters)
+    counters["bytes_read"] = None
+    counters["bytes_written"] = None
+
+    if psutil != None:
+        try:
+            io_counters = psutil.Process().io_counters()
+            # on Linux *_chars also contains data from the page cache, which is what the preparation actually reads and writes
+            counters["bytes_read"] = getattr(
+                io_counters, "read_chars", io_counters.read_bytes)
+            counters["bytes_written"] = getattr(
+                io_counters, "write_chars", io_counters.write_bytes)
+        except (AttributeError, psutil.Error):
+            # io_counters() is not available on macOS
+            pass
+
+    with excluded_threads_lock:
+        for native_thread_id in excluded_threads.values():
+            thread_bytes = get_thread_bytes(native_thread_id)
+            for name in excluded_thread_bytes:
+                if counters[name] != None:
+                    counters[name] = None if thread_bytes == None else counters[name] - \
+                        thread_bytes[name]
+        for name, value in excluded_thread_bytes.items():
+            if counters[name] != None:
+                counters[name] = None if value == None else counters[name] - value
+
+    for name in COUNTER_NAMES:
+        if counters[name] != None:
+            counters[name] += worker_counters[name]
+
+    return counters
+
+
+def get_counter_difference(start_counters, end_counters):
+    """
+        Function to get the difference of the counters from two calls of get_process_counters().
+
+        Parameters:
+            - start_counters (dict): Counters at the start
+            - end_counters (dict): Counters at the end
+
+        Returns:
+            - (dict): Dict containing the difference for each counter in COUNTER_NAMES (None if a counter is not available)
+    """
+    return {name: None if start_counters[name] == None or end_counters[name] == None else end_counters[name] - start_counters[name]
+            for name in COUNTER_NAMES}
+
+
+def add_worker_counters(counters):
+    """
+        Function to add the counters of a worker process to the counters of this process, so that they are part of the metrics of the current step.
+
+        Parameters:
+            - counters (dict): Difference of the counters of the worker process (see get_counter_difference())
+    """
+    for name in COUNTER_NAMES:
+        if counters[name] != None:
+            worker_counters[name] += counters[name]
+
+
+def reset_peak_rss():
+    """
+        Function to reset the peak resident set size (RSS) of this process, so that it can be determined for each step (only possible on Linux).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def get_peak_rss_mb():
+    """
+        Function to get the peak resident set size (RSS) of this process and of the largest child process which has finished.
+        On Linux the peak RSS of this process is the peak since the last call of reset_peak_rss(), on other OS it's the peak since the start of the process.
+
+        Returns:
+            - peak_rss_mb (float): Peak RSS of this process in MB (None if not available)
+            - peak_rss_children_mb (float): Peak RSS of the largest child process in MB (None if not available)
+    """
+    peak_rss_mb = None
+    peak_rss_children_mb = None
+
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    peak_rss_mb = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    if resource != None:
+        # ru_maxrss is in bytes on macOS and in kB on Linux
+        unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+        if peak_rss_mb == None:
+            peak_rss_mb = resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss / unit
+        peak_rss_children_mb = resource.getrusage(
+            resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    elif psutil != None and peak_rss_mb == None:
+        # peak working set on Windows
+        peak_rss_mb = getattr(psutil.Process().memory_info(),
+                              "peak_wset", 0) / (1024 * 1024)
+
+    return peak_rss_mb, peak_rss_children_mb
+
+
+class PreparationMetrics():
+    """
+        Class to determine metrics for each step of the data preparation of a measurement.
+
+        Usage:
+            Call start_step() at the start of each step, which also stops the previous step. Call stop_step() after the last step
+            and save() to store the report as data_preparation_metrics.json (next to data_preparation.log).
+
+        Data:
+            For each step the wall time, the CPU time of this process and of finished child processes, the number of files read, written,
+            deleted and renamed, the bytes read and written and the peak RSS are stored in self.steps.
+            Files and bytes of worker processes are only included if they were reported by add_worker_counters().
+            Files and bytes of threads which were excluded by exclude_current_thread_from_counting() are not included.
+    """
+
+    def __init__(self, measurement_path):
+        """
+            Init method which installs the counter for file operations.
+
+            Parameters:
+                - measurement_path (str): Path to the measurement (only stored for information)
+        """
+        self.measurement_path = measurement_path
+        self.steps = {}
+        self.current_step = None
+
+        install_file_operation_counter()
+
+    def start_step(self, step_name):
+        """
+            Method to start the measurement of the metrics for a step. A running step is stopped before.
+
+            Parameters:
+                - step_name (str): Name of the step
+        """
+        self.stop_step()
+
+        set_counting_enabled(False)
+        reset_peak_rss()
+        self.current_step = step_name
+        self.start_counters = get_process_counters()
+        set_counting_enabled(True)
+        children_times = os.times()
+        self.start_children_cpu_time = children_times.children_user + \
+            children_times.children_system
+        self.start_cpu_time = time.process_time()
+        self.start_wall_time = time.perf_counter()
+
+    def stop_step(self):
+        """
+            Method to stop the measurement of the metrics for the running step (nothing happens if no step is running).
+        """
+        if self.current_step == None:
+            return
+
+        wall_time = time.perf_counter() - self.start_wall_time
+        cpu_time = time.process_time() - self.start_cpu_time
+        set_counting_enabled(False)
+        children_times = os.times()
+        children_cpu_time = children_times.children_user + \
+            children_times.children_system - self.start_children_cpu_time
+        counters = get_counter_difference(
+            self.start_counters, get_process_counters())
+        peak_rss_mb, peak_rss_children_mb = get_peak_rss_mb()
+        set_counting_enabled(True)
+
+        self.steps[self.current_step] = {"wall_time_s": wall_time,
+                                         "cpu_time_s": cpu_time,
+                                         "cpu_time_children_s": children_cpu_time,
+                                         **counters,
+                                         "peak_rss_mb": peak_rss_mb,
+                                         "peak_rss_children_mb": peak_rss_children_mb}
+        self.current_step = None
+
+    def get_report(self):
+        """
+            Method to get the report with the metrics of all steps and the total over all steps.
+
+            Returns:
+                - (dict): Dict containing the measurement path, the metrics for each step and the total
+        """
+        return {"measurement_path": self.measurement_path,
+                "steps": self.steps,
+                "total": sum_metrics(self.steps.values())}
+
+    def save(self, dir_path):
+        """
+            Method to store the report as data_preparation_metrics.json in dir_path.
+
+            Parameters:
+                - dir_path (str): Path to dir where the report shall be stored
+        """
+        with open(os.path.join(dir_path, METRICS_FILENAME), "w") as f:
+            json.dump(self.get_report(), f, indent=3)
+
+
+def sum_metrics(metrics_list):
+    """
+        Function to sum up the metrics of multiple steps or measurements, where the maximum is taken for the peak RSS.
+
+        Parameters:
+            - metrics_list (list): List of dicts with metrics (see PreparationMetrics.stop_step())
+
+        Returns:
+            - (dict): Dict with the summed up metrics (None for counters which are not available for all entries)
+    """
+    total = {}
+    for metrics in metrics_list:
+        for name, value in metrics.items():
+            if name not in total:
+                total[name] = value
+            elif value == None or total[name] == None:
+                total[name] = None
+            elif "peak_rss" in name:
+                total[name] = max(total[name], value)
+            else:
+                total[name] += value
+
+    return total
+
+
+def aggregate_preparation_metrics(result_dir, measurement_names):
+    """
+        Function to aggregate the reports of multiple prepared measurements in result_dir and store the summary as data_preparation_metrics_summary.json in result_dir.
+        Wall and CPU times are summed up over all measurements, thus the wall time is larger than the real duration if measurements were prepared in parallel.
+
+        Parameters:
+            - result_dir (str): Path to dir where the prepared measurements are stored (one sub dir for each measurement)
+            - measurement_names (list): List with names of the measurements whose reports shall be aggregated
+
+        Returns:
+            - (dict): Dict containing the total for each measurement, the sum for each step over all measurements and the total of all measurements
+    """
+    measurements = {}
+    steps = {}
+    for measurement_name in measurement_names:
+        report_path = os.path.join(
+            result_dir, measurement_name, METRICS_FILENAME)
+        if not os.path.exists(report_path):
+            continue
+
+        with open(report_path, "r") as f:
+            report = json.load(f)
+        measurements[measurement_name] = report["total"]
+        for step_name, metrics in report["steps"].items():
+            steps[step_name] = sum_metrics(
+                [steps[step_name], metrics]) if step_name in steps else metrics
+
+    summary = {"num_measurements": len(measurements),
+               "measurements": measurements,
+               "steps": steps,
+               "total": sum_metrics(measurements.values())}
+
+    with open(os.path.join(result_dir, METRICS_SUMMARY_FILENAME), "w") as f:
+        json.dump(summary, f, indent=3)
+
+    return summary
+
+
+if __name__ == "__main__":
+    metrics = PreparationMetrics("example")
+
+    metrics.start_step("write_files")
+    for i in range(10):
+        with open(f"metrics_example_{i}.txt", "w") as f:
+            f.write("x" * 1000)
+
+    metrics.start_step("rename_and_delete_files")
+    for i in range(10):
+        os.replace(f"metrics_example_{i}.txt", f"metrics_example_{i}.tmp")
+        os.remove(f"metrics_example_{i}.tmp")
+    metrics.stop_step()
+
+    print(json.dumps(metrics.get_report(), indent=3))
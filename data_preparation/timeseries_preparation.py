@@ -1,14 +1,30 @@
+import gin
 import numpy as np
 import os
-import glob
+import sys
 from datetime import datetime, timedelta
 import logging
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
 
 # differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
 if __name__ == "__main__":
-    from timestamp_evaluation import get_timestamp_from_timestamp_string, get_earliest_timestamp_from_IMU, get_data_from_info_json_for_timestamp_evaluation
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from custom_utils.csv_io import read_csv_data, write_csv_data, read_csv_chunk
+    from custom_utils.window_io import get_window_file_extension, read_window, read_windows, write_window, write_stacked_windows, get_stack_names, WindowReader
+    from timestamp_evaluation import get_timestamp_from_timestamp_string, get_earliest_timestamp_from_IMU, get_data_from_info_json_for_timestamp_evaluation, WINDOW_INTERVAL_MS
+    from measurement_index import MeasurementIndex
+    from timeseries_resampling import get_sample_period_ms, resample_timeseries_data
 else:
-    from data_preparation.timestamp_evaluation import get_timestamp_from_timestamp_string, get_earliest_timestamp_from_IMU, get_data_from_info_json_for_timestamp_evaluation
+    from custom_utils.csv_io import read_csv_data, write_csv_data, read_csv_chunk
+    from custom_utils.window_io import get_window_file_extension, read_window, read_windows, write_window, write_stacked_windows, get_stack_names, WindowReader
+    from data_preparation.timestamp_evaluation import get_timestamp_from_timestamp_string, get_earliest_timestamp_from_IMU, get_data_from_info_json_for_timestamp_evaluation, WINDOW_INTERVAL_MS
+    from data_preparation.measurement_index import MeasurementIndex
+    from data_preparation.timeseries_resampling import get_sample_period_ms, resample_timeseries_data
+
+# sampling rate of the IMU data after downsampling in Hz
+IMU_SAMPLING_RATE = 50
 
 
 class TimeseriesDownsamplingForWholeMeasurement():
@@ -26,33 +42,85 @@ class TimeseriesDownsamplingForWholeMeasurement():
             Provide the path to the measurement dir as a parameter when creating the object.
             Call the method TimeseriesDownsamplingForWholeMeasurement.start_downsampling() afterwards to start the downsampling process.
             As a result all timeseries/ IMU data in the measurement dir will be overwritten with the downsampled data.
+            If chunk_size is provided, the files are processed chunk by chunk (streaming), so that the memory usage doesn't depend on the length of the files.
+            In this case a run of identical values which is split across two files is downsampled as a single run and stored in the later file.
     """
 
-    def __init__(self, measurement_path):
+    def __init__(self, measurement_path, measurement_index=None, chunk_size=None):
         """
             Init method stores measurement_path in a member an creates member list of sensors usable for downsampling.
 
             Parameters:
                 - measurement_path (str): Path to the measurement to which downsampling shall be applied
+                - measurement_index (MeasurementIndex): Default = None. Index of measurement_path, will be created when downsampling is started if None
+                - chunk_size (int): Default = None. Number of rows of each sensor which are processed at once (None = whole files are processed at once)
         """
         self.measurement_path = measurement_path
+        self.measurement_index = measurement_index
+        self.chunk_size = chunk_size
 
         # checking about how to downsample must only be done for one array with noisy measurement and can be applied to all others
         # list of sensors which are ok for this check (determined by checking max counter for a measurement)
         self.sensors_for_downsampling = ["accelerometer",
                                          "bodyHeight", "gyroscope", "velocity", "yawSpeed"]
 
-    def start_downsampling(self):
+    def start_downsampling(self, keep_downsampled_data=False):
         """
             Public method to start downsampling process for all timeseries data in self.measurement_path.
             Execution will be aborted by a Exception in case no timeseries data could be found in self.measurement_path.
+
+            Parameters:
+                - keep_downsampled_data (bool): Default = False. If True, the files are not overwritten and the downsampled data of the whole measurement is returned instead,
+                                                so that it doesn't need to be loaded again (e.g. for create_sliding_windows_for_all_sensors_and_save_them())
+
+            Returns:
+                - (dict): Dict containing the downsampled data of the whole measurement for each sensor in self.timeseries_sensors (None if keep_downsampled_data is False)
+        """
+        if self.measurement_index == None:
+            self.measurement_index = MeasurementIndex(self.measurement_path)
+        self.find_timeseries_sensors(self.measurement_index.sensors)
+
+        if self.chunk_size != None:
+            if keep_downsampled_data:
+                raise Exception(
+                    "Downsampled data can't be kept in memory for downsampling chunk by chunk")
+            self.__start_streaming_downsampling()
+            return None
+
+        # execute downsampling for all files
+        downsampled_data_of_files = {
+            sensor: [] for sensor in self.timeseries_sensors}
+        for file in self.measurement_index.get_filenames(self.timeseries_sensors[0]):
+            logging.info(f"\nStart downsampling for file '{file}'")
+            downsampled_data_dict = self.__start_downsampling_for_all_sensors_by_filename(
+                file, keep_downsampled_data)
+            if keep_downsampled_data:
+                for sensor in self.timeseries_sensors:
+                    downsampled_data_of_files[sensor].append(
+                        downsampled_data_dict[sensor])
+
+        if not keep_downsampled_data:
+            return None
+        return {sensor: concatenate_data(data_of_files) for sensor, data_of_files in downsampled_data_of_files.items()}
+
+    def find_timeseries_sensors(self, sensor_dirs=None):
+        """
+            Public method to store all timeseries sensors present in self.measurement_path in self.timeseries_sensors.
+            Execution will be aborted by a Exception in case no timeseries data could be found in self.measurement_path.
+
+            Parameters:
+                - sensor_dirs (list): Default = None. List of all sensor dirs of the measurement, if they shall not be taken from self.measurement_path (e.g. for a .zip file)
         """
         self.timeseries_sensors = []
-        # check for present timeseries measurement dirs in measurement directory
-        for root, dirs, files in os.walk(self.measurement_path):
-            for dir in dirs:
-                if not "Cam" in dir:
-                    self.timeseries_sensors.append(dir)
+        if sensor_dirs != None:
+            self.timeseries_sensors = [
+                dir for dir in sensor_dirs if not "Cam" in dir]
+        else:
+            # check for present timeseries measurement dirs in measurement directory
+            for root, dirs, files in os.walk(self.measurement_path):
+                for dir in dirs:
+                    if not "Cam" in dir:
+                        self.timeseries_sensors.append(dir)
 
         if self.timeseries_sensors == []:
             raise Exception(
@@ -61,14 +129,7 @@ class TimeseriesDownsamplingForWholeMeasurement():
             logging.info(
                 f"downsampling will be done for the following sensors: {self.timeseries_sensors}")
 
-        # execute downsampling for all files
-        for root, dirs, files in os.walk(os.path.join(self.measurement_path, self.timeseries_sensors[0])):
-            files.sort()
-            for file in files:
-                logging.info(f"\nStart downsampling for file '{file}'")
-                self.__start_downsampling_for_all_sensors_by_filename(file)
-
-    def __start_downsampling_for_all_sensors_by_filename(self, filename):
+    def __start_downsampling_for_all_sensors_by_filename(self, filename, keep_downsampled_data=False):
         """
             Private method to start downsampling process for the file "filename" in all timeseries sensors dirs in self.measurement_path.
 
@@ -76,149 +137,246 @@ class TimeseriesDownsamplingForWholeMeasurement():
 
             Parameters:
                 - filename (str): Name of the file which the downsampling shall be applied to
-        """
-        # clear self.data_dict and self.downsampling_array for new downsampling
-        self.data_dict = {}
-        self.downsampling_array = None
+                - keep_downsampled_data (bool): Default = False. If True, the file is not overwritten with the downsampled data
 
-        # create new empty list in downsampled_data_dict for each sensor for new downsampling
-        self.downsampled_data_dict = {}
+            Returns:
+                - (dict): Dict containing the downsampled data of the file for each sensor in self.timeseries_sensors
+        """
+        # load data of all sensors
+        data_dict = {}
         for sensor in self.timeseries_sensors:
-            self.downsampled_data_dict[sensor] = []
+            data_dict[sensor] = read_csv_data(os.path.join(
+                self.measurement_path, sensor, filename))
 
-        self.__load_data_to_data_dict_and_downsampling_array(filename)
+        downsampled_data_dict = self.downsample_data_dict(data_dict, filename)
 
-        self.__perform_downsampling_for_all_sensors()
-
-        self.__overwriting_measurement_data_with_downsampled_data(filename)
+        if not keep_downsampled_data:
+            self.__overwriting_measurement_data_with_downsampled_data(filename)
+        return downsampled_data_dict
 
-    def __load_data_to_data_dict_and_downsampling_array(self, filename):
+    def downsample_data_dict(self, data_dict, filename):
         """
-            Private method to load the data of all sensors in self.timeseries_sensors present in in self.mesarument_path.
-            Additionally loads data of one fitting sensor listed in self.sensors_for_downsampling to self.downsampling_array which is used as a basis for the downsampling process.
+            Public method to perform downsampling for the already loaded data of a file for all sensors in self.timeseries_sensors without changing any files.
+            One fitting sensor listed in self.sensors_for_downsampling is used as a basis for the downsampling process.
             If no measurement of a fitting sensor is fount, execution will be aborted with an Exception.
 
             Parameters:
-                - filename (str): Name of the file which shall be loaded for all sensors
+                - data_dict (dict): Dict containing the data of the file for each sensor in self.timeseries_sensors
+                - filename (str): Name of the file the data was loaded from (for logging)
+
+            Returns:
+                - (dict): Dict containing the downsampled data for each sensor in self.timeseries_sensors
+        """
+        # clear self.downsampling_array for new downsampling
+        self.data_dict = data_dict
+        downsampling_sensor = self.__get_downsampling_sensor()
+        self.downsampling_array = self.data_dict[downsampling_sensor]
+        logging.info(
+            f"Using '{downsampling_sensor}' for downsampling of file '{filename}'")
+
+        # downsampled data of each sensor is stored in downsampled_data_dict by the new downsampling
+        self.downsampled_data_dict = {}
+
+        self.__perform_downsampling_for_all_sensors()
+
+        return {sensor: np.asarray(downsampled_data) for sensor, downsampled_data in self.downsampled_data_dict.items()}
+
+    def __get_downsampling_sensor(self):
         """
-        sensor_for_downsampling_found = False
+            Private method to get the sensor which is used as a basis for the downsampling process (first sensor of self.timeseries_sensors listed in self.sensors_for_downsampling).
+            If no fitting sensor is present, execution will be aborted with an Exception.
 
-        # load data to data_dict
+            Returns:
+                - (str): Name of the sensor
+        """
         for sensor in self.timeseries_sensors:
-            if sensor in self.sensors_for_downsampling and not sensor_for_downsampling_found:
-                # load data for first sensor from sensors_for_downsampling list also in downsampling_array
-                self.downsampling_array = np.genfromtxt(os.path.join(
-                    self.measurement_path, sensor, filename), delimiter=';')
-                self.data_dict[sensor] = self.downsampling_array
-                sensor_for_downsampling_found = True
-                logging.info(
-                    f"Using '{sensor}' for downsampling of file '{filename}'")
-            else:
-                self.data_dict[sensor] = np.genfromtxt(os.path.join(
-                    self.measurement_path, sensor, filename), delimiter=';')
+            if sensor in self.sensors_for_downsampling:
+                return sensor
 
         # stop execution if no proper sensor for downsampling is present in measurement
-        if not sensor_for_downsampling_found:
-            raise Exception(
-                f"No fitting sensor for proper downsampling found for measurement '{self.measurement_path}' with sensors '{self.timeseries_sensors}'")
+        raise Exception(
+            f"No fitting sensor for proper downsampling found for measurement '{self.measurement_path}' with sensors '{self.timeseries_sensors}'")
 
     def __perform_downsampling_for_all_sensors(self):
         """
             Private method to perform the downsampling process for the data present in self.data_dict based on the data present in self.downsampling_array.
+            The runs of subsequent identical values in self.downsampling_array are determined at once and the downsampled data of all sensors
+            is created by repeating the index of the first value of each run for the downsampled number of occurrences.
             Methods also prints some details about the downsampling process after it's finished.
         """
-        # initialize local variables
-        last_checked_value = None
-        max_occurrences = 0
+        # only one value needed for comparison for 2D or higher
+        if np.ndim(self.downsampling_array) == 1:
+            reference_values = self.downsampling_array
+        else:
+            reference_values = self.downsampling_array[:, 0]
+
+        run_start_indices, num_subsequent_occurrences = get_runs_of_subsequent_values(
+            reference_values)
         self.even_counter = 0
         self.odd_counter = 0
+        self.max_occurrences = 0
+        self.__count_runs(num_subsequent_occurrences)
 
-        array_length = np.shape(self.downsampling_array)[0]
-
-        for index in range(array_length):
-            # store value to check next (try catch to support all kinds of arrays (1D, 2D, ...))
-            try:
-                # only one value needed for comparison for 2D or higher
-                current_value = self.downsampling_array[index][0]
-            except IndexError:
-                current_value = self.downsampling_array[index]
-
-            if last_checked_value == current_value:
-                # if the last checked value is equal to the current value, the value was already counted and no further action for this iteration needed
-                pass
-            else:
-                # else the value was no checked yet
-                num_subsequent_occurrences = self.__count_subsequent_occurrences(
-                    array_length, index, current_value)
+        # indices of the raw data are identical for all sensors
+        downsampled_indices = get_downsampled_indices(
+            run_start_indices, num_subsequent_occurrences)
+        for sensor in self.timeseries_sensors:
+            self.downsampled_data_dict[sensor] = self.data_dict[sensor][downsampled_indices]
 
-                self.__perform_downsampling_step_for_all_sensors(
-                    index, num_subsequent_occurrences)
+        self.__log_downsampling_statistics()
 
-                # store last checked value to prevent counting same value multiple times
-                last_checked_value = current_value
-                if num_subsequent_occurrences > max_occurrences:
-                    max_occurrences = num_subsequent_occurrences
+    def __count_runs(self, num_subsequent_occurrences):
+        """
+            Private method to add the runs of subsequent identical values to the statistics about the downsampling process.
 
+            Parameters:
+                - num_subsequent_occurrences (np.array): Number of occurrences of each run
+        """
+        num_even = int(np.count_nonzero(num_subsequent_occurrences % 2 == 0))
+        self.even_counter += num_even
+        self.odd_counter += int(len(num_subsequent_occurrences) - num_even)
+        if len(num_subsequent_occurrences) > 0:
+            self.max_occurrences = max(
+                self.max_occurrences, int(np.max(num_subsequent_occurrences)))
+
+    def __log_downsampling_statistics(self):
+        """
+            Private method to log some details about the downsampling process after it's finished.
+        """
         # print info about max occurrences for plausibility check of downsampling
-        logging.info(f"Max occurrence of single value was '{max_occurrences}'")
         logging.info(
-            f"Amount of odd occurrences is {self.odd_counter} which corresponds to {(self.odd_counter*100)/(self.odd_counter+self.even_counter):.2f} %")
+            f"Max occurrence of single value was '{self.max_occurrences}'")
+        if self.odd_counter + self.even_counter > 0:
+            logging.info(
+                f"Amount of odd occurrences is {self.odd_counter} which corresponds to {(self.odd_counter*100)/(self.odd_counter+self.even_counter):.2f} %")
 
-    def __count_subsequent_occurrences(self, array_length, current_index, value_to_check):
+    def __start_streaming_downsampling(self):
+        """
+            Private method to perform the downsampling for all files in chunks of self.chunk_size rows, so that only one chunk of each sensor is in memory.
+            The downsampled data is written to a new file for each sensor, which replaces the file as soon as it's finished.
+            The run at the end of a chunk is kept as pending run, as it might continue in the next chunk or the next file.
         """
-            Private method to count the number of subsequent occurrences of value_to_check in self.downsampling_array starting at current_index.
+        downsampling_sensor = self.__get_downsampling_sensor()
+        logging.info(
+            f"Using '{downsampling_sensor}' for downsampling in chunks of {self.chunk_size} rows")
+
+        # pending run is stored as tuple (dict with first row of each sensor, value of downsampling sensor, number of occurrences so far)
+        self.pending_run = None
+        self.even_counter = 0
+        self.odd_counter = 0
+        self.max_occurrences = 0
+
+        filenames = self.measurement_index.get_filenames(downsampling_sensor)
+        for file_number, filename in enumerate(filenames):
+            logging.info(f"\nStart downsampling for file '{filename}'")
+            file_paths = {sensor: os.path.join(
+                self.measurement_path, sensor, filename) for sensor in self.timeseries_sensors}
+
+            with ExitStack() as stack:
+                files = {sensor: stack.enter_context(open(file_path, "r"))
+                         for sensor, file_path in file_paths.items()}
+                downsampled_files = {sensor: stack.enter_context(open(file_path + ".downsampled", "w"))
+                                     for sensor, file_path in file_paths.items()}
+
+                while True:
+                    chunk_dict = {sensor: read_csv_chunk(
+                        files[sensor], self.chunk_size) for sensor in self.timeseries_sensors}
+                    if np.shape(chunk_dict[downsampling_sensor])[0] == 0:
+                        break
+                    self.__downsample_chunk_and_write_it(
+                        chunk_dict, downsampling_sensor, downsampled_files)
+
+                # pending run is only kept if it continues in the next file
+                if self.pending_run != None:
+                    next_value = None
+                    if file_number + 1 < len(filenames):
+                        next_value = self.__get_first_value(os.path.join(
+                            self.measurement_path, downsampling_sensor, filenames[file_number + 1]))
+                    if next_value != self.pending_run[1]:
+                        self.__write_pending_run(downsampled_files)
+
+            # replace the old file at the end, as it might be a hardlink to the raw measurement which must not be modified
+            for sensor, file_path in file_paths.items():
+                os.replace(file_path + ".downsampled", file_path)
+                self.measurement_index.add_file(sensor, filename)
+
+        self.__log_downsampling_statistics()
+
+    def __downsample_chunk_and_write_it(self, chunk_dict, downsampling_sensor, downsampled_files):
+        """
+            Private method to downsample a chunk of all sensors and to append the downsampled data to the downsampled files.
 
             Parameters:
-                - array_length (int): Info about length of self.downsampling_array to calculate maximum number of values to check
-                - current_index (int): Index where counting shall start in self.downsampling_array
-                - value_to_check (int): Value whose number of occurrence shall determined
+                - chunk_dict (dict): Dict containing the rows of the chunk as 2D array for each sensor in self.timeseries_sensors
+                - downsampling_sensor (str): Name of the sensor which is used as a basis for the downsampling process
+                - downsampled_files (dict): Dict containing the opened downsampled file for each sensor in self.timeseries_sensors
+        """
+        reference_values = chunk_dict[downsampling_sensor][:, 0]
+        run_start_indices, num_subsequent_occurrences = get_runs_of_subsequent_values(
+            reference_values)
+
+        if self.pending_run != None:
+            first_row_dict, value, num_occurrences = self.pending_run
+            if reference_values[0] == value:
+                # pending run continues in this chunk
+                self.pending_run = (first_row_dict, value,
+                                    num_occurrences + num_subsequent_occurrences[0])
+                run_start_indices = run_start_indices[1:]
+                num_subsequent_occurrences = num_subsequent_occurrences[1:]
+                if len(run_start_indices) == 0:
+                    return
+            self.__write_pending_run(downsampled_files)
+
+        # last run of the chunk might continue in the next chunk
+        last_run_start_index = run_start_indices[-1]
+        self.pending_run = ({sensor: np.array(chunk_dict[sensor][last_run_start_index:last_run_start_index+1]) for sensor in self.timeseries_sensors},
+                            reference_values[last_run_start_index], num_subsequent_occurrences[-1])
+
+        self.__write_runs(downsampled_files, chunk_dict,
+                          run_start_indices[:-1], num_subsequent_occurrences[:-1])
+
+    def __write_pending_run(self, downsampled_files):
+        """
+            Private method to downsample the pending run and to append it to the downsampled files.
 
-            Returns:
-                - occurrence_counter (int): Number of subsequent occurrences of value_to_check
+            Parameters:
+                - downsampled_files (dict): Dict containing the opened downsampled file for each sensor in self.timeseries_sensors
         """
-        occurrence_counter = 0
-        # inner loop to count count how often value occurs
-        for counting_index in range(array_length - current_index):
-            # get next value for comparison (try catch to support all kinds of arrays (1D, 2D, ...))
-            try:
-                comparison_value = self.downsampling_array[current_index +
-                                                           counting_index][0]  # only one value needed for comparison for 2D or higher
-            except IndexError:
-                comparison_value = self.downsampling_array[current_index +
-                                                           counting_index]
-
-            # count subsequent occurrences of value to check
-            if value_to_check == comparison_value:
-                occurrence_counter += 1
-            else:
-                # stop counting when if statement is not met for the first time
-                break
-
-        return occurrence_counter
-
-    def __perform_downsampling_step_for_all_sensors(self, raw_data_index, num_subsequent_occurrences):
+        first_row_dict, _, num_occurrences = self.pending_run
+        self.pending_run = None
+        self.__write_runs(downsampled_files, first_row_dict,
+                          np.array([0]), np.array([num_occurrences]))
+
+    def __write_runs(self, downsampled_files, data_dict, run_start_indices, num_subsequent_occurrences):
         """
-            Private method to perform downsampling step for all sensors at raw_data_index based on value of num_subsequent_occurrences.
+            Private method to downsample complete runs of data_dict and to append them to the downsampled files.
 
             Parameters:
-                - raw_data_index (int): Index where downsampling shall be performed for all arrays in self.data_dict
-                - num_subsequent_occurrences (int): Number of occurrences of the value at raw_data_index which determines number of occurrences for downsampled data
+                - downsampled_files (dict): Dict containing the opened downsampled file for each sensor in self.timeseries_sensors
+                - data_dict (dict): Dict containing the data as 2D array for each sensor in self.timeseries_sensors
+                - run_start_indices (np.array): Index of the first value of each run in data_dict
+                - num_subsequent_occurrences (np.array): Number of occurrences of each run
         """
-        num_downsampled_occurrences = 0
-        # calculate number of downsampled occurences
-        if (num_subsequent_occurrences % 2) == 0:
-            num_downsampled_occurrences = int(num_subsequent_occurrences / 2)
-            self.even_counter += 1
-        else:
-            num_downsampled_occurrences = int(
-                num_subsequent_occurrences / 2) + (num_subsequent_occurrences % 2)
-            self.odd_counter += 1
+        self.__count_runs(num_subsequent_occurrences)
+        downsampled_indices = get_downsampled_indices(
+            run_start_indices, num_subsequent_occurrences)
+        for sensor in self.timeseries_sensors:
+            write_csv_data(downsampled_files[sensor],
+                           data_dict[sensor][downsampled_indices])
+
+    def __get_first_value(self, file_path):
+        """
+            Private method to get the first value of a file of the downsampling sensor.
 
-        # append value for downsampled amount of times for each sensor
-        for _ in range(num_downsampled_occurrences):
-            for sensor in self.timeseries_sensors:
-                self.downsampled_data_dict[sensor].append(
-                    self.data_dict[sensor][raw_data_index])
+            Parameters:
+                - file_path (str): Path to the file
+
+            Returns:
+                - (float): First value of the file (None if the file is empty)
+        """
+        with open(file_path, "r") as f:
+            first_row = read_csv_chunk(f, 1)
+        return first_row[0, 0] if np.shape(first_row)[0] > 0 else None
 
     def __overwriting_measurement_data_with_downsampled_data(self, filename):
         """
@@ -230,11 +388,55 @@ class TimeseriesDownsamplingForWholeMeasurement():
         for sensor in self.timeseries_sensors:
             array_for_storing = np.asarray(
                 self.downsampled_data_dict[sensor])
-            np.savetxt(os.path.join(
-                self.measurement_path, sensor, filename), array_for_storing, delimiter=";")
+            # remove old file first, as it might be a hardlink to the raw measurement which must not be modified
+            file_path = os.path.join(self.measurement_path, sensor, filename)
+            os.remove(file_path)
+            write_csv_data(file_path, array_for_storing)
+            self.measurement_index.add_file(sensor, filename)
 
 
-def remove_obsolete_values(measurement_path, sensor_name, reference_timestamp):
+def get_runs_of_subsequent_values(reference_values):
+    """
+        Function to determine the runs of subsequent identical values, which are the basis for the downsampling.
+
+        Parameters:
+            - reference_values (np.array): 1D array with the values of one channel
+
+        Returns:
+            - (np.array): Index of the first value of each run
+            - (np.array): Number of occurrences of each run (0 for NaN, as NaN is never counted and thus removed by the downsampling)
+    """
+    array_length = np.shape(reference_values)[0]
+
+    # a new run starts at each value which differs from its predecessor (NaN differs from all values, even from NaN)
+    is_run_start = np.ones(array_length, dtype=bool)
+    is_run_start[1:] = reference_values[1:] != reference_values[:-1]
+    run_start_indices = np.flatnonzero(is_run_start)
+    num_subsequent_occurrences = np.diff(
+        np.append(run_start_indices, array_length))
+    # NaN isn't equal to itself, thus it's never counted and removed by the downsampling
+    run_start_values = reference_values[run_start_indices]
+    num_subsequent_occurrences[run_start_values != run_start_values] = 0
+
+    return run_start_indices, num_subsequent_occurrences
+
+
+def get_downsampled_indices(run_start_indices, num_subsequent_occurrences):
+    """
+        Function to get the indices of the data which remain after the downsampling of the runs.
+        Single occurring values are kept and double occurring values are reduced to a single value (odd number of occurrences is rounded up).
+
+        Parameters:
+            - run_start_indices (np.array): Index of the first value of each run
+            - num_subsequent_occurrences (np.array): Number of occurrences of each run
+
+        Returns:
+            - (np.array): Indices of the downsampled data (identical for all sensors)
+    """
+    return np.repeat(run_start_indices, (num_subsequent_occurrences + 1) // 2)
+
+
+def remove_obsolete_values(measurement_path, sensor_name, reference_timestamp, measurement_index=None, sampling_rate=50):
     """
         Function to remove data points in the first measurement of sensor_name in measurement_path which are before reference_timestamp.
         NOTE: Must be called after downsampling was performed!!!
@@ -245,16 +447,18 @@ def remove_obsolete_values(measurement_path, sensor_name, reference_timestamp):
             - measurement_path (str): Path to the measurement
             - sensor_name (str): Name of the sensor to perform the function for
             - reference_timestamp (datetime.datetime): Timestamp to use as reference for data removal
+            - measurement_index (MeasurementIndex): Default = None. Index of measurement_path, will be created if None
+            - sampling_rate (float): Default = 50. Sampling rate of the IMU data in Hz
     """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+
     # extract measurement date from reference_timestamp for get_timestamp_from_timestamp_string()
     measurement_date = datetime(year=reference_timestamp.year,
                                 month=reference_timestamp.month, day=reference_timestamp.day)
 
     # get filename of first file in the dir
-    glob_pattern = os.path.join(measurement_path, sensor_name, "*.csv")
-    files = glob.glob(glob_pattern)
-    files.sort()
-    first_filename = files[0].split(os.sep)[-1]
+    first_filename = measurement_index.get_filenames(sensor_name)[0]
 
     # extract timestamp string from filename and convert it to datetime object
     earliest_timestamp_string = first_filename[:-4]
@@ -266,13 +470,46 @@ def remove_obsolete_values(measurement_path, sensor_name, reference_timestamp):
             f"Reference timestamp is before earliest available timestamp. Thus execution will be aborted.")
 
     # load data from earliest measurement
-    filename = os.path.join(measurement_path, sensor_name, first_filename)
-    data = np.genfromtxt(filename, delimiter=';')
+    data = read_window(measurement_index.get_file_path(
+        sensor_name, first_filename))
+
+    data = remove_obsolete_values_from_data(
+        data, sensor_name, earliest_timestamp, reference_timestamp, sampling_rate)
+
+    if data is not None:
+        # store data corrected timestamp as name (file extension is kept, as the file might already be a window)
+        new_filename = datetime.strftime(
+            reference_timestamp, "%H_%M_%S_%f")[:-3] + first_filename[-4:]
+        # a complete window with this timestamp is kept instead of being replaced by the shortened first window
+        if not measurement_index.contains(sensor_name, new_filename):
+            write_window(measurement_index.get_file_path(
+                sensor_name, new_filename), data)
+            measurement_index.add_file(sensor_name, new_filename)
+
+        # delete old file (only if it was not overwritten by the new file)
+        if new_filename != first_filename:
+            measurement_index.delete_file(sensor_name, first_filename)
+
+
+def remove_obsolete_values_from_data(data, sensor_name, earliest_timestamp, reference_timestamp, sampling_rate=50):
+    """
+        Function to remove data points from data of the first measurement of sensor_name which are before reference_timestamp.
+        Execution will be aborted when reference_timestamp is not located in data.
 
+        Parameters:
+            - data (np.array): Data of the first measurement of the sensor
+            - sensor_name (str): Name of the sensor (for logging)
+            - earliest_timestamp (datetime.datetime): Timestamp of data
+            - reference_timestamp (datetime.datetime): Timestamp to use as reference for data removal
+            - sampling_rate (float): Default = 50. Sampling rate of the IMU data in Hz
+
+        Returns:
+            - (np.array): Data without obsolete data points (None if no update is needed)
+    """
     # get time diff between timestamps
     time_diff = reference_timestamp - earliest_timestamp
     # calculate needed shift in file
-    shift = int(time_diff.microseconds / 20000)
+    shift = int(time_diff.microseconds / (get_sample_period_ms(sampling_rate) * 1000))
 
     if shift > np.shape(data)[0]:
         # shift is not within earliest measurement file, thus execution is aborted with an Exception
@@ -282,24 +519,20 @@ def remove_obsolete_values(measurement_path, sensor_name, reference_timestamp):
         # drop obsolete data when mandatory
         logging.info(
             f"Obsolete data for sensor '{sensor_name}' will be removed (first {shift} data points will be removed).")
-        data = data[shift:]
-
-        # store data corrected timestamp as name
-        np.savetxt(os.path.join(measurement_path, sensor_name, datetime.strftime(reference_timestamp, "%H_%M_%S_%f")[:-3] + ".csv"),
-                   data, delimiter=";")
-
-        # delete old file
-        os.remove(os.path.join(measurement_path, sensor_name, first_filename))
+        return data[shift:]
     else:
         logging.info(f"No update needed for sensor '{sensor_name}'")
+        return None
 
 
-def create_sliding_windows_and_save_them(measurement_path, earliest_timestamp, sensor_name, window_size, normalization=False):
+def create_sliding_windows_and_save_them(measurement_path, earliest_timestamp, sensor_name, window_size, normalization=False, measurement_index=None, window_format="csv", sampling_rate=50):
     """
         Function to create sliding windows of the whole measurement from sensor sensor_name in measurement_path.
-        Windows will have the size windows_size and will be shifted by stride.
+        Windows will have the size windows_size and will be shifted by stride (see get_window_stride()).
         The first windows will have the filename based on the timestamp earliest_timestamp.
-        All subsequent files will have filenames with the timestamp incremented with 20 ms * stride.
+        All subsequent files will have filenames with the timestamp incremented with 200 ms (see WINDOW_INTERVAL_MS).
+        The downsampled data is resampled to sampling_rate before the windows are created (see resample_IMU_data()).
+        Use create_sliding_windows_for_all_sensors_and_save_them() to create the windows of all sensors in one pass, if their data is already loaded.
         NOTE: Preprocessing must already be done!
 
         Parameters:
@@ -308,99 +541,320 @@ def create_sliding_windows_and_save_them(measurement_path, earliest_timestamp, s
             - sensor_name (str): Name of the sensor to perform the function for
             - window_size (int): Size of the windows to create
             - normalization (bool): Select whether to apply normalization (Z Score normalization)
+            - measurement_index (MeasurementIndex): Default = None. Index of measurement_path, will be created if None
+            - window_format (str): Default = "csv". Format of the windows (see custom_utils.window_io.WINDOW_FORMATS)
+                                   For "stacked" the windows are stored as .npy files, which are stacked by stack_windows_and_save_them() at the end of the preparation.
+            - sampling_rate (float): Default = 50. Sampling rate of the windows in Hz
     """
-    # don't change the stride, as the whole logic expects a window each 200 ms (as this is the capturing rate of the cameras)
-    stride = 10
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
 
     # load data
     delete_source = True  # enable removal of old data to prevent conflict with filenames
     raw_data = load_complete_IMU_measurement(
-        measurement_path, sensor_name, delete_source)
-    number_data_points = np.shape(raw_data)[0]
-
-    # perform normalization if wanted
-    if normalization:
-        mean = np.mean(raw_data, axis=0)
-        std = np.std(raw_data, axis=0)
-
-        # check whether normalization is possible (prevent division by zero)
-        # if std < 0.00001 normalized data will be very large numbers, thus no normalization should be done in this case
-        mask = std > 0.00001
-        if len(np.shape(raw_data)) > 1:
-            normalization_possible = not False in mask
-        else:
-            normalization_possible = mask
+        measurement_path, sensor_name, delete_source, measurement_index=measurement_index)
 
-        if normalization_possible:
-            normalized_data = (raw_data - np.mean(raw_data,
-                               axis=0)) / np.std(raw_data, axis=0)
-        else:
-            normalized_data = raw_data
-            logging.info(
-                f"No normalization was done for {sensor_name} as this would result in NaN values!")
+    data_dict = resample_IMU_data({sensor_name: raw_data}, sampling_rate)
+
+    create_sliding_windows_for_all_sensors_and_save_them(measurement_path, earliest_timestamp, data_dict, window_size, normalization,
+                                                         measurement_index=measurement_index, window_format=window_format, num_workers=1, sampling_rate=sampling_rate)
+
+
+@gin.configurable
+def create_sliding_windows_for_all_sensors_and_save_them(measurement_path, earliest_timestamp, data_dict, window_size, normalization=False, measurement_index=None, window_format="csv", num_workers=1, sampling_rate=50):
+    """
+        Function to create sliding windows of the whole measurement for all sensors in data_dict in one pass and save them (see create_sliding_windows_and_save_them()).
+        All existing data files of the sensors are deleted before the windows are saved, as the windows replace the data they were created from.
+        NOTE: Preprocessing must already be done!
+
+        Parameters:
+            - measurement_path (str): Path to the measurement
+            - earliest_timestamp (datetime.datetime): Timestamp for filename creation
+            - data_dict (dict): Dict containing the data of the whole measurement for each sensor (e.g. from TimeseriesDownsamplingForWholeMeasurement.start_downsampling())
+            - window_size (int): Size of the windows to create
+            - normalization (bool): Select whether to apply normalization (Z Score normalization)
+            - measurement_index (MeasurementIndex): Default = None. Index of measurement_path, will be created if None
+            - window_format (str): Default = "csv". Format of the windows (see custom_utils.window_io.WINDOW_FORMATS)
+            - num_workers (int): Default = 1. Number of threads which save the windows of different sensors in parallel (1 -> no separate thread will be used)
+                                 Writing .csv files is mostly limited by Python itself, thus more threads mainly pay off for the other formats or slow storage.
+            - sampling_rate (float): Default = 50. Sampling rate of the data in data_dict in Hz (see resample_IMU_data())
+    """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+    window_file_extension = get_window_file_extension(window_format)
+
+    windows_dict = create_sliding_windows_for_all_sensors(
+        data_dict, earliest_timestamp, window_size, normalization, sampling_rate)
+
+    def save_windows(sensor_name):
+        # remove old data first to prevent conflicts with the filenames of the windows
+        for filename in measurement_index.get_filenames(sensor_name):
+            measurement_index.delete_file(sensor_name, filename)
+
+        for window_timestamp_string, window in windows_dict[sensor_name]:
+            new_filename = window_timestamp_string + window_file_extension
+            write_window(measurement_index.get_file_path(
+                sensor_name, new_filename), window)
+            measurement_index.add_file(sensor_name, new_filename)
+
+    if num_workers == 1 or len(windows_dict) <= 1:
+        for sensor_name in windows_dict:
+            save_windows(sensor_name)
     else:
-        normalized_data = raw_data
-
-    # loop for creating the windows
-    for i in range(0, number_data_points, stride):
-        # extract window from data array
-        if len(np.shape(normalized_data)) == 1:
-            # extract window for 1D case
-            window = normalized_data[i:i+window_size]
-        else:
-            # extract window for 2D case
-            window = normalized_data[i:i+window_size, :]
+        with ThreadPoolExecutor(max_workers=min(num_workers, len(windows_dict))) as executor:
+            # list() is needed to raise exceptions of the threads
+            list(executor.map(save_windows, windows_dict))
+
+
+def create_sliding_windows(raw_data, earliest_timestamp, sensor_name, window_size, normalization=False, sampling_rate=50):
+    """
+        Function to create sliding windows of the whole measurement of a sensor without writing any files.
+        See create_sliding_windows_and_save_them() for details.
+
+        Parameters:
+            - raw_data (np.array): Data of the whole measurement of the sensor
+            - earliest_timestamp (datetime.datetime): Timestamp for filename creation
+            - sensor_name (str): Name of the sensor (for logging)
+            - window_size (int): Size of the windows to create
+            - normalization (bool): Select whether to apply normalization (Z Score normalization)
+            - sampling_rate (float): Default = 50. Sampling rate of raw_data in Hz
+
+        Returns:
+            - windows (list): List of tuples (timestamp string, window) for all windows
+    """
+    return create_sliding_windows_for_all_sensors({sensor_name: raw_data}, earliest_timestamp, window_size, normalization, sampling_rate)[sensor_name]
+
+
+def create_sliding_windows_for_all_sensors(data_dict, earliest_timestamp, window_size, normalization=False, sampling_rate=50):
+    """
+        Function to create sliding windows of the whole measurement for all sensors without writing any files.
+        All sensors share the same timestamps after downsampling, thus the start indices and timestamp strings of the windows are only determined once.
+
+        Parameters:
+            - data_dict (dict): Dict containing the data of the whole measurement for each sensor
+            - earliest_timestamp (datetime.datetime): Timestamp for filename creation
+            - window_size (int): Size of the windows to create
+            - normalization (bool): Select whether to apply normalization (Z Score normalization)
+            - sampling_rate (float): Default = 50. Sampling rate of the data in data_dict in Hz
+
+        Returns:
+            - windows_dict (dict): Dict containing a list of tuples (timestamp string, window) for all windows of each sensor
+    """
+    max_number_data_points = max([np.shape(raw_data)[0]
+                                 for raw_data in data_dict.values()], default=0)
+    window_grid = get_sliding_window_grid(
+        max_number_data_points, earliest_timestamp, window_size, sampling_rate)
 
-        # stop window creation, if the window is too small (due to not enough data left)
-        if np.shape(window)[0] != window_size:
-            break
+    windows_dict = {}
+    for sensor_name, raw_data in data_dict.items():
+        normalized_data = normalize_data(
+            raw_data, sensor_name) if normalization else raw_data
+        # sensor with less data gets only the windows which fit completely into its data
+        number_data_points = np.shape(raw_data)[0]
+        windows_dict[sensor_name] = [(window_timestamp_string, normalized_data[start_index:start_index+window_size])
+                                     for start_index, window_timestamp_string in window_grid
+                                     if start_index + window_size <= number_data_points]
+
+    return windows_dict
+
+
+def get_sliding_window_grid(number_data_points, earliest_timestamp, window_size, sampling_rate=50):
+    """
+        Function to get the start index and the timestamp string of all windows which fit completely into number_data_points.
+
+        Parameters:
+            - number_data_points (int): Number of data points of the whole measurement
+            - earliest_timestamp (datetime.datetime): Timestamp of the first data point
+            - window_size (int): Size of the windows to create
+            - sampling_rate (float): Default = 50. Sampling rate of the data in Hz
 
-        # calculate timestamp for window
+        Returns:
+            - (list): List of tuples (start index, timestamp string) for all windows
+    """
+    sample_period_ms = get_sample_period_ms(sampling_rate)
+    window_grid = []
+    check_window_size(window_size, sampling_rate)
+    for start_index in range(0, number_data_points - window_size + 1, get_window_stride(sampling_rate)):
         # window has timestamp of the last value in the window
-        # => current window starts at i after earliest timestamp and last value is window_size afterwards
+        # => current window starts at start_index after earliest timestamp and last value is window_size afterwards
         new_timestamp = earliest_timestamp + \
-            timedelta(milliseconds=(window_size + i)*20)
+            timedelta(milliseconds=(window_size + start_index)
+                      * sample_period_ms)
+        window_grid.append(
+            (start_index, datetime.strftime(new_timestamp, "%H_%M_%S_%f")[:-3]))
 
-        # save new window
-        new_filename = os.path.join(measurement_path, sensor_name, datetime.strftime(
-            new_timestamp, "%H_%M_%S_%f")[:-3] + ".csv")
-        np.savetxt(new_filename, window, delimiter=";")
+    return window_grid
 
 
-def load_complete_IMU_measurement(measurement_path, sensor, delete_source=False, load_from_sliding_window=False):
+def get_window_stride(sampling_rate=50):
+    """
+        Function to get the stride between two windows, so that a window is created each 200 ms (see WINDOW_INTERVAL_MS).
+        The sample period must be an integer number of ms which divides 200 ms, so that all window timestamps are exact ms on the grid of the cameras
+        (possible sampling rates: 5, 10, 20, 25, 40, 50, 100, 125, 200, 250, 500 and 1000 Hz).
+
+        Parameters:
+            - sampling_rate (float): Default = 50. Sampling rate of the data in Hz
+
+        Returns:
+            - (int): Number of data points between the start of two subsequent windows
+    """
+    sample_period_ms = get_sample_period_ms(sampling_rate)
+    if abs(sample_period_ms - round(sample_period_ms)) > 1e-9 or WINDOW_INTERVAL_MS % round(sample_period_ms) != 0:
+        raise Exception(
+            f"Sampling rate of {sampling_rate} Hz results in a sample period of {sample_period_ms:g} ms, which is no integer number of ms dividing {WINDOW_INTERVAL_MS} ms (e.g. select 25, 50 or 100 Hz)")
+    return WINDOW_INTERVAL_MS // round(sample_period_ms)
+
+
+def check_window_size(window_size, sampling_rate=50):
+    """
+        Function to check that the windows span a multiple of 200 ms (see WINDOW_INTERVAL_MS).
+        Windows are named by the timestamp after their last data point, thus only in this case the windows are on the grid of the synchronized timestamps
+        (e.g. window_size = 50 for 50 Hz and window_size = 100 for 100 Hz to get windows of 1 s).
+
+        Parameters:
+            - window_size (int): Size of the windows (number of data points)
+            - sampling_rate (float): Default = 50. Sampling rate of the data in Hz
+    """
+    stride = get_window_stride(sampling_rate)
+    if window_size < 1 or window_size % stride != 0:
+        raise Exception(
+            f"Window size of {window_size} data points at {sampling_rate} Hz spans {window_size * WINDOW_INTERVAL_MS / stride:g} ms, which is no multiple of {WINDOW_INTERVAL_MS} ms (select a multiple of {stride} data points)")
+
+
+def resample_IMU_data(data_dict, sampling_rate=50):
+    """
+        Function to resample the downsampled data of all sensors in data_dict from IMU_SAMPLING_RATE to sampling_rate (see resample_timeseries_data()).
+        The downsampled data points follow each other in the sample period of IMU_SAMPLING_RATE starting at the timestamp of the first file,
+        thus the first data point keeps its timestamp and the timestamps of the filenames stay valid.
+
+        Parameters:
+            - data_dict (dict): Dict containing the downsampled data of the whole measurement for each sensor
+            - sampling_rate (float): Default = 50. Sampling rate of the resampled data in Hz
+
+        Returns:
+            - (dict): Dict containing the resampled data of each sensor (data_dict if no resampling is needed)
+    """
+    if sampling_rate == IMU_SAMPLING_RATE:
+        return data_dict
+
+    max_number_data_points = max([np.shape(data)[0]
+                                 for data in data_dict.values()], default=0)
+    source_timestamps_ms = np.arange(
+        max_number_data_points) * get_sample_period_ms(IMU_SAMPLING_RATE)
+    return resample_timeseries_data(data_dict, source_timestamps_ms, sampling_rate)
+
+
+def normalize_data(raw_data, sensor_name):
+    """
+        Function to apply Z Score normalization to the data of the whole measurement of a sensor.
+
+        Parameters:
+            - raw_data (np.array): Data of the whole measurement of the sensor
+            - sensor_name (str): Name of the sensor (for logging)
+
+        Returns:
+            - (np.array): Normalized data (raw_data if normalization would result in NaN values)
+    """
+    mean = np.mean(raw_data, axis=0)
+    std = np.std(raw_data, axis=0)
+
+    # check whether normalization is possible (prevent division by zero)
+    # if std < 0.00001 normalized data will be very large numbers, thus no normalization should be done in this case
+    mask = std > 0.00001
+    if len(np.shape(raw_data)) > 1:
+        normalization_possible = not False in mask
+    else:
+        normalization_possible = mask
+
+    if normalization_possible:
+        return (raw_data - mean) / std
+
+    logging.info(
+        f"No normalization was done for {sensor_name} as this would result in NaN values!")
+    return raw_data
+
+
+def stack_windows_and_save_them(measurement_path, sensor_name, stack_name, measurement_index=None):
+    """
+        Function to replace all windows of sensor_name, which are stored as one file per window, by stacked windows (see custom_utils.window_io).
+        Needs to be done after all samples were removed which are not part of the prepared measurement, as stacked windows can't be deleted separately.
+
+        Parameters:
+            - measurement_path (str): Path to the measurement
+            - sensor_name (str): Name of the sensor to perform the function for
+            - stack_name (str): Name of the stacked windows (e.g. name of the measurement)
+            - measurement_index (MeasurementIndex): Default = None. Index of measurement_path, will be created if None
+    """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+
+    filenames = measurement_index.get_filenames(sensor_name)
+    windows = read_windows([measurement_index.get_file_path(
+        sensor_name, filename) for filename in filenames])
+    write_stacked_windows(os.path.join(measurement_path, sensor_name), stack_name,
+                          [filename[:-4] for filename in filenames], windows)
+
+    for filename in filenames:
+        measurement_index.delete_file(sensor_name, filename)
+    logging.info(
+        f"{len(filenames)} windows of sensor '{sensor_name}' were stacked")
+
+
+def load_complete_IMU_measurement(measurement_path, sensor, delete_source=False, load_from_sliding_window=False, measurement_index=None):
     """
         Function to load a complete IMU measurement for sensor from measurement_path in one array.
         In case the IMU dir contains more than 60 files, only the first part of the data of each file is taken,
         as it's expected that in this case the data preparation was already done and the data has to be extracted from the longer windows.
+        The files are read concurrently by custom_utils.window_io.read_windows() (see read_windows.num_workers and read_windows.memory_map in the gin config)
+        and the arrays of all files are concatenated, so that the result is only allocated once.
 
         Parameters:
             - measurement_path (str): Path to the measurement
             - sensor (str): Name of the sensor to load the data for
             - delete_source (bool): If True, the files will be deleted after data was loaded (default = False)
             - load_from_sliding_window (bool): If True, the only the first 10 data points will be taken to not load double data from sliding windows (default = False)
+                                               Stacked windows are only considered in this case (they are never deleted).
+            - measurement_index (MeasurementIndex): Default = None. Index of measurement_path, will be created if None
 
         Returns:
             - (np.array) Numpy array with data for sensor
     """
-    files_glob_pattern = os.path.join(measurement_path, sensor, "*.csv")
-    filename_list = glob.glob(files_glob_pattern)
-    filename_list.sort()
-
-    data_list = []
-    for file in filename_list:
-        if load_from_sliding_window:
-            # for many files in the dir the preparing was most likely already done, thus only part of data is needed
-            try:
-                data_list.extend(np.genfromtxt(file, delimiter=';')[:10, :])
-            except IndexError:
-                data_list.extend(np.genfromtxt(file, delimiter=';')[:10]) # happens in case data has only one channel (e.g. bodyHeight)
-        else:
-            # for short file list the whole file can be taken
-            data_list.extend(np.genfromtxt(file, delimiter=';'))
-        if delete_source:
-            os.remove(file)
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+    # for sliding windows only the first part of each window is needed to not load double data
+    max_rows = 10 if load_from_sliding_window else None
+
+    sensor_path = os.path.join(measurement_path, sensor)
+    filenames = []
+    if load_from_sliding_window and get_stack_names(sensor_path) != []:
+        # windows of all formats are read in the order of their sample names
+        windows = WindowReader(sensor_path).read_all(max_rows)
+    else:
+        filenames = measurement_index.get_filenames(sensor)
+        windows = read_windows([measurement_index.get_file_path(
+            sensor, filename) for filename in filenames], max_rows)
+
+    data = concatenate_data(windows)
 
-    return np.asarray(data_list)
+    if delete_source:
+        for filename in filenames:
+            measurement_index.delete_file(sensor, filename)
+
+    return data
+
+
+def concatenate_data(data_list):
+    """
+        Function to concatenate the data of multiple files of a sensor to a single array, which is only allocated once.
+
+        Parameters:
+            - data_list (list): List with the data of each file (empty data is skipped)
+
+        Returns:
+            - (np.array): Data of all files
+    """
+    data_list = [data for data in data_list if data.size > 0]
+    return np.concatenate(data_list) if data_list != [] else np.asarray([])
 
 
 if __name__ == "__main__":
@@ -416,4 +870,26 @@ if __name__ == "__main__":
     #                     minute=3, second=16, microsecond=958000)
     # remove_obsolete_values(temp_path, "bodyHeight", testdate)
 
-    pass
+    # check that the windows are on the 200 ms grid for all supported sampling rates with windows of 1 s and that invalid configs are rejected
+    measurement_date = datetime(year=2023, month=7, day=25)
+    earliest_timestamp = measurement_date + \
+        timedelta(hours=15, minutes=3, seconds=16, milliseconds=158)
+    for sampling_rate, window_size in [(25, 25), (50, 50), (100, 100)]:
+        window_grid = get_sliding_window_grid(
+            sampling_rate * 10, earliest_timestamp, window_size, sampling_rate)
+        window_timestamps = [get_timestamp_from_timestamp_string(
+            window_timestamp_string, measurement_date) for _, window_timestamp_string in window_grid]
+        if any((window_timestamp - earliest_timestamp) % timedelta(milliseconds=WINDOW_INTERVAL_MS) != timedelta(0) for window_timestamp in window_timestamps):
+            raise Exception(
+                f"Windows for {sampling_rate} Hz are not on the {WINDOW_INTERVAL_MS} ms grid")
+        print(
+            f"{sampling_rate} Hz: {len(window_grid)} windows from {window_grid[0][1]} to {window_grid[-1][1]}")
+
+    for sampling_rate, window_size in [(100, 50), (15, 15), (30, 30)]:
+        try:
+            check_window_size(window_size, sampling_rate)
+        except Exception as e:
+            print(f"{sampling_rate} Hz, window size {window_size}: {e}")
+        else:
+            raise Exception(
+                f"Window size {window_size} at {sampling_rate} Hz was not rejected")
@@ -0,0 +1,240 @@
+import gin
+import numpy as np
+import logging
+
+# methods for interpolating the data at the timestamps of the target sampling rate:
+#   - "linear": linear interpolation between the two surrounding data points
+#   - "nearest": data point with the closest timestamp
+#   - "previous": last data point at or before the timestamp (sample and hold)
+INTERPOLATION_METHODS = ["linear", "nearest", "previous"]
+
+
+def get_sample_period_ms(sampling_rate):
+    """
+        Function to get the time between two subsequent data points of a timeseries.
+
+        Parameters:
+            - sampling_rate (float): Sampling rate in Hz
+
+        Returns:
+            - (float): Sample period in ms
+    """
+    if sampling_rate <= 0:
+        raise Exception(
+            f"Sampling rate must be greater than 0 Hz, got {sampling_rate} Hz instead")
+    return 1000 / sampling_rate
+
+
+def get_sampling_rate_of_timestamps(timestamps_ms):
+    """
+        Function to estimate the sampling rate of a timeseries from the timestamps of its data points.
+        The median time diff is used, so that single delayed data points don't influence the result.
+
+        Parameters:
+            - timestamps_ms (np.array): Strictly increasing timestamps of the data points in ms
+
+        Returns:
+            - (float): Sampling rate in Hz (None if there are less than two timestamps)
+    """
+    if len(timestamps_ms) < 2:
+        return None
+    return 1000 / np.median(np.diff(timestamps_ms))
+
+
+def get_resampling_timestamps(source_timestamps_ms, target_sampling_rate):
+    """
+        Function to get the timestamps of the resampled data, which start at the first source timestamp and
+        are spaced by the sample period of target_sampling_rate up to the last source timestamp.
+
+        Parameters:
+            - source_timestamps_ms (np.array): Strictly increasing timestamps of the source data points in ms
+            - target_sampling_rate (float): Sampling rate of the resampled data in Hz
+
+        Returns:
+            - (np.array): Timestamps of the resampled data points in ms
+    """
+    if len(source_timestamps_ms) == 0:
+        return np.empty(0)
+    sample_period_ms = get_sample_period_ms(target_sampling_rate)
+    # small tolerance, so that a last timestamp on the grid isn't lost by rounding errors
+    number_data_points = int(np.floor(
+        (source_timestamps_ms[-1] - source_timestamps_ms[0]) / sample_period_ms + 1e-9)) + 1
+    return source_timestamps_ms[0] + np.arange(number_data_points) * sample_period_ms
+
+
+def get_interpolation_positions(source_timestamps_ms, target_timestamps_ms):
+    """
+        Function to get the position of each target timestamp between the source timestamps.
+        The positions only depend on the timestamps, thus they are determined once for all sensors which share the same timestamps.
+
+        Parameters:
+            - source_timestamps_ms (np.array): Strictly increasing timestamps of the source data points in ms
+            - target_timestamps_ms (np.array): Timestamps of the resampled data points in ms (within the source timestamps)
+
+        Returns:
+            - (np.array): Index of the source data point at or before each target timestamp (at most the second last index)
+            - (np.array): Relative position of each target timestamp between this data point (0) and the next one (1)
+    """
+    left_indices = np.searchsorted(
+        source_timestamps_ms, target_timestamps_ms, side="right") - 1
+    left_indices = np.clip(left_indices, 0, max(
+        len(source_timestamps_ms) - 2, 0))
+
+    if len(source_timestamps_ms) < 2:
+        return left_indices, np.zeros(len(target_timestamps_ms))
+
+    weights = (target_timestamps_ms - source_timestamps_ms[left_indices]) / \
+        (source_timestamps_ms[left_indices + 1] -
+         source_timestamps_ms[left_indices])
+    return left_indices, weights
+
+
+def interpolate_data(data, left_indices, weights, interpolation="linear"):
+    """
+        Function to interpolate the data of a sensor at the positions from get_interpolation_positions().
+        All columns of the sensor are interpolated at once.
+
+        Parameters:
+            - data (np.array): 1D or 2D array with the data of the sensor (one row per data point)
+            - left_indices (np.array): Index of the data point at or before each target timestamp
+            - weights (np.array): Relative position of each target timestamp between the data point and the next one
+            - interpolation (str): Default = "linear". Interpolation method (see INTERPOLATION_METHODS)
+
+        Returns:
+            - (np.array): Interpolated data with one row per target timestamp
+    """
+    if interpolation not in INTERPOLATION_METHODS:
+        raise Exception(
+            f"Unknown interpolation '{interpolation}', select one of {INTERPOLATION_METHODS}")
+    if np.shape(data)[0] < 2:
+        return data[left_indices]
+
+    if interpolation == "nearest":
+        return data[left_indices + (weights >= 0.5)]
+    if interpolation == "previous":
+        return data[left_indices + (weights >= 1)]
+
+    # weights are broadcasted over all columns of the sensor
+    weights = weights.reshape((-1,) + (1,) * (np.ndim(data) - 1))
+    left_data = data[left_indices]
+    return left_data + weights * (data[left_indices + 1] - left_data)
+
+
+def design_anti_aliasing_filter(source_sampling_rate, target_sampling_rate):
+    """
+        Function to design a low-pass FIR filter (Hamming windowed sinc), which removes all frequencies above the Nyquist frequency of target_sampling_rate.
+        The filter is symmetric and thus doesn't shift the data in time.
+
+        Parameters:
+            - source_sampling_rate (float): Sampling rate of the data to filter in Hz
+            - target_sampling_rate (float): Sampling rate of the resampled data in Hz
+
+        Returns:
+            - (np.array): Filter coefficients (odd number of taps, sum = 1)
+    """
+    # cutoff frequency relative to the source sampling rate
+    cutoff = 0.5 * target_sampling_rate / source_sampling_rate
+    # the stronger the downsampling, the more taps are needed for a steep enough filter
+    num_taps = 8 * int(np.ceil(source_sampling_rate / target_sampling_rate)) + 1
+    positions = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * positions) * np.hamming(num_taps)
+    return taps / np.sum(taps)
+
+
+def apply_filter(data, taps):
+    """
+        Function to filter the data of a sensor by a symmetric FIR filter (see design_anti_aliasing_filter()).
+        All columns are filtered at once and the data is extended by its first and last data point at the edges, so that the result has the same length.
+
+        Parameters:
+            - data (np.array): 1D or 2D array with the data of the sensor (one row per data point)
+            - taps (np.array): Filter coefficients with an odd number of taps
+
+        Returns:
+            - (np.array): Filtered data with the same shape as data
+    """
+    half_num_taps = len(taps) // 2
+    padding = [(half_num_taps, half_num_taps)] + \
+        [(0, 0)] * (np.ndim(data) - 1)
+    padded_data = np.pad(data, padding, mode="edge")
+    # view with the taps of each data point in the last axis, the filter is symmetric, thus convolution is equal to correlation
+    return np.lib.stride_tricks.sliding_window_view(padded_data, len(taps), axis=0) @ taps
+
+
+@gin.configurable
+def resample_timeseries_data(data_dict, source_timestamps_ms, target_sampling_rate, interpolation="linear", anti_aliasing=True):
+    """
+        Function to resample the data of all sensors in data_dict from their timestamps to target_sampling_rate.
+        All sensors share the same timestamps, thus the positions for the interpolation are only determined once for all sensors.
+        Sensors with less data points use the first timestamps of source_timestamps_ms.
+
+        Parameters:
+            - data_dict (dict): Dict containing the data of each sensor (1D or 2D array with one row per data point)
+            - source_timestamps_ms (np.array): Strictly increasing timestamps of the data points in ms (relative to any reference),
+                                               must contain at least as many timestamps as the longest data of a sensor
+            - target_sampling_rate (float): Sampling rate of the resampled data in Hz
+            - interpolation (str): Default = "linear". Interpolation method (see INTERPOLATION_METHODS)
+            - anti_aliasing (bool): Default = True. If True, the data is low-pass filtered before it's resampled to a lower sampling rate to prevent aliasing
+
+        Returns:
+            - (dict): Dict containing the resampled data of each sensor, the first data point of each sensor keeps the first timestamp
+    """
+    if interpolation not in INTERPOLATION_METHODS:
+        raise Exception(
+            f"Unknown interpolation '{interpolation}', select one of {INTERPOLATION_METHODS}")
+    source_timestamps_ms = np.asarray(source_timestamps_ms, dtype=float)
+    if np.any(np.diff(source_timestamps_ms) <= 0):
+        raise Exception("Timestamps of the data must be strictly increasing")
+
+    source_sampling_rate = get_sampling_rate_of_timestamps(
+        source_timestamps_ms)
+    taps = None
+    if anti_aliasing and source_sampling_rate != None and target_sampling_rate < source_sampling_rate:
+        taps = design_anti_aliasing_filter(
+            source_sampling_rate, target_sampling_rate)
+
+    # positions for the interpolation for each number of data points (normally all sensors have the same number of data points)
+    interpolation_positions = {}
+    resampled_data_dict = {}
+    for sensor_name, data in data_dict.items():
+        number_data_points = np.shape(data)[0]
+        if number_data_points > len(source_timestamps_ms):
+            raise Exception(
+                f"Sensor '{sensor_name}' has {number_data_points} data points, but only {len(source_timestamps_ms)} timestamps are available")
+
+        if number_data_points not in interpolation_positions:
+            timestamps_ms = source_timestamps_ms[:number_data_points]
+            interpolation_positions[number_data_points] = get_interpolation_positions(
+                timestamps_ms, get_resampling_timestamps(timestamps_ms, target_sampling_rate))
+        left_indices, weights = interpolation_positions[number_data_points]
+
+        if number_data_points == 0:
+            resampled_data_dict[sensor_name] = data
+            continue
+        if taps is not None:
+            data = apply_filter(data, taps)
+        resampled_data_dict[sensor_name] = interpolate_data(
+            data, left_indices, weights, interpolation)
+
+    logging.info(
+        f"Resampled timeseries data from {source_sampling_rate} Hz to {target_sampling_rate} Hz ({interpolation} interpolation, anti-aliasing: {taps is not None})")
+    return resampled_data_dict
+
+
+if __name__ == "__main__":
+    # resample a sine which is sampled with 50 Hz and check the result for all interpolation methods
+    source_timestamps_ms = np.arange(500) * 20.0
+    data_dict = {"signal": np.stack([np.sin(2 * np.pi * 1 * source_timestamps_ms / 1000),
+                                     np.cos(2 * np.pi * 1 * source_timestamps_ms / 1000)], axis=1),
+                 "noise": np.sin(2 * np.pi * 20 * source_timestamps_ms / 1000)}
+
+    for target_sampling_rate in [25, 50, 100]:
+        target_timestamps_ms = get_resampling_timestamps(
+            source_timestamps_ms, target_sampling_rate)
+        for interpolation in INTERPOLATION_METHODS:
+            resampled_data_dict = resample_timeseries_data(
+                data_dict, source_timestamps_ms, target_sampling_rate, interpolation)
+            max_error = np.max(np.abs(resampled_data_dict["signal"][:, 0] - np.sin(
+                2 * np.pi * 1 * target_timestamps_ms / 1000)))
+            print(f"{target_sampling_rate} Hz, {interpolation}: {len(resampled_data_dict['signal'])} data points, max error of 1 Hz signal {max_error:.4f}, "
+                  f"max amplitude of 20 Hz signal {np.max(np.abs(resampled_data_dict['noise'][50:-50])):.4f}")
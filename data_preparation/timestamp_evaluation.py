@@ -1,12 +1,23 @@
-import glob
 import os
+import sys
 from datetime import datetime, timedelta
 import json
 import numpy as np
 import logging
 
+# differentiation needed to support execution of file directly and to allow function to be included by data_preparation_main.py
+if __name__ == "__main__":
+    # the repository root is needed for the custom imports, as only the dir of this file is in sys.path when it's executed directly
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from measurement_index import MeasurementIndex
+else:
+    from data_preparation.measurement_index import MeasurementIndex
+
+# time between two windows of the IMU data, don't change it, as the whole logic expects a window each 200 ms (as this is the capturing rate of the cameras)
+WINDOW_INTERVAL_MS = 200
+
 
-def get_synchronized_timestamps(measurement_path, earliest_IMU_timestamp=None):
+def get_synchronized_timestamps(measurement_path, earliest_IMU_timestamp=None, measurement_index=None):
     """
         Function to return the closest timestamp for each camera to the earliest possible timestamp of the IMU measurements.
         The time diff between the timestamps of cameras and the IMU is not allowed to be bigger than 200 ms (due to 5 FPS for camera capturing) to ensure pictures belong to IMU data. 
@@ -14,14 +25,15 @@ def get_synchronized_timestamps(measurement_path, earliest_IMU_timestamp=None):
         Parameters:
             - measurement_path (str): path to the measurement
             - earliest_IMU_timestamp (datetime.datetime): timestamp to use for further calculations. If equal to "None", this function will be called recursively with an corrected IMU timestamp.
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
 
         Returns:
             - (dict): Dictionary containing the closest timestamps for each camera and the earliest timestamp of the IMU measurements
     """
-    timestamps = {}  # dict to store all the timestamps
-    time_diffs = {}  # dict to store all time diffs
-    checked_dirs = []  # list of checked dirs for debugging info
-    camera_dir_found = False  # Flag for error detection
+    camera_timestamps = {}  # dict to store the timestamps of all images for each camera
+
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
 
     # get measurement date first for all timestamps
     measurement_date, time_diff_data = get_data_from_info_json_for_timestamp_evaluation(
@@ -29,26 +41,46 @@ def get_synchronized_timestamps(measurement_path, earliest_IMU_timestamp=None):
 
     # get the earliest timestamp of the IMU measurements from files if it's not provided as function parameter
     if earliest_IMU_timestamp == None:
-        timestamps["IMU"] = get_earliest_timestamp_from_IMU(
-            measurement_path, measurement_date)
+        IMU_timestamp = get_earliest_timestamp_from_IMU(
+            measurement_path, measurement_date, measurement_index)
     else:
-        timestamps["IMU"] = earliest_IMU_timestamp
-
-    # get the timestamp string for all cameras
-    for root, dirs, files in os.walk(measurement_path):
-        for dir in dirs:
-            checked_dirs.append(dir)
-            # only further process dirs which contain "Cam" in their name
-            if "Cam" in dir:
-                camera_dir_found = True
+        IMU_timestamp = earliest_IMU_timestamp
 
-                # get closest timestamp and time_diff to corrected reference timestamp for the current camera
-                timestamps[dir], time_diffs[dir] = get_closest_timestamp_for_camera(
-                    measurement_path, dir, measurement_date, timestamps["IMU"], time_diff_data)
+    # get the timestamps of all images for all cameras (only dirs which contain "Cam" in their name)
+    for camera in measurement_index.get_cameras():
+        camera_timestamps[camera] = get_timestamps_for_camera(
+            measurement_path, camera, measurement_date, measurement_index)
 
-    if not camera_dir_found:
+    if camera_timestamps == {}:
         raise Exception(
-            f"No camera directory present in directory {measurement_path}\nIt only contains the following dirs: {checked_dirs}")
+            f"No camera directory present in directory {measurement_path}\nIt only contains the following dirs: {measurement_index.sensors}")
+
+    return get_synchronized_timestamps_for_camera_timestamps(camera_timestamps, time_diff_data, IMU_timestamp, earliest_IMU_timestamp != None)
+
+
+def get_synchronized_timestamps_for_camera_timestamps(camera_timestamps, time_diff_data, earliest_IMU_timestamp, IMU_timestamp_is_corrected=False):
+    """
+        Function to return the closest timestamp for each camera to the earliest possible timestamp of the IMU measurements based on the already available image timestamps.
+        The time diff between the timestamps of cameras and the IMU is not allowed to be bigger than 200 ms (due to 5 FPS for camera capturing) to ensure pictures belong to IMU data. 
+
+        Parameters:
+            - camera_timestamps (dict): Dict containing the list of timestamps (datetime.datetime) of all images for each camera
+            - time_diff_data (dict): dict containing the time_diff_data from the info.json
+            - earliest_IMU_timestamp (datetime.datetime): timestamp of the earliest IMU measurement
+            - IMU_timestamp_is_corrected (bool): Default = False. If False, this function will be called recursively with an corrected IMU timestamp if needed.
+
+        Returns:
+            - (dict): Dictionary containing the closest timestamps for each camera and the earliest timestamp of the IMU measurements
+    """
+    timestamps = {"IMU": earliest_IMU_timestamp}  # dict to store all the timestamps
+    time_diffs = {}  # dict to store all time diffs
+
+    for camera_name, timestamps_of_camera in camera_timestamps.items():
+        # get closest timestamp and time_diff to corrected reference timestamp for the current camera
+        reference_timestamp = get_corrected_reference_timestamp_for_camera(
+            camera_name, earliest_IMU_timestamp, time_diff_data)
+        timestamps[camera_name], time_diffs[camera_name] = get_closest_timestamp(
+            timestamps_of_camera, reference_timestamp)
 
     # # print statement for debugging purposes
     # for key, value in timestamps.items():
@@ -61,19 +93,20 @@ def get_synchronized_timestamps(measurement_path, earliest_IMU_timestamp=None):
     max_time_diff = max(time_diffs.values())
     if max_time_diff > timedelta(milliseconds=200):
         # in earliest_IMU_timestamp was not provided as a parameter but taken from files, this is plausible as the first IMU measurement might have started too early
-        if earliest_IMU_timestamp == None:
+        if not IMU_timestamp_is_corrected:
             logging.info("The maximum time diff of all cameras is greater than 200 ms (sampling rate of cameras), which means earliest IMU measurement is older than earliest picture! \
                     \nThus synchronized timestamps will be recalculated for expected first parallel IMU measurement when last camera started taking pictures.\n")
 
-            # new timestamp must be fitting to the 50 Hz capturing rate of the IMU data => thus corrected IMU timestamp must updated by time diff in 20 ms steps
+            # new timestamp must be the timestamp of a window of the IMU data => thus corrected IMU timestamp must updated by time diff in steps of the window interval (200 ms)
+            # the window interval is a multiple of the sample period of the IMU data (see get_window_stride())
             max_time_diff_ms = round(max_time_diff.microseconds / 1000)
-            if max_time_diff_ms % 20 != 0:
-                max_time_diff_ms = max_time_diff_ms - (max_time_diff_ms % 20)
+            max_time_diff_ms = max_time_diff_ms - \
+                (max_time_diff_ms % WINDOW_INTERVAL_MS)
             corrected_earliest_IMU_timestamp = timestamps["IMU"] + timedelta(
                 milliseconds=max_time_diff_ms)
 
-            timestamps = get_synchronized_timestamps(
-                measurement_path, earliest_IMU_timestamp=corrected_earliest_IMU_timestamp)
+            timestamps = get_synchronized_timestamps_for_camera_timestamps(
+                camera_timestamps, time_diff_data, corrected_earliest_IMU_timestamp, IMU_timestamp_is_corrected=True)
         else:
             raise Exception(
                 f"Time diff for a camera is greater than 200 ms for a corrected earliest IMU timestamp. This shouldn't be possible! Please check your data.\nResults of synchronized timestamp calculation: {time_diffs}")
@@ -81,7 +114,7 @@ def get_synchronized_timestamps(measurement_path, earliest_IMU_timestamp=None):
     return timestamps
 
 
-def get_closest_timestamp_for_camera(measurement_path, camera_name, measurement_date, reference_timestamp, time_diff_data):
+def get_closest_timestamp_for_camera(measurement_path, camera_name, measurement_date, reference_timestamp, time_diff_data, measurement_index=None):
     """
         Function to return closest timestamp to the reference_timestamp considering time_diff_data for the camera.
 
@@ -91,23 +124,53 @@ def get_closest_timestamp_for_camera(measurement_path, camera_name, measurement_
             - measurement_date (datetime.datetime): date of the measurement for the timestamp
             - reference_timestamp (datetime.datetime): reference timestamp for search
             - time_diff_data (dict): dict containing the time_diff_data from the info.json
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
 
         Returns:
             - return values of function get_closest_timestamp()
     """
-    # local variables
-    timestamps = []
-    time_diff = None
-    later_timestamp = None
+    timestamps = get_timestamps_for_camera(
+        measurement_path, camera_name, measurement_date, measurement_index)
+    reference_timestamp = get_corrected_reference_timestamp_for_camera(
+        camera_name, reference_timestamp, time_diff_data)
+
+    return get_closest_timestamp(timestamps, reference_timestamp)
+
+
+def get_timestamps_for_camera(measurement_path, camera_name, measurement_date, measurement_index=None):
+    """
+        Function to return the timestamps of all images of the camera sorted by their filenames.
+
+        Parameters:
+            - measurement_path (str): path to the measurement
+            - camera_name (str): name of the camera to check which is also the directory name
+            - measurement_date (datetime.datetime): date of the measurement for the timestamp
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
+
+        Returns:
+            - timestamps (list): List of the timestamps (datetime.datetime) of all images
+    """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
 
     # extract all timestamps from camera directory
-    files_glob_pattern = os.path.join(measurement_path, camera_name, "*.jpg")
-    cam_files = glob.glob(files_glob_pattern)
-    cam_files.sort()
-    for cam_file in cam_files:
-        filename = cam_file.split(os.sep)[-1]
-        timestamps.append(get_timestamp_from_picture(
-            filename, measurement_date))
+    return measurement_index.get_timestamps(camera_name, measurement_date)
+
+
+def get_corrected_reference_timestamp_for_camera(camera_name, reference_timestamp, time_diff_data):
+    """
+        Function to correct the reference_timestamp (from local PC) by the time diff to the PC of the camera from time_diff_data.
+
+        Parameters:
+            - camera_name (str): name of the camera
+            - reference_timestamp (datetime.datetime): reference timestamp which shall be corrected
+            - time_diff_data (dict): dict containing the time_diff_data from the info.json
+
+        Returns:
+            - reference_timestamp (datetime.datetime): Corrected reference timestamp
+    """
+    time_diff = None
+    later_timestamp = None
 
     # get fitting time_diff_data for camera for reference_timestamp correction
     if "ChinCam" in camera_name or "HeadCam" in camera_name:
@@ -141,7 +204,7 @@ def get_closest_timestamp_for_camera(measurement_path, camera_name, measurement_
     # print(
     #     f"Corrected IMU timestamp for {camera_name} as reference_timestamp is: ", reference_timestamp)
 
-    return get_closest_timestamp(timestamps, reference_timestamp)
+    return reference_timestamp
 
 
 def get_closest_timestamp(timestamps, reference_timestamp):
@@ -189,38 +252,32 @@ def get_timestamp_from_picture(filename, measurement_date):
     return get_timestamp_from_timestamp_string(timestamp_string, measurement_date)
 
 
-def get_earliest_timestamp_from_IMU(measurement_path, measurement_date):
+def get_earliest_timestamp_from_IMU(measurement_path, measurement_date, measurement_index=None):
     """
         Function to the earliest timestamp of the IMU measurements as a datetime object for further processing.
 
         Parameters:
             - measurement_path (str): path to the measurement
             - measurement_date (datetime.datetime): date of the measurement for the timestamp
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
 
         Returns:
             - (datetime.datetime): datetime object of the earliest timestamp for further processing
     """
-    # list of checked dirs for debugging info
-    checked_dirs = []
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
 
     # get the timestamp string from any IMU measurement folder (all measurements are done in parallel, thus it doesn't matter which one is taken)
-    for root, dirs, files in os.walk(measurement_path):
-        # check for IMU measurement dir (all dirs without "Cam" in the name)
-        for dir in dirs:
-            checked_dirs.append(dir)
-            if not "Cam" in dir:
-                # get filename of first file in the dir
-                glob_pattern = os.path.join(root, dir, "*.csv")
-                files = glob.glob(glob_pattern)
-                files.sort()
-                first_filename = files[0].split(os.sep)[-1]
-
-                # extract timestamp string from filename and convert it
-                earliest_timestamp_string = first_filename[:-4]
-                return get_timestamp_from_timestamp_string(earliest_timestamp_string, measurement_date)
+    for sensor in measurement_index.get_timeseries_sensors():
+        # get filename of first file in the dir
+        first_filename = measurement_index.get_filenames(sensor)[0]
+
+        # extract timestamp string from filename and convert it
+        earliest_timestamp_string = first_filename[:-4]
+        return get_timestamp_from_timestamp_string(earliest_timestamp_string, measurement_date)
 
     raise Exception(
-        f"No IMU measurement present in directory {measurement_path}\nIt only contains the following dirs: {checked_dirs}")
+        f"No IMU measurement present in directory {measurement_path}\nIt only contains the following dirs: {measurement_index.sensors}")
 
 
 def get_timestamp_from_timestamp_string(timestamp_string: str, measurement_date: datetime):
@@ -261,12 +318,26 @@ def get_data_from_info_json_for_timestamp_evaluation(measurement_path):
 
     with open(json_path, "r") as f:
         info_dict = json.load(f)
-        measurement_date = datetime.strptime(
-            info_dict["measurement_date"], "%d.%m.%Y")
-        time_diff_data = {"time_diff_13_in_ms": info_dict["time_diff_13_in_ms"],
-                          "time_diff_14_in_ms": info_dict["time_diff_14_in_ms"],
-                          "time_diff_15_in_ms": info_dict["time_diff_15_in_ms"]}
-        return measurement_date, time_diff_data
+        return get_data_from_info_dict_for_timestamp_evaluation(info_dict)
+
+
+def get_data_from_info_dict_for_timestamp_evaluation(info_dict):
+    """
+        Function to get data from the already loaded content of the info.json file needed for timestamp evaluation.
+
+        Parameters:
+            - info_dict (dict): Content of the info.json file
+
+        Returns:
+            - measurement_date (datetime.datetime): datetime object of the date from the info.json file
+            - time_diff_data (dict): strut containing the time diff data
+    """
+    measurement_date = datetime.strptime(
+        info_dict["measurement_date"], "%d.%m.%Y")
+    time_diff_data = {"time_diff_13_in_ms": info_dict["time_diff_13_in_ms"],
+                      "time_diff_14_in_ms": info_dict["time_diff_14_in_ms"],
+                      "time_diff_15_in_ms": info_dict["time_diff_15_in_ms"]}
+    return measurement_date, time_diff_data
 
 
 def get_timestamp_string_from_timestamp(timestamp: datetime):
@@ -282,7 +353,7 @@ def get_timestamp_string_from_timestamp(timestamp: datetime):
     return timestamp.strftime("%H_%M_%S_%f")[:-3]
 
 
-def remove_obsolete_data_at_end(measurement_path, last_allowed_timestamp_images):
+def remove_obsolete_data_at_end(measurement_path, last_allowed_timestamp_images, measurement_index=None):
     """
         Function to remove all obsolete images at the end of the measurement with the target that all sensors in measurement_path have
         an equal amount of images.
@@ -290,37 +361,49 @@ def remove_obsolete_data_at_end(measurement_path, last_allowed_timestamp_images)
         Parameters:
             - measurement_path (str): Path to the measurement
             - last_allowed_timestamp_images (datetime.datetime): Last allowed timestamp of the images
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
     """
-    # initialize local variables
-    last_allowed_timestamp_IMU_checked = False
-    deletion_for_IMU_needed = True
-    last_allowed_timestamp = None
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
 
     # get measurement date first for all timestamps
     measurement_date, _ = get_data_from_info_json_for_timestamp_evaluation(
         measurement_path)
 
-    # get list of all sensors
-    sensor_list = []
-    for root, dirs, files in os.walk(measurement_path):
-        for dir in dirs:
-            sensor_list.append(dir)
+    # get the last allowed timestamp from the first IMU measurement
+    last_filename = measurement_index.get_filenames(
+        measurement_index.get_timeseries_sensors()[0])[-1]
+
+    # extract timestamp string from filename and convert it
+    last_allowed_timestamp_string_IMU = last_filename[:-4]
+    last_allowed_timestamp_IMU = get_timestamp_from_timestamp_string(
+        last_allowed_timestamp_string_IMU, measurement_date)
+
+    last_allowed_timestamp, deletion_for_IMU_needed = get_last_allowed_timestamp(
+        last_allowed_timestamp_IMU, last_allowed_timestamp_images)
+
+    # delete obsolete files which not every camera contains
+    for sensor in measurement_index.sensors:
+        if not deletion_for_IMU_needed and not "Cam" in sensor:
+            # skip IMU data, if there is no data to delete for IMU
+            continue
+        remove_obsolete_data_at_end_for_sensor(
+            measurement_path, sensor, last_allowed_timestamp, measurement_index)
+
 
-            # additionally get the last allowed timestamp from IMU measurement from the first checked IMU measurement
-            if not last_allowed_timestamp_IMU_checked and not "Cam" in dir:
-                # get filename of last file in the dir of IMU measurement
-                glob_pattern = os.path.join(root, dir, "*.csv")
-                files = glob.glob(glob_pattern)
-                files.sort()
-                last_filename = files[-1].split(os.sep)[-1]
+def get_last_allowed_timestamp(last_allowed_timestamp_IMU, last_allowed_timestamp_images):
+    """
+        Function to determine the last timestamp for which data of all sensors is available.
 
-                # extract timestamp string from filename and convert it
-                last_allowed_timestamp_string_IMU = last_filename[:-4]
-                last_allowed_timestamp_IMU = get_timestamp_from_timestamp_string(
-                    last_allowed_timestamp_string_IMU, measurement_date)
+        Parameters:
+            - last_allowed_timestamp_IMU (datetime.datetime): Timestamp of the last IMU window
+            - last_allowed_timestamp_images (datetime.datetime): Last allowed timestamp of the images
 
-                # set Flag to True so this check won't be done multiple times
-                last_allowed_timestamp_IMU_checked = True
+        Returns:
+            - last_allowed_timestamp (datetime.datetime): Timestamp after which all data samples shall be deleted
+            - deletion_for_IMU_needed (bool): True if IMU data after last_allowed_timestamp is present
+    """
+    deletion_for_IMU_needed = True
 
     # check which last allowed timestamp is earlier
     if last_allowed_timestamp_IMU > last_allowed_timestamp_images:
@@ -336,16 +419,10 @@ def remove_obsolete_data_at_end(measurement_path, last_allowed_timestamp_images)
     logging.info(
         f"All data samples after {get_timestamp_string_from_timestamp(last_allowed_timestamp)} will be deleted now.")
 
-    # delete obsolete files which not every camera contains
-    for sensor in sensor_list:
-        if not deletion_for_IMU_needed and not "Cam" in sensor:
-            # skip IMU data, if there is no data to delete for IMU
-            continue
-        remove_obsolete_data_at_end_for_sensor(
-            measurement_path, sensor, last_allowed_timestamp)
+    return last_allowed_timestamp, deletion_for_IMU_needed
 
 
-def remove_obsolete_data_at_end_for_sensor(measurement_path, sensor, last_allowed_timestamp):
+def remove_obsolete_data_at_end_for_sensor(measurement_path, sensor, last_allowed_timestamp, measurement_index=None):
     """
         Function to remove all obsolete images at the end of the sensor which are after last_allowed_timestamp.
 
@@ -353,34 +430,24 @@ def remove_obsolete_data_at_end_for_sensor(measurement_path, sensor, last_allowe
             - measurement_path (str): Path to the measurement
             - sensor (str): Name of the sensor to perform the function for
             - last_allowed_timestamp (datetime.datetime): Timestamp to use for further detection of obsolete images
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
     """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+
     # extract measurement date from earliest timestamp for get_timestamp_from_picture()
     measurement_date = datetime(year=last_allowed_timestamp.year,
                                 month=last_allowed_timestamp.month, day=last_allowed_timestamp.day)
 
-    # extract list of all files from sensor directory
-    if "Cam" in sensor:
-        # cameras have .jpg files
-        files_glob_pattern = os.path.join(measurement_path, sensor, "*.jpg")
-    else:
-        # other sensors have .csv files
-        files_glob_pattern = os.path.join(measurement_path, sensor, "*.csv")
-    files = glob.glob(files_glob_pattern)
-    files.sort()
-
-    # iterate over all files and check if file has to be removed
-    for index, file in enumerate(files):
-        # get timestamp of file
-        current_filename = file.split(os.sep)[-1]
-        current_timestamp = get_timestamp_from_picture(
-            current_filename, measurement_date)
-
+    # iterate over all files (.jpg files for cameras and .csv files for other sensors) and check if file has to be removed
+    filenames = measurement_index.get_filenames(sensor)
+    for current_filename, current_timestamp in zip(filenames, measurement_index.get_timestamps(sensor, measurement_date)):
         if current_timestamp > last_allowed_timestamp:
             # remove cam_file after last_allowed_timestamp
-            os.remove(file)
+            measurement_index.delete_file(sensor, current_filename)
 
 
-def create_label_csv(measurement_path):
+def create_label_csv(measurement_path, measurement_index=None):
     """
         Function to create label csv for the completely prepared data based on label present in info.json.
 
@@ -392,11 +459,14 @@ def create_label_csv(measurement_path):
 
         Parameters:
             - measurement_path (str): Path to the measurement
+            - measurement_index (MeasurementIndex): Index of the files of the measurement (default = None -> index will be created)
     """
     label = None
-    files = None
     timestamp_label_list = []
 
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(measurement_path)
+
     # get label from json
     json_path = os.path.join(measurement_path, "info.json")
 
@@ -404,24 +474,13 @@ def create_label_csv(measurement_path):
         info_dict = json.load(f)
         label = info_dict["floor type"]
 
-    # get all filenames from first dir in measurement
-    for root, dirs, files in os.walk(measurement_path):
-        for dir in dirs:
-            if "Cam" in dir:
-                # cameras have .jpg files
-                files_glob_pattern = os.path.join(
-                    measurement_path, dir, "*.jpg")
-            else:
-                # other sensors have .csv files
-                files_glob_pattern = os.path.join(
-                    measurement_path, dir, "*.csv")
-            files = glob.glob(files_glob_pattern)
-            files.sort()
-            break
+    # get all filenames from the last dir in measurement (.jpg files for cameras and .csv files for other sensors)
+    # NOTE: The last dir is used to keep the labels of previous versions where the file list was overwritten by os.walk()
+    filenames = measurement_index.get_filenames(measurement_index.sensors[-1])
 
     # create list of timestamp to label mapping (every timestamp has the same label!)
-    for file in files:
-        timestamp_string = file.split(os.sep)[-1][:-4]
+    for filename in filenames:
+        timestamp_string = filename[:-4]
         timestamp_label_list.append([timestamp_string, label])
 
     # save the list
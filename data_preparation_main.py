@@ -3,22 +3,30 @@ import gin
 import shutil
 import logging
 import json
+import traceback
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # custom imports
 from custom_utils.utils import copy_measurement_to_temp, clean_temp_dir, copy_prepared_dataset, clean_results_dir, load_json_from_configs, CustomLogger
+from custom_utils.window_io import write_sampling_rate, read_sampling_rate
 from data_preparation.timestamp_evaluation import get_synchronized_timestamps, remove_obsolete_data_at_end, create_label_csv, get_earliest_timestamp_from_IMU, get_data_from_info_json_for_timestamp_evaluation
-from data_preparation.timeseries_preparation import TimeseriesDownsamplingForWholeMeasurement, remove_obsolete_values, load_complete_IMU_measurement, create_sliding_windows_and_save_them
+from data_preparation.timeseries_preparation import TimeseriesDownsamplingForWholeMeasurement, remove_obsolete_values, load_complete_IMU_measurement, create_sliding_windows_and_save_them, create_sliding_windows_for_all_sensors_and_save_them, stack_windows_and_save_them, resample_IMU_data, check_window_size
 from data_preparation.image_preparation import remove_obsolete_images_at_beginning, unify_image_timestamps
 from data_preparation.incomplete_data_cleanup import get_incomplete_data_samples, delete_incomplete_data_samples, update_labels_csv, get_list_of_corrupt_IMU_files
-from data_preparation.measurement_combination import combine_measurements_to_dataset
+from data_preparation.measurement_combination import combine_measurements_to_dataset, write_measurement_to_dataset, remove_measurement_from_dataset, merge_measurement_labels
+from data_preparation.measurement import Measurement
+from data_preparation.measurement_index import MeasurementIndex
+from data_preparation.preparation_metrics import PreparationMetrics, METRICS_FILENAME, aggregate_preparation_metrics
+from data_preparation.measurement_staging import MeasurementStager
+from data_preparation.preparation_cache import get_preparation_key, is_preparation_up_to_date, store_preparation_key, remove_preparation_key
 from visualization.visualizeTimeseriesData import plot_IMU_data
 from visualization.visualizeImages import show_all_images_afterwards, show_all_images_afterwards_including_imu_data
-from data_preprocessing_main import data_preprocessing_main
+from data_preprocessing_main import data_preprocessing_main, preprocess_image, preprocess_timeseries_data, get_jpeg_save_options, get_image_remapping_options
 
 
 @gin.configurable
-def data_preparation_main(measurement_path, temp_path=None, dataset_path=None, window_size=50, normalize_IMU_data_measurement_based=True, preprocess_IMU_data_dataset_based=False, preprocess_images=False, resize_images=False):
+def data_preparation_main(measurement_path, temp_path=None, dataset_path=None, window_size=50, normalize_IMU_data_measurement_based=True, preprocess_IMU_data_dataset_based=False, preprocess_images=False, resize_images=False, in_memory_preparation=False, copy_measurement=False, copy_strategy="copy", dataset_namespace=None, window_format="csv", downsampling_chunk_size=None, IMU_sampling_rate=50):
     """
         Function to start the complete data preparation process for a new measurement.
 
@@ -33,7 +41,34 @@ def data_preparation_main(measurement_path, temp_path=None, dataset_path=None, w
             - preprocess_IMU_data_dataset_based (bool): Select whether IMU data shall be preprocessed (default = False)
             - preprocess_images (bool): Select whether images shall be preprocessed (default = False)
             - resize_images (bool): Boolean to enable resizing of images (default = False)
+            - in_memory_preparation (bool): Select whether all preparation steps shall be done in memory, so that each file is only read and written once (default = False)
+                                            The measurement will not be copied to temp_path in this case and .zip files are read directly without extracting them.
+            - copy_measurement (bool): Select whether the measurement shall be copied to the provided temp_path (default = False)
+            - copy_strategy (str): Strategy for copying the measurement to temp_path and the prepared measurement to dataset_path (default = "copy")
+                                   Can be "copy", "hardlink", "reflink" or "move" (see custom_utils.utils.copy_file()).
+                                   NOTE: The raw measurement is never moved, instead hardlinks are used for "move".
+            - dataset_namespace (str): Namespace of the measurement in the final dataset at dataset_path (default = None -> dataset_path contains only this measurement)
+                                       If not None, the samples are written directly to the final dataset of multiple measurements with the sample names "<dataset_namespace>_<timestamp>".
+                                       labels.csv, the sampling rate, the log file and the metrics stay in temp_path in this case, so that the labels can be merged by merge_measurement_labels().
+            - window_format (str): Format of the windows of the IMU data (default = "csv"), see custom_utils.window_io.WINDOW_FORMATS
+                                   Can be "csv" (one .csv file per window), "npy" (one .npy file per window) or "stacked" (one .npy file with all windows per sensor).
+            - downsampling_chunk_size (int): Number of rows of the IMU data which are downsampled at once (default = None -> whole files are downsampled at once)
+                                             If not None, the IMU data is downsampled chunk by chunk and the windows are created for one sensor after another,
+                                             so that only the data of one sensor is in memory. Not used for in_memory_preparation.
+            - IMU_sampling_rate (float): Sampling rate of the windows of the IMU data in Hz (default = 50 -> rate of the downsampled IMU data, no resampling)
+                                         The sample period must be an integer number of ms dividing 200 ms (e.g. 25 or 100 Hz), see get_window_stride().
+                                         The window_size is the number of data points at this rate and the windows must span a multiple of 200 ms (e.g. 100 for 100 Hz), see check_window_size().
+                                         Interpolation and anti-aliasing of the resampling are configured by resample_timeseries_data().
     """
+    # windows must be on the 200 ms grid of the cameras for IMU_sampling_rate, which is checked before any data is copied
+    check_window_size(window_size, IMU_sampling_rate)
+
+    # raw measurement must never be moved, but hardlinks are safe as files are always removed before they are overwritten
+    raw_copy_strategy = "hardlink" if copy_strategy == "move" else copy_strategy
+    # stacked windows are named like the measurement, so that the stacked windows of multiple measurements can be combined to a dataset
+    stack_name = dataset_namespace if dataset_namespace != None else os.path.basename(
+        os.path.normpath(measurement_path)).replace(".zip", "")
+
     measurements_are_copied = True
     if temp_path == None:
         # create path name for the temp dir and clean it if no temp_path is provided (handled by caller otherwise)
@@ -41,6 +76,9 @@ def data_preparation_main(measurement_path, temp_path=None, dataset_path=None, w
         temp_path = os.path.join(file_dir, "temp")
         clean_temp_dir()
         measurements_are_copied = False
+    elif copy_measurement:
+        os.makedirs(temp_path, exist_ok=True)
+        measurements_are_copied = False
 
     # create logger to log the progress for later analysis
     logger = CustomLogger()
@@ -49,88 +87,163 @@ def data_preparation_main(measurement_path, temp_path=None, dataset_path=None, w
     logging.info(
         f"### Start data preparation for measurement {measurement_path} ###")
 
+    # metrics (time, file operations and memory) are determined for each step and stored as report next to the log file
+    metrics = PreparationMetrics(measurement_path)
+
     if normalize_IMU_data_measurement_based and preprocess_IMU_data_dataset_based:
         logging.info(
             "Dataset creation aborted, due to invalid config (IMU data was selected to be preprocessed/ normalized twice!)")
+        logger.stop_logger()
         return
 
-    if measurements_are_copied == False:
+    if in_memory_preparation and not measurements_are_copied:
+        # no copy needed, as the measurement is only read once (also directly from .zip files)
+        logging.info("### Step 1: Measurement will be loaded directly ###")
+        prepare_measurement_in_memory(measurement_path, temp_path, dataset_path, window_size,
+                                      normalize_IMU_data_measurement_based, preprocess_IMU_data_dataset_based, preprocess_images, resize_images, raw_copy_strategy, metrics, dataset_namespace,
+                                      window_format, stack_name, IMU_sampling_rate)
+        logger.stop_logger()
+        return
+    elif measurements_are_copied == False:
         # copy the desired measurement to the temp_dir afterwards if no temp_path is provided (handled by caller otherwise)
         logging.info("### Step 1: Copy measurements ###")
-        copy_measurement_to_temp(measurement_path)
+        metrics.start_step("1_copy_measurement")
+        copy_measurement_to_temp(
+            measurement_path, temp_path, raw_copy_strategy)
     else:
         logging.info("### Step 1.1: Measurement already available ###")
 
+    if in_memory_preparation:
+        prepare_measurement_in_memory(temp_path, temp_path, dataset_path, window_size,
+                                      normalize_IMU_data_measurement_based, preprocess_IMU_data_dataset_based, preprocess_images, resize_images, raw_copy_strategy, metrics, dataset_namespace,
+                                      window_format, stack_name, IMU_sampling_rate)
+        logger.stop_logger()
+        return
+
     # uncomment to check how data looks before preparation step
     # visualize_result()
 
     logging.info(
         "\n\n### Step 2: Downsampling of IMU data and create windows for IMU data ###")
+    metrics.start_step("2_downsampling_and_windows")
+    # scan the measurement only once, all following steps use and update this index instead of listing the dirs again
+    measurement_index = MeasurementIndex(temp_path)
     timeseries_downsampler = TimeseriesDownsamplingForWholeMeasurement(
-        temp_path)
-    timeseries_downsampler.start_downsampling()
+        temp_path, measurement_index, downsampling_chunk_size)
+    # downsampled data is kept in memory for the windows instead of overwriting the files and loading them again (not possible for downsampling in chunks)
+    downsampled_data = timeseries_downsampler.start_downsampling(
+        keep_downsampled_data=downsampling_chunk_size == None)
 
     # get starting timestamp for sliding windows
     measurement_timestamp, _ = get_data_from_info_json_for_timestamp_evaluation(
         temp_path)
     earliest_timestamp = get_earliest_timestamp_from_IMU(
-        temp_path, measurement_timestamp)
-    # create sliding windows
-    for sensor in timeseries_downsampler.timeseries_sensors:
-        create_sliding_windows_and_save_them(
-            temp_path, earliest_timestamp, sensor, window_size, normalize_IMU_data_measurement_based)
+        temp_path, measurement_timestamp, measurement_index=measurement_index)
+    if downsampled_data != None:
+        # create sliding windows for all sensors in one pass (replaces the raw data files)
+        # all sensors are resampled at once, as they share the same timestamps
+        downsampled_data = resample_IMU_data(
+            downsampled_data, IMU_sampling_rate)
+        create_sliding_windows_for_all_sensors_and_save_them(
+            temp_path, earliest_timestamp, downsampled_data, window_size, normalize_IMU_data_measurement_based, measurement_index=measurement_index, window_format=window_format, sampling_rate=IMU_sampling_rate)
+        # free the memory of the downsampled data for the following steps
+        del downsampled_data
+    else:
+        # load the downsampled data of one sensor after another to create its sliding windows
+        for sensor in timeseries_downsampler.timeseries_sensors:
+            create_sliding_windows_and_save_them(
+                temp_path, earliest_timestamp, sensor, window_size, normalize_IMU_data_measurement_based, measurement_index=measurement_index, window_format=window_format, sampling_rate=IMU_sampling_rate)
 
     logging.info(
         "\n\n### Step 3: Get synchronized timestamps and delete data previous to synchronized timestamp ###")
-    timestamps = get_synchronized_timestamps(temp_path)
+    metrics.start_step("3_synchronization")
+    timestamps = get_synchronized_timestamps(
+        temp_path, measurement_index=measurement_index)
 
     for key, timestamp in timestamps.items():
         # logging.info(f"Starting timestamp for {key} is {timestamp}")
         if "IMU" in key:
             for sensor in timeseries_downsampler.timeseries_sensors:
-                remove_obsolete_values(temp_path, sensor, timestamp)
+                remove_obsolete_values(
+                    temp_path, sensor, timestamp, measurement_index=measurement_index, sampling_rate=IMU_sampling_rate)
         elif "Cam" in key:
-            remove_obsolete_images_at_beginning(temp_path, key, timestamp)
+            remove_obsolete_images_at_beginning(
+                temp_path, key, timestamp, measurement_index=measurement_index)
 
     logging.info("\n\n### Step 4: Unify image timestamps ###")
+    metrics.start_step("4_unify_image_timestamps")
     earliest_last_image_timestamp = unify_image_timestamps(
-        temp_path, timestamps["IMU"])
+        temp_path, timestamps["IMU"], measurement_index=measurement_index)
 
     logging.info(
         "\n\n### Step 5: Deletion of data for timestamps that are not available for all sensors ###")
-    remove_obsolete_data_at_end(temp_path, earliest_last_image_timestamp)
+    metrics.start_step("5_remove_obsolete_data_at_end")
+    remove_obsolete_data_at_end(
+        temp_path, earliest_last_image_timestamp, measurement_index=measurement_index)
 
     logging.info("\n\n### Step 6: Create labels csv file ###")
-    create_label_csv(temp_path)
+    metrics.start_step("6_create_labels")
+    create_label_csv(temp_path, measurement_index=measurement_index)
 
     logging.info("\n\n### Step 7: Remove incomplete data samples ###")
+    metrics.start_step("7_remove_incomplete_data_samples")
     incomplete_samples_list, complete_incomplete_samples_list = get_incomplete_data_samples(
-        temp_path)
+        temp_path, measurement_index=measurement_index)
     logging.info(
         f"The files for the following timestamps will be deleted now:")
     # log info about missing files
     for incomplete_samples in complete_incomplete_samples_list:
         logging.info(incomplete_samples)
-    delete_incomplete_data_samples(temp_path, incomplete_samples_list)
+    delete_incomplete_data_samples(
+        temp_path, incomplete_samples_list, measurement_index=measurement_index)
     update_labels_csv(temp_path, incomplete_samples_list)
     logging.info(
         "Data for other sensors was removed for above mentioned incomplete samples including update of 'lables.csv'")
 
     logging.info(
         "\n\n### Step 8: Perform preprocessing for all data samples ###")
+    metrics.start_step("8_preprocessing")
     config_path = "preprocessing_config.json"
     config_dict = load_json_from_configs(
         run_path="", json_filename=config_path)
     data_preprocessing_main(
-        temp_path, config_dict, preprocess_images, preprocess_IMU_data_dataset_based, resize_images)
+        temp_path, config_dict, preprocess_images, preprocess_IMU_data_dataset_based, resize_images, measurement_index=measurement_index)
+
+    if window_format == "stacked":
+        logging.info(
+            "\n\n### Step 8.1: Stack windows of IMU data ###")
+        metrics.start_step("8_1_stack_windows")
+        for sensor in timeseries_downsampler.timeseries_sensors:
+            stack_windows_and_save_them(
+                temp_path, sensor, stack_name, measurement_index)
+
+    # sampling rate is stored next to the windows, so that the time between two rows of a window is known when the dataset is used
+    # (like labels.csv it stays in temp_path if the samples are written directly to the final dataset, see prepare_all_measurements())
+    write_sampling_rate(temp_path, IMU_sampling_rate)
+
+    if dataset_namespace != None:
+        logging.info("\n\n### Step 9: Write samples to final dataset ###")
+        metrics.start_step("9_write_samples_to_dataset")
+        write_measurement_to_dataset(
+            temp_path, dataset_path, dataset_namespace, copy_strategy, measurement_index)
+
+        # datasheet.md is copied once to the final dataset after all measurements are merged, thus labels, metrics and the log file stay in temp_path
+        metrics.stop_step()
+        metrics.save(temp_path)
+        logging.info(
+            f"Metrics of all steps were stored in {os.path.join(temp_path, METRICS_FILENAME)}")
+        logger.stop_logger()
+        return
 
     logging.info("\n\n### Step 9: Copy prepared dataset ###")
+    metrics.start_step("9_copy_prepared_dataset")
     if dataset_path == None:
         # clean results/ dir if it shall be used
         clean_results_dir()
-    copy_prepared_dataset(temp_path, dataset_path)
+    copy_prepared_dataset(temp_path, dataset_path, copy_strategy)
 
     logging.info("\n\n### Step 10: Copy datasheed.md to results dir ###")
+    metrics.start_step("10_copy_datasheet")
     if dataset_path == None:
         shutil.copy("./datasheet.md", "./results/")
         logging.info("datasheet.md was copied to ./results/")
@@ -138,10 +251,404 @@ def data_preparation_main(measurement_path, temp_path=None, dataset_path=None, w
         shutil.copy("./datasheet.md", dataset_path)
         logging.info(f"datasheet.md was copied to {dataset_path}")
 
+    # store metrics of all steps next to the copied log file
+    metrics.stop_step()
+    metrics_dir_path = "./results/" if dataset_path == None else dataset_path
+    metrics.save(metrics_dir_path)
+    logging.info(
+        f"Metrics of all steps were stored in {os.path.join(metrics_dir_path, METRICS_FILENAME)}")
+
+    # stop logging to the log file of this measurement
+    logger.stop_logger()
+
     # uncomment to check how data looks after preparation step
     # visualize_result(window_size)
 
 
+def prepare_measurement_in_memory(measurement_path, log_path, dataset_path, window_size, normalize_IMU_data_measurement_based, preprocess_IMU_data_dataset_based, preprocess_images, resize_images, copy_strategy="copy", metrics=None, dataset_namespace=None, window_format="csv", stack_name=None, IMU_sampling_rate=50):
+    """
+        Function to perform steps 2 - 10 of data_preparation_main() for a measurement in memory by using the Measurement class.
+        The data is read once from measurement_path and the prepared measurement is written once to dataset_path.
+
+        Parameters:
+            - measurement_path (str): Path to dir where the measurement is stored (can also be a .zip file, which is not extracted)
+            - log_path (str): Path to dir where the log file data_preparation.log is stored
+            - dataset_path (str): Path to dir where the prepared data shall be stored.
+                                  If dataset_path == None the dataset will be stored in results/ dir in the repository.
+            - copy_strategy (str): Strategy for copying unchanged files from measurement_path to dataset_path (default = "copy"), "move" is not allowed
+            - metrics (PreparationMetrics): Metrics of the previous steps (default = None -> new metrics will be created)
+            - dataset_namespace (str): Namespace of the measurement in the final dataset at dataset_path (default = None), see data_preparation_main()
+            - window_format (str): Format of the windows of the IMU data (default = "csv"), see data_preparation_main()
+            - stack_name (str): Name of the stacked windows for window_format == "stacked" (default = None -> see Measurement.save())
+            - IMU_sampling_rate (float): Sampling rate of the windows of the IMU data in Hz (default = 50), see data_preparation_main()
+            - further parameters: See data_preparation_main()
+    """
+    if metrics == None:
+        metrics = PreparationMetrics(measurement_path)
+
+    logging.info(
+        "\n\n### Step 2: Downsampling of IMU data and create windows for IMU data ###")
+    metrics.start_step("2_downsampling_and_windows")
+    measurement = Measurement(measurement_path)
+    measurement.downsample_timeseries_data()
+    measurement.create_sliding_windows(
+        window_size, normalize_IMU_data_measurement_based, IMU_sampling_rate)
+
+    logging.info(
+        "\n\n### Step 3: Get synchronized timestamps and delete data previous to synchronized timestamp ###")
+    metrics.start_step("3_synchronization")
+    timestamps = measurement.get_synchronized_timestamps()
+
+    for key, timestamp in timestamps.items():
+        if "IMU" in key:
+            for sensor in measurement.timeseries_sensors:
+                measurement.remove_obsolete_values(sensor, timestamp)
+        elif "Cam" in key:
+            measurement.remove_obsolete_images_at_beginning(key, timestamp)
+
+    logging.info("\n\n### Step 4: Unify image timestamps ###")
+    metrics.start_step("4_unify_image_timestamps")
+    earliest_last_image_timestamp = measurement.unify_image_timestamps(
+        timestamps["IMU"])
+
+    logging.info(
+        "\n\n### Step 5: Deletion of data for timestamps that are not available for all sensors ###")
+    metrics.start_step("5_remove_obsolete_data_at_end")
+    measurement.remove_obsolete_data_at_end(earliest_last_image_timestamp)
+
+    logging.info("\n\n### Step 6: Create labels ###")
+    metrics.start_step("6_create_labels")
+    measurement.create_labels()
+
+    logging.info("\n\n### Step 7: Remove incomplete data samples ###")
+    metrics.start_step("7_remove_incomplete_data_samples")
+    measurement.remove_incomplete_data_samples()
+    logging.info(
+        "Data for other sensors was removed for above mentioned incomplete samples including update of labels")
+
+    logging.info(
+        "\n\n### Step 8 + 9: Perform preprocessing for all data samples and save prepared dataset ###")
+    metrics.start_step("8_9_preprocessing_and_save")
+    config_dict = load_json_from_configs(
+        run_path="", json_filename="preprocessing_config.json")
+    if dataset_path == None:
+        # clean results/ dir if it shall be used
+        clean_results_dir()
+        file_dir = os.path.dirname(os.path.abspath(__file__))
+        dataset_path = os.path.join(file_dir, "results")
+
+    if preprocess_images:
+        remapping_options_dict = get_image_remapping_options(
+            config_dict, measurement.cameras)
+
+        def image_preprocessing_function(image, camera_name):
+            return preprocess_image(image, config_dict[camera_name], resize_images, remapping_options_dict[camera_name])
+    else:
+        image_preprocessing_function = None
+    measurement.save(
+        dataset_path, image_preprocessing_function, copy_strategy, get_jpeg_save_options(), dataset_namespace, window_format, stack_name)
+    write_sampling_rate(
+        dataset_path if dataset_namespace == None else log_path, IMU_sampling_rate)
+
+    if dataset_namespace != None:
+        # samples are already part of the final dataset, thus labels, metrics and the log file stay in log_path for merge_measurement_labels()
+        measurement.save_labels(log_path)
+        metrics.stop_step()
+        metrics.save(log_path)
+        logging.info(
+            f"Labels and metrics were stored in {log_path}")
+        return
+
+    if preprocess_IMU_data_dataset_based:
+        for sensor in measurement.timeseries_sensors:
+            preprocess_timeseries_data(dataset_path, sensor, config_dict)
+
+    # log file is stored in the dataset like for the file based data preparation
+    shutil.copy(os.path.join(log_path, "data_preparation.log"), dataset_path)
+
+    logging.info("\n\n### Step 10: Copy datasheed.md to results dir ###")
+    metrics.start_step("10_copy_datasheet")
+    shutil.copy("./datasheet.md", dataset_path)
+    logging.info(f"datasheet.md was copied to {dataset_path}")
+
+    # store metrics of all steps next to the copied log file
+    metrics.stop_step()
+    metrics.save(dataset_path)
+    logging.info(
+        f"Metrics of all steps were stored in {os.path.join(dataset_path, METRICS_FILENAME)}")
+
+
+def prepare_measurement_in_worker(measurement_path, temp_path, dataset_path, gin_config_str, preparation_key=None, num_image_workers=None, dataset_namespace=None, measurement_is_staged=False):
+    """
+        Function to copy a single measurement to its own temp dir and perform the data preparation for it. 
+        Can be used in a separate process, as all exceptions are caught so that other measurements are not affected.
+
+        Parameters:
+            - measurement_path (str): Path to dir where the measurement is stored (can also be a .zip file)
+            - temp_path (str): Path to temp dir for this measurement
+            - dataset_path (str): Path to dir where the prepared measurement shall be copied to
+            - gin_config_str (str): Gin config which shall be used for the data preparation (needed for new processes)
+            - preparation_key (str): Preparation key which will be stored next to the prepared measurement after a successful preparation (default = None -> no key will be stored)
+            - num_image_workers (int): Number of processes for image preprocessing which overwrites the value from gin_config_str (default = None -> value from gin_config_str is used)
+            - dataset_namespace (str): Namespace of the measurement if dataset_path is the final dataset of multiple measurements (default = None), see data_preparation_main()
+            - measurement_is_staged (bool): Select whether the measurement was already copied to temp_path by a MeasurementStager (default = False)
+
+        Returns:
+            - measurement_path (str): Path of the measurement
+            - (bool): True if data preparation was successful
+            - (str): Traceback of the exception in case of an error ("" otherwise)
+    """
+    try:
+        # config must be parsed again in case of a new process (config is locked if it was already parsed before)
+        with gin.unlock_config():
+            gin.parse_config(gin_config_str)
+            if num_image_workers != None:
+                gin.bind_parameter(
+                    "preprocess_images_in_parallel.num_workers", num_image_workers)
+
+        # remove leftovers of previous runs (a staged measurement is already stored in temp_path)
+        paths_to_remove = [] if measurement_is_staged else [temp_path]
+        if dataset_namespace == None:
+            # prepared measurement is only valid again once the new key is stored (final dataset is shared with the other measurements otherwise)
+            remove_preparation_key(dataset_path)
+            paths_to_remove.append(dataset_path)
+        for path in paths_to_remove:
+            if os.path.exists(path):
+                shutil.rmtree(path)
+
+        data_preparation_main(
+            measurement_path, dataset_path=dataset_path, temp_path=temp_path, copy_measurement=not measurement_is_staged, dataset_namespace=dataset_namespace)
+
+        if preparation_key != None:
+            store_preparation_key(
+                dataset_path, measurement_path, preparation_key)
+        return measurement_path, True, ""
+    except Exception:
+        error_message = traceback.format_exc()
+        logging.error(
+            f"Data preparation failed for measurement {measurement_path}:\n{error_message}")
+
+        # remove incomplete results, so that they are not added to the dataset
+        if dataset_namespace != None:
+            remove_measurement_from_dataset(dataset_path, dataset_namespace)
+        elif os.path.exists(dataset_path):
+            shutil.rmtree(dataset_path)
+        return measurement_path, False, error_message
+
+
+@gin.configurable
+def prepare_all_measurements(measurement_base_path, result_dir, num_workers=1, use_cache=True, final_dataset_path=None, staging_disk_budget_gb=None):
+    """
+        Function to perform the data preparation for all measurements in measurement_base_path, where each measurement is prepared in its own temp dir.
+        The measurements are prepared in parallel by num_workers processes and a failing measurement doesn't abort the preparation of the others.
+        If use_cache == True, measurements whose raw data and config didn't change since they were prepared to result_dir will be skipped.
+        The preparation key is only stored after a successful preparation, so that an interrupted run can be resumed by calling this function again.
+        If final_dataset_path is provided, the samples of each measurement are written directly to the final dataset with the measurement name as namespace
+        (see parameter dataset_namespace of data_preparation_main()) and the labels of all measurements are merged afterwards. Thus the prepared measurements
+        are neither stored in result_dir nor copied again by combine_measurements_to_dataset(), but also no measurement can be skipped by the cache.
+        If staging_disk_budget_gb is provided, the next measurements are copied to their temp dirs in the background while the previous ones are prepared
+        (see prepare_staged_measurements()).
+
+        Parameters:
+            - measurement_base_path (str): Path to dir where all measurements are stored (as dir or .zip file)
+            - result_dir (str): Path to dir where the prepared measurements shall be stored (one sub dir for each measurement)
+            - num_workers (int): Number of processes for data preparation (default = 1 -> no separate process will be used)
+            - use_cache (bool): Select whether already prepared measurements in result_dir shall be reused (default = True), ignored if final_dataset_path is provided
+            - final_dataset_path (str): Path to dir of the final dataset where the samples shall be written directly (default = None -> prepared measurements are stored in result_dir)
+                                        NOTE: The dir must be empty or not existing, as the dataset is created from scratch.
+            - staging_disk_budget_gb (float): Maximum size of the raw measurements in the temp dirs in GB (default = None -> each worker copies its measurement itself)
+
+        Returns:
+            - prepared_measurements (list): List with names of all successfully prepared measurements in result_dir (including the skipped ones) or in final_dataset_path
+            - failed_measurements (dict): Dict containing the traceback for each measurement which failed
+    """
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    temp_base_path = os.path.join(file_dir, "temp")
+
+    if final_dataset_path != None:
+        if os.path.exists(final_dataset_path) and os.listdir(final_dataset_path) != []:
+            raise Exception(
+                f"Final dataset {final_dataset_path} must be empty, as the samples of all measurements are written directly to it!")
+        use_cache = False
+
+    # share the CPU cores between the measurements which are prepared in parallel, to prevent too many processes for image preprocessing
+    num_image_workers = None
+    if num_workers > 1:
+        num_image_workers = max(1, os.cpu_count() // num_workers)
+
+    # create list of arguments for all measurements
+    worker_arguments = []
+    prepared_measurements = []
+    gin_config_str = gin.config_str()
+    preprocessing_config_dict = load_json_from_configs(
+        run_path="", json_filename="preprocessing_config.json")
+    if preprocessing_config_dict.get("undistort_images", False):
+        # fisheye calibration is only relevant for the prepared measurements if undistortion is enabled
+        preprocessing_config_dict["fisheye_calibration"] = load_json_from_configs(
+            run_path="", json_filename="fisheye_calibration.json")
+    for root, dirs, files in os.walk(measurement_base_path):
+        measurement_names = dirs + [file for file in files if ".zip" == file[-4:]]
+        for measurement_name in sorted(measurement_names):
+            measurement_path = os.path.join(root, measurement_name)
+            measurement_dir = measurement_name.replace(".zip", "")
+            dataset_path = os.path.join(result_dir, measurement_dir)
+            dataset_namespace = None
+            if final_dataset_path != None:
+                # measurement name is unique in measurement_base_path, thus the samples of different measurements can't collide
+                dataset_path = final_dataset_path
+                dataset_namespace = measurement_dir
+
+            preparation_key = None
+            if use_cache:
+                preparation_key = get_preparation_key(
+                    measurement_path, gin_config_str, preprocessing_config_dict)
+                if is_preparation_up_to_date(dataset_path, preparation_key):
+                    print(f"Skip {measurement_path} as it's already prepared")
+                    prepared_measurements.append(measurement_dir)
+                    continue
+
+            worker_arguments.append((measurement_path,
+                                     os.path.join(temp_base_path, measurement_dir),
+                                     dataset_path,
+                                     gin_config_str,
+                                     preparation_key,
+                                     num_image_workers,
+                                     dataset_namespace))
+        # break after first for loop to only explore the top level of measurement_base_path
+        break
+
+    print(
+        f"Start data preparation for {len(worker_arguments)} measurements with {num_workers} worker(s) ({len(prepared_measurements)} measurements are already prepared)")
+
+    failed_measurements = {}
+    if staging_disk_budget_gb != None:
+        results = prepare_staged_measurements(
+            worker_arguments, num_workers, staging_disk_budget_gb)
+    elif num_workers == 1:
+        results = [prepare_measurement_in_worker(*arguments)
+                   for arguments in worker_arguments]
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {executor.submit(prepare_measurement_in_worker, *arguments): arguments[0]
+                       for arguments in worker_arguments}
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception:
+                    # worker process itself failed (e.g. killed due to memory limit)
+                    results.append(
+                        (futures[future], False, traceback.format_exc()))
+                print(
+                    f"Finished {len(results)}/{len(worker_arguments)}: {results[-1][0]}")
+
+    for measurement_path, success, error_message in results:
+        if success:
+            prepared_measurements.append(
+                os.path.basename(measurement_path).replace(".zip", ""))
+        else:
+            failed_measurements[measurement_path] = error_message
+
+    print(
+        f"Data preparation was successful for {len(results) - len(failed_measurements)} of {len(results)} measurements")
+
+    # aggregate metrics of the measurements which were prepared in this run (skipped measurements are not part of the summary)
+    newly_prepared_measurements = [os.path.basename(measurement_path).replace(".zip", "")
+                                   for measurement_path, success, _ in results if success]
+    if newly_prepared_measurements != []:
+        # metrics are kept in the temp dirs if the samples were written directly to the final dataset
+        metrics_summary = aggregate_preparation_metrics(
+            result_dir if final_dataset_path == None else temp_base_path, newly_prepared_measurements)
+        print(
+            f"Metrics of {metrics_summary['num_measurements']} measurements (sum over all measurements):")
+        for step_name, step_metrics in metrics_summary["steps"].items():
+            print(f"{step_name}: {step_metrics['wall_time_s']:.2f} s wall time, {step_metrics['cpu_time_s'] + step_metrics['cpu_time_children_s']:.2f} s CPU time, "
+                  f"{step_metrics['files_read']} files read, {step_metrics['files_written']} files written")
+    for measurement_path, error_message in failed_measurements.items():
+        print(f"Data preparation failed for {measurement_path}:\n{error_message}")
+
+    if final_dataset_path != None and prepared_measurements != []:
+        # labels of each measurement are still stored in its temp dir
+        merge_measurement_labels(final_dataset_path, {measurement_dir: os.path.join(temp_base_path, measurement_dir)
+                                                      for measurement_dir in prepared_measurements})
+        # sampling rate is also stored in the temp dirs, it's written once as all measurements are prepared with the same config
+        write_sampling_rate(final_dataset_path, read_sampling_rate(
+            os.path.join(temp_base_path, prepared_measurements[0])))
+        shutil.copy("./datasheet.md", final_dataset_path)
+
+    return prepared_measurements, failed_measurements
+
+
+def prepare_staged_measurements(worker_arguments, num_workers, staging_disk_budget_gb):
+    """
+        Function to prepare measurements while the next measurements are staged (copied to their temp dirs) by a MeasurementStager in a background thread,
+        so that copying and data preparation overlap. The data of a measurement is removed from its temp dir as soon as its preparation finished,
+        which frees its part of the disk budget for the next measurements. Thus the peak disk usage of temp/ is bounded by staging_disk_budget_gb
+        for the raw measurements (plus the data created during the preparation of the measurements which are currently prepared).
+
+        Parameters:
+            - worker_arguments (list): List with the arguments of prepare_measurement_in_worker() for each measurement in the order of preparation
+            - num_workers (int): Number of processes for data preparation (1 -> no separate process will be used)
+            - staging_disk_budget_gb (float): Maximum size of the raw measurements in the temp dirs in GB
+
+        Returns:
+            - results (list): List with the return values of prepare_measurement_in_worker() for each measurement
+    """
+    # measurements are staged with the same copy strategy as by data_preparation_main(), where the raw measurement is never moved
+    try:
+        copy_strategy = gin.query_parameter(
+            "data_preparation_main.copy_strategy")
+    except ValueError:
+        copy_strategy = "copy"
+    if copy_strategy == "move":
+        copy_strategy = "hardlink"
+
+    # worker arguments for each temp dir, as the temp dir is unique for each measurement
+    worker_arguments_dict = {arguments[1]: arguments
+                             for arguments in worker_arguments}
+    stager = MeasurementStager([(arguments[0], arguments[1]) for arguments in worker_arguments],
+                               int(staging_disk_budget_gb * 1024 ** 3), copy_strategy)
+    stager.start()
+
+    results = []
+    if num_workers == 1:
+        for measurement_path, temp_path, error_message in stager:
+            if error_message != "":
+                # worker copies the measurement itself again, which also handles the cleanup in case of an error
+                print(
+                    f"Staging failed for {measurement_path}:\n{error_message}")
+            results.append(prepare_measurement_in_worker(
+                *worker_arguments_dict[temp_path], measurement_is_staged=error_message == ""))
+            stager.release(temp_path)
+            print(
+                f"Finished {len(results)}/{len(worker_arguments)}: {results[-1][0]}")
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {}
+            for measurement_path, temp_path, error_message in stager:
+                if error_message != "":
+                    print(
+                        f"Staging failed for {measurement_path}:\n{error_message}")
+                future = executor.submit(prepare_measurement_in_worker, *worker_arguments_dict[temp_path],
+                                         measurement_is_staged=error_message == "")
+                # staging space is released as soon as the measurement is finished, so that the stager can continue while other measurements are prepared
+                future.add_done_callback(
+                    lambda _, temp_path=temp_path: stager.release(temp_path))
+                futures[future] = measurement_path
+
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception:
+                    # worker process itself failed (e.g. killed due to memory limit)
+                    results.append(
+                        (futures[future], False, traceback.format_exc()))
+                print(
+                    f"Finished {len(results)}/{len(worker_arguments)}: {results[-1][0]}")
+
+    return results
+
+
 def visualize_result(imu_offset=0, temp_path=None):
     """
         Helper function to load and visualize data from one IMU sensor and one picture of each stereo camera present in temp/ dir.
@@ -231,31 +738,26 @@ if __name__ == "__main__":
     final_dataset_path = r"/home/simon/Go1/_FTDDataset_RawData/FTDD_2.0_new"
     file_dir = os.path.dirname(os.path.abspath(__file__))
     result_dir = os.path.join(file_dir, "results")
+    # select whether the samples shall be written directly to the final dataset (final_dataset_path must be empty) instead of results/ dir
+    # (saves copying the measurements twice, but all measurements are prepared again for each run)
+    write_directly_to_dataset = False
 
-    # clean result and temp dir at the start
-    print("### Step 0: Clean temp and results dirs ###")
-    clean_results_dir()
+    # clean temp dir at the start (results dir is kept, so that unchanged measurements don't need to be prepared again)
+    print("### Step 0: Clean temp dir ###")
     clean_temp_dir()
 
-    # copy all measurements
-    print("### Step 1: Copy measurements ###")
-    copy_measurement_to_temp(measurement_base_path)
-
-    # perform data preparation for every measurement in the measurement base path
-    for root, dirs, files in os.walk(measurement_base_path):
-        for measurement_dir in dirs:
-            measurement_path = os.path.join(root, measurement_dir)
-            measurement_result_dir = os.path.join(result_dir, measurement_dir)
-            measurement_temp_dir = os.path.join(
-                file_dir, "temp", measurement_dir)
-
-            data_preparation_main(
-                measurement_path, dataset_path=measurement_result_dir, temp_path=measurement_temp_dir)
-        # break after first for loop to only explore the top level of measurement_base_path
-        break
+    # copy and prepare all new or changed measurements in the measurement base path (each measurement in its own temp dir)
+    print("### Step 1: Copy and prepare measurements ###")
+    if write_directly_to_dataset:
+        prepared_measurements, _ = prepare_all_measurements(
+            measurement_base_path, result_dir, final_dataset_path=final_dataset_path)
+    else:
+        prepared_measurements, _ = prepare_all_measurements(
+            measurement_base_path, result_dir)
 
-    # combine measurements to dataset at the end
-    combine_measurements_to_dataset(result_dir, final_dataset_path)
+        # combine measurements to dataset at the end (only measurements which are still part of the measurement base path)
+        combine_measurements_to_dataset(
+            result_dir, final_dataset_path, prepared_measurements)
 
     print("Start classification of corrupted IMU data samples")
     corrupted_files_list = get_list_of_corrupt_IMU_files(final_dataset_path)
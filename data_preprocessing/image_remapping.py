@@ -0,0 +1,135 @@
+import numpy as np
+import cv2
+from functools import lru_cache
+from PIL import Image
+
+
+def get_calibration_for_remapping(calibration_dict_cam_only):
+    """
+        Function to convert the fisheye calibration of a camera to a hashable tuple, so that it can be used as key for the cached remap tables.
+
+        Parameters:
+            - calibration_dict_cam_only (dict): Dict containing "DIM", "K" and "D" of the fisheye calibration of the camera (see configs/fisheye_calibration.json)
+
+        Returns:
+            - (tuple): Tuple (DIM, K, D) with all values flattened to tuples (None if calibration_dict_cam_only is None)
+    """
+    if calibration_dict_cam_only == None:
+        return None
+
+    return (tuple(calibration_dict_cam_only["DIM"]),
+            tuple(np.asarray(calibration_dict_cam_only["K"], dtype=np.float64).flatten()),
+            tuple(np.asarray(calibration_dict_cam_only["D"], dtype=np.float64).flatten()))
+
+
+@lru_cache(maxsize=None)
+def get_remap_tables(raw_size, crop_box, final_size, calibration=None, supersampling=4):
+    """
+        Function to compute the remap tables which map each pixel of the output image to its position in the raw image.
+        Undistortion, cropping and resizing are composed into these tables, so that the output image is created by a single cv2.remap() call.
+        The tables are cached, so that they are only computed once for each camera (and process).
+
+        Parameters:
+            - raw_size (tuple): Size (width, height) of the raw image
+            - crop_box (tuple): Box (left, top, right, bottom) for cropping in the (undistorted) raw image
+            - final_size (tuple): Size (width, height) of the output image
+            - calibration (tuple): Default = None. Fisheye calibration from get_calibration_for_remapping(), if None no undistortion will be done
+            - supersampling (int): Default = 4. Factor by which the remapped image is larger than final_size before it is reduced by averaging,
+                                   as a single bilinear remap to a much smaller size would result in aliasing
+
+        Returns:
+            - map1 (np.array): First remap table in fixed point format for cv2.remap()
+            - map2 (np.array): Second remap table in fixed point format for cv2.remap()
+    """
+    left, top, right, bottom = crop_box
+    remap_width = final_size[0] * supersampling
+    remap_height = final_size[1] * supersampling
+
+    # position of the pixel centers of the remapped image in the undistorted raw image (same convention as for resizing with PIL and OpenCV)
+    x = left + (np.arange(remap_width) + 0.5) * \
+        (right - left) / remap_width - 0.5
+    y = top + (np.arange(remap_height) + 0.5) * \
+        (bottom - top) / remap_height - 0.5
+    map_x, map_y = np.meshgrid(x, y)
+
+    if calibration != None:
+        dim, K, D = calibration
+        K = np.array(K).reshape(3, 3)
+        D = np.array(D).reshape(4, 1)
+
+        # K must be scaled if the raw image has another size than the images used for calibration (see fisheye_calibration/undisort.py)
+        scaled_K = K * raw_size[0] / dim[0]
+        scaled_K[2][2] = 1.0
+
+        # undistorted image uses the same camera matrix as the raw image, thus the points are normalized with scaled_K and distorted afterwards
+        normalized_points = np.stack([(map_x - scaled_K[0][2]) / scaled_K[0][0],
+                                      (map_y - scaled_K[1][2]) / scaled_K[1][1]], axis=-1)
+        distorted_points = cv2.fisheye.distortPoints(
+            normalized_points.reshape(-1, 1, 2), scaled_K, D)
+        map_x = distorted_points[:, 0, 0].reshape(remap_height, remap_width)
+        map_y = distorted_points[:, 0, 1].reshape(remap_height, remap_width)
+
+    return cv2.convertMaps(map_x.astype(np.float32), map_y.astype(np.float32), cv2.CV_16SC2)
+
+
+def remap_image(image, config_dict_cam_only, calibration_dict_cam_only=None, resize_images=True, supersampling=4):
+    """
+        Function to crop, optionally resize and optionally undistort an image by a single remap with cached remap tables.
+
+        Parameters:
+            - image (PIL.Image): Raw image to remap
+            - config_dict_cam_only (dict): Dict containing the configuration for the camera of the image (see configs/preprocessing_config.json)
+            - calibration_dict_cam_only (dict): Default = None. Fisheye calibration of the camera, if None no undistortion will be done
+            - resize_images (bool): Default = True. Boolean to enable resizing of images (otherwise the output has the size of the crop box)
+            - supersampling (int): Default = 4. Supersampling factor for resizing (see get_remap_tables())
+
+        Returns:
+            - (PIL.Image): Remapped image
+    """
+    crop_box = (int(config_dict_cam_only["crop_left"]), int(config_dict_cam_only["crop_top"]),
+                int(config_dict_cam_only["crop_right"]), int(config_dict_cam_only["crop_bottom"]))
+    if resize_images:
+        final_size = (int(config_dict_cam_only["final_width"]),
+                      int(config_dict_cam_only["final_height"]))
+    else:
+        # no resizing means no reduction of the image, thus no supersampling is needed
+        final_size = (crop_box[2] - crop_box[0], crop_box[3] - crop_box[1])
+        supersampling = 1
+
+    map1, map2 = get_remap_tables(image.size, crop_box, final_size,
+                                  get_calibration_for_remapping(calibration_dict_cam_only), supersampling)
+
+    remapped_image = cv2.remap(np.asarray(image), map1, map2,
+                               interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+    if supersampling > 1:
+        # reduction by an integer factor with INTER_AREA is the average of supersampling x supersampling pixels
+        remapped_image = cv2.resize(
+            remapped_image, final_size, interpolation=cv2.INTER_AREA)
+
+    return Image.fromarray(remapped_image)
+
+
+if __name__ == "__main__":
+    import os
+    import glob
+    import json
+    import time
+
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(file_dir, os.pardir, "configs", "preprocessing_config.json"), "r") as f:
+        config_dict = json.load(f)
+    with open(os.path.join(file_dir, os.pardir, "configs", "fisheye_calibration.json"), "r") as f:
+        calibration_dict = json.load(f)
+
+    camera_name = "HeadCamLeft"
+    image_paths = sorted(glob.glob(os.path.join(
+        file_dir, os.pardir, "testdata", "measurement_25_07__15_03", camera_name, "*.jpg")))
+
+    for calibration_dict_cam_only in [None, calibration_dict[camera_name]]:
+        start_time = time.perf_counter()
+        for image_path in image_paths:
+            with Image.open(image_path) as image:
+                remapped_image = remap_image(
+                    image, config_dict[camera_name], calibration_dict_cam_only)
+        print(f"Remapped {len(image_paths)} images to {remapped_image.size} in {time.perf_counter() - start_time:.2f} s "
+              f"({'with' if calibration_dict_cam_only != None else 'without'} undistortion)")
@@ -1,7 +1,9 @@
 import os
-import glob
+import gin
 from PIL import ImageFile, Image
 import logging
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 # allow truncated images for PIL to process
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
@@ -9,8 +11,11 @@ ImageFile.LOAD_TRUNCATED_IMAGES = True
 from custom_utils.utils import load_json_from_configs
 from visualization.visualizeImages import show_image_comparison
 from data_preprocessing.image_preprocessing import image_crop, image_rescale
+from data_preprocessing.image_remapping import remap_image
+from data_preparation.measurement_index import MeasurementIndex
+from data_preparation.preparation_metrics import install_file_operation_counter, get_process_counters, get_counter_difference, add_worker_counters
 
-def data_preprocessing_main(dataset_path, config_dict, preprocess_images, preprocess_IMU_data, resize_images):
+def data_preprocessing_main(dataset_path, config_dict, preprocess_images, preprocess_IMU_data, resize_images, measurement_index=None):
     """
         Function to start the complete data preprocessing process for a dataset (or measurement).
 
@@ -20,20 +25,106 @@ def data_preprocessing_main(dataset_path, config_dict, preprocess_images, prepro
             - preprocess_images (bool): Boolean to enable preprocessing of images
             - preprocess_IMU_data (bool): Boolean to enable preprocessing of IMU data
             - resize_images (bool): Boolean to enable resizing of images
+            - measurement_index (MeasurementIndex): Default = None. Index of dataset_path, will be created if None
     """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(dataset_path)
+
     # preprocess files of each sensor (data for each sensor is stored in separate directory)
-    for root, dirs, files in os.walk(dataset_path):
-        for sensor in dirs:
-            if "Cam" in sensor and preprocess_images == True:
-                preprocess_images_for_camera(
-                    dataset_path, sensor, config_dict, resize_images)
-            else:
-                if preprocess_IMU_data:
-                    preprocess_timeseries_data(
-                        dataset_path, sensor, config_dict)
+    camera_names = []
+    for sensor in measurement_index.sensors:
+        if "Cam" in sensor and preprocess_images == True:
+            camera_names.append(sensor)
+        else:
+            if preprocess_IMU_data:
+                preprocess_timeseries_data(
+                    dataset_path, sensor, config_dict)
+
+    # images of all cameras are preprocessed together, so that all workers are busy till the end
+    if camera_names != []:
+        preprocess_images_in_parallel(
+            dataset_path, camera_names, config_dict, resize_images, measurement_index=measurement_index)
+
+
+@gin.configurable
+def preprocess_images_in_parallel(dataset_path, camera_names, config_dict, resize_images, num_workers=0, chunk_size=32, measurement_index=None):
+    """
+        Function to preprocess the images of all cameras camera_names for a dataset (or measurement) by num_workers processes.
+        The images of all cameras are split into chunks of chunk_size images, so that the overhead for each task is small
+        and the workers don't run idle while the images of the last camera are processed.
+
+        Parameters:
+            - dataset_path (str): Path to dir where the measurement is stored
+            - camera_names (list): List with the names of the cameras to perform preprocessing for
+            - config_dict (dict): Dict containing the configuration for all sensors of the dataset
+            - resize_images (bool): Boolean to enable resizing of images
+            - num_workers (int): Number of processes for image preprocessing (default = 0 -> one process for each CPU core, 1 -> no separate process will be used)
+            - chunk_size (int): Number of images which are preprocessed by a worker at once (default = 32)
+            - measurement_index (MeasurementIndex): Default = None. Index of dataset_path, will be created if None
+    """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(dataset_path)
+    if num_workers == 0:
+        num_workers = os.cpu_count()
+
+    # options must be determined in this process, as the gin config might not be available in the worker processes
+    jpeg_save_options = get_jpeg_save_options()
+    remapping_options_dict = get_image_remapping_options(
+        config_dict, camera_names)
+
+    # create chunks of the work list with all images of all cameras
+    work_list = [(camera_name, measurement_index.get_file_path(camera_name, filename))
+                 for camera_name in camera_names for filename in measurement_index.get_filenames(camera_name)]
+    chunks = [work_list[i:i+chunk_size]
+              for i in range(0, len(work_list), chunk_size)]
 
+    if num_workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            preprocess_image_chunk(
+                chunk, config_dict, resize_images, jpeg_save_options, remapping_options_dict)
+    else:
+        with ProcessPoolExecutor(max_workers=min(num_workers, len(chunks))) as executor:
+            # consume all results, so that exceptions of the workers are raised here
+            for worker_counters in executor.map(preprocess_image_chunk, chunks, repeat(config_dict), repeat(resize_images), repeat(jpeg_save_options), repeat(remapping_options_dict)):
+                # file operations of the workers shall be part of the metrics of this step
+                add_worker_counters(worker_counters)
 
-def preprocess_images_for_camera(dataset_path, camera_name, config_dict, resize_images, plot_preprocessing_once=False):
+    # files were replaced by the workers, thus the index must be updated afterwards
+    for camera_name in camera_names:
+        for filename in measurement_index.get_filenames(camera_name):
+            measurement_index.add_file(camera_name, filename)
+        logging.info(f"Finished preprocessing for {camera_name}!")
+
+
+def preprocess_image_chunk(work_list, config_dict, resize_images, jpeg_save_options, remapping_options_dict=None):
+    """
+        Function to preprocess a chunk of images and overwrite them with the preprocessed images. Used by the workers of preprocess_images_in_parallel().
+
+        Parameters:
+            - work_list (list): List of tuples (camera name, path to the image) for all images of the chunk
+            - config_dict (dict): Dict containing the configuration for all sensors of the dataset
+            - resize_images (bool): Boolean to enable resizing of images
+            - jpeg_save_options (dict): Options for saving the images (see get_jpeg_save_options())
+            - remapping_options_dict (dict): Default = None. Dict containing the remapping options for each camera (see get_image_remapping_options())
+
+        Returns:
+            - (dict): Counters of the file operations for the chunk (see data_preparation.preparation_metrics.get_process_counters())
+    """
+    install_file_operation_counter()
+    start_counters = get_process_counters()
+
+    for camera_name, file in work_list:
+        with Image.open(file) as raw_image:
+            remapping_options = None if remapping_options_dict == None else remapping_options_dict[camera_name]
+            image = preprocess_image(
+                raw_image, config_dict[camera_name], resize_images, remapping_options)
+        # save after raw image was closed, as open files can't be replaced on Windows
+        save_image(image, file, jpeg_save_options)
+
+    return get_counter_difference(start_counters, get_process_counters())
+
+
+def preprocess_images_for_camera(dataset_path, camera_name, config_dict, resize_images, plot_preprocessing_once=False, measurement_index=None):
     """
         Function to preprocess images from camera "camera_name" for a dataset (or measurement).
 
@@ -44,38 +135,124 @@ def preprocess_images_for_camera(dataset_path, camera_name, config_dict, resize_
             - resize_images (bool): Boolean to enable resizing of images
             - plot_preprocessing_once (bool): Flag whether preprocessing shall be plotted once and stopped 
                                               for debugging purposes (default = False)
+            - measurement_index (MeasurementIndex): Default = None. Index of dataset_path, will be created if None
     """
+    if measurement_index == None:
+        measurement_index = MeasurementIndex(dataset_path)
+
     # extract config for camera
     config_dict_cam_only = config_dict[camera_name]
-
-    # get list of all images
-    files_glob_pattern = os.path.join(dataset_path, camera_name, "*.jpg")
-    cam_files = glob.glob(files_glob_pattern)
-    cam_files.sort()
+    remapping_options = get_image_remapping_options(
+        config_dict, [camera_name])[camera_name]
 
     # preprocess each image
-    for file in cam_files:
+    for filename in measurement_index.get_filenames(camera_name):
+        file = measurement_index.get_file_path(camera_name, filename)
         image = Image.open(file)
         raw_image = image
 
         # perform preprocessing
-        image = image_crop(image, config_dict_cam_only)
-        # images will be resized/ rescaled only if selected by function parameter
-        if resize_images:
-            image = image_rescale(image, config_dict_cam_only)
+        image = preprocess_image(
+            image, config_dict_cam_only, resize_images, remapping_options)
 
         # optionally plot preprocessing for debugging purposes
         if plot_preprocessing_once:
             show_image_comparison(raw_image, image, camera_name)
             return
 
-        # remove old file and save modified image with same name afterwards
-        os.remove(file)
-        image.save(file)
+        # replace old file with modified image
+        save_image(image, file, get_jpeg_save_options())
+        measurement_index.add_file(camera_name, filename)
 
     logging.info(f"Finished preprocessing for {camera_name}!")
 
 
+def preprocess_image(image, config_dict_cam_only, resize_images, remapping_options=None):
+    """
+        Function to preprocess a single image (crop and optionally resize).
+        If remapping_options are provided, cropping, resizing and the optional fisheye undistortion are done by a single remap.
+
+        Parameters:
+            - image (PIL.Image): Image to preprocess
+            - config_dict_cam_only (dict): Dict containing the configuration for the camera of the image
+            - resize_images (bool): Boolean to enable resizing of images
+            - remapping_options (dict): Default = None. Options for remapping of the image (see get_image_remapping_options()), if None PIL is used for cropping and resizing
+
+        Returns:
+            - image (PIL.Image): Preprocessed image
+    """
+    if remapping_options != None:
+        return remap_image(image, config_dict_cam_only, remapping_options["calibration"], resize_images, remapping_options["supersampling"])
+
+    image = image_crop(image, config_dict_cam_only)
+    # images will be resized/ rescaled only if selected by function parameter
+    if resize_images:
+        image = image_rescale(image, config_dict_cam_only)
+
+    return image
+
+
+def get_image_remapping_options(config_dict, camera_names):
+    """
+        Function to get the options for remapping of the images for each camera based on "image_remapping", "undistort_images" and "remapping_supersampling"
+        from config_dict. The fisheye calibration is loaded from configs/fisheye_calibration.json, where cameras without calibration are not undistorted.
+
+        Parameters:
+            - config_dict (dict): Dict containing the configuration for all sensors of the dataset
+            - camera_names (list): List with the names of the cameras
+
+        Returns:
+            - (dict): Dict containing the remapping options for each camera (None for all cameras if remapping is disabled)
+    """
+    if not config_dict.get("image_remapping", False):
+        return {camera_name: None for camera_name in camera_names}
+
+    calibration_dict = {}
+    if config_dict.get("undistort_images", False):
+        calibration_dict = load_json_from_configs(
+            run_path="", json_filename="fisheye_calibration.json")
+
+    remapping_options_dict = {}
+    for camera_name in camera_names:
+        if config_dict.get("undistort_images", False) and camera_name not in calibration_dict:
+            logging.info(
+                f"No fisheye calibration available for {camera_name}, thus images will not be undistorted")
+        remapping_options_dict[camera_name] = {"calibration": calibration_dict.get(camera_name),
+                                               "supersampling": int(config_dict.get("remapping_supersampling", 4))}
+
+    return remapping_options_dict
+
+
+@gin.configurable
+def get_jpeg_save_options(quality=75, subsampling=-1):
+    """
+        Function to get the options for saving the preprocessed images as JPEG (see PIL documentation for details).
+
+        Parameters:
+            - quality (int): JPEG quality between 0 and 95 (default = 75 -> default of PIL)
+            - subsampling (int): Chroma subsampling where 0 = 4:4:4, 1 = 4:2:2 and 2 = 4:2:0 (default = -1 -> default of PIL which is 4:2:0)
+
+        Returns:
+            - (dict): Dict with the options which can be passed to PIL.Image.save()
+    """
+    return {"quality": quality, "subsampling": subsampling}
+
+
+def save_image(image, file_path, jpeg_save_options):
+    """
+        Function to save an image as JPEG by writing a temporary file first which replaces the file at file_path afterwards.
+        Thus file_path always contains a complete image and a hardlink to the raw measurement at file_path is not modified.
+
+        Parameters:
+            - image (PIL.Image): Image to save
+            - file_path (str): Path where the image shall be stored
+            - jpeg_save_options (dict): Options for saving the image (see get_jpeg_save_options())
+    """
+    temp_file_path = file_path + ".tmp"
+    image.save(temp_file_path, format="JPEG", **jpeg_save_options)
+    os.replace(temp_file_path, file_path)
+
+
 def preprocess_timeseries_data(dataset_path, sensor, config_dict):
     """
         Function to preprocess data from IMU sensors for a dataset (or measurement).
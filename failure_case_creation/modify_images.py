@@ -1,6 +1,6 @@
 # ImageMagick is needed for some distortions: https://docs.wand-py.org/en/latest/guide/install.html#install-imagemagick-on-windows
 
-from PIL import Image, ImageEnhance
+from PIL import Image, ImageEnhance, ImageStat
 import numpy as np
 from matplotlib import pyplot as plt
 import skimage as sk
@@ -16,15 +16,19 @@ from wand.api import library as wandlibrary
 
 def change_brightness(image, min, max):
     random = np.random.uniform(min, max)
-    applier = ImageEnhance.Brightness(image)
-    modified_image = applier.enhance(random)
+    # equivalent to ImageEnhance.Brightness (blend with black image) but done with a lookup table on uint8
+    lut = np.clip(np.arange(256) * random, 0, 255).astype(np.uint8)
+    modified_image = image.point(np.tile(lut, len(image.getbands())).tolist())
     return modified_image
 
 
 def change_contrast(image, min, max):
     random = np.random.uniform(min, max)
-    applier = ImageEnhance.Contrast(image)
-    modified_image = applier.enhance(random)
+    # equivalent to ImageEnhance.Contrast (blend with grey image of mean luminance) but done with a lookup table on uint8
+    mean = int(ImageStat.Stat(image.convert("L")).mean[0] + 0.5)
+    lut = np.clip(mean + (np.arange(256) - mean) * random,
+                  0, 255).astype(np.uint8)
+    modified_image = image.point(np.tile(lut, len(image.getbands())).tolist())
     return modified_image
 
 
@@ -105,17 +109,31 @@ def plasma_fractal(mapsize=1024, wibbledecay=3):
 
 
 def clipped_zoom(img, zoom_factor):
-    h = img.shape[0]
-    # ceil crop height(= crop width)
+    h, w = img.shape[:2]
+    # ceil crop height and width
     ch = int(np.ceil(h / zoom_factor))
+    cw = int(np.ceil(w / zoom_factor))
 
     top = (h - ch) // 2
-    img = scizoom(img[top:top + ch, top:top + ch],
+    left = (w - cw) // 2
+    img = scizoom(img[top:top + ch, left:left + cw],
                   (zoom_factor, zoom_factor, 1), order=1)
     # trim off any extra pixels
     trim_top = (img.shape[0] - h) // 2
+    trim_left = (img.shape[1] - w) // 2
+
+    return img[trim_top:trim_top + h, trim_left:trim_left + w]
 
-    return img[trim_top:trim_top + h, trim_top:trim_top + h]
+
+def get_resolution_scale(x, reference_resolution=None):
+    """
+    Return factor to scale spatial parameters (blur radius, ...) which are defined for images with a side length of 'reference_resolution'
+    to the size of image 'x', so that a severity has the same visual effect at any resolution.
+    Without a reference_resolution the parameters are used as they are (factor 1).
+    """
+    if reference_resolution is None:
+        return 1
+    return min(np.asarray(x).shape[:2]) / reference_resolution
 
 
 class MotionImage(WandImage):
@@ -155,57 +173,64 @@ def speckle_noise(x, severity=1):
     return Image.fromarray(res.astype(np.uint8))
 
 # -------- blur functions
-def defocus_blur(x, severity=1):
+def defocus_blur(x, severity=1, reference_resolution=None):
     c = [(3, 0.1), (4, 0.5), (6, 0.5), (8, 0.5), (10, 0.5)][severity - 1]
+    scale = get_resolution_scale(x, reference_resolution)
 
     x = np.array(x) / 255.
-    kernel = disk(radius=c[0], alias_blur=c[1])
+    kernel = disk(radius=c[0] * scale, alias_blur=c[1] * scale)
 
     channels = []
     for d in range(3):
         channels.append(cv2.filter2D(x[:, :, d], -1, kernel))
     channels = np.array(channels).transpose(
-        (1, 2, 0))  # 3x224x224 -> 224x224x3
+        (1, 2, 0))  # 3xHxW -> HxWx3
 
     res = np.clip(channels, 0, 1) * 255
     return Image.fromarray(res.astype(np.uint8))
 
 
-def glass_blur(x, severity=1):
+def glass_blur(x, severity=1, reference_resolution=None):
     # sigma, max_delta, iterations
     c = [(0.7, 1, 2), (0.9, 2, 1), (1, 2, 3),
          (1.1, 3, 2), (1.5, 4, 2)][severity - 1]
+    scale = get_resolution_scale(x, reference_resolution)
+    sigma = c[0] * scale
+    max_delta = max(1, int(round(c[1] * scale)))
 
     x = np.uint8(gaussian(np.array(x) / 255.,
-                 sigma=c[0], multichannel=True) * 255)
+                 sigma=sigma, multichannel=True) * 255)
+    height, width = x.shape[:2]
 
     # locally shuffle pixels
     for i in range(c[2]):
-        for h in range(224 - c[1], c[1], -1):
-            for w in range(224 - c[1], c[1], -1):
-                dx, dy = np.random.randint(-c[1], c[1], size=(2,))
+        for h in range(height - max_delta, max_delta, -1):
+            for w in range(width - max_delta, max_delta, -1):
+                dx, dy = np.random.randint(-max_delta, max_delta, size=(2,))
                 h_prime, w_prime = h + dy, w + dx
                 # swap
                 x[h, w], x[h_prime, w_prime] = x[h_prime, w_prime], x[h, w]
 
     res = np.clip(
-        gaussian(x / 255., sigma=c[0], multichannel=True), 0, 1) * 255
+        gaussian(x / 255., sigma=sigma, multichannel=True), 0, 1) * 255
     return Image.fromarray(res.astype(np.uint8))
 
 
-def motion_blur(x, severity=1):
+def motion_blur(x, severity=1, reference_resolution=None):
     c = [(10, 3), (15, 5), (15, 8), (15, 12), (20, 15)][severity - 1]
+    scale = get_resolution_scale(x, reference_resolution)
 
     output = BytesIO()
     x.save(output, format='PNG')
     x = MotionImage(blob=output.getvalue())
 
-    x.motion_blur(radius=c[0], sigma=c[1], angle=np.random.uniform(-45, 45))
+    x.motion_blur(radius=c[0] * scale, sigma=c[1] * scale,
+                  angle=np.random.uniform(-45, 45))
 
     x = cv2.imdecode(np.fromstring(x.make_blob(), np.uint8),
                      cv2.IMREAD_UNCHANGED)
 
-    if x.shape != (224, 224):
+    if x.ndim == 3:
         res = np.clip(x[..., [2, 1, 0]], 0, 255)  # BGR to RGB
     else:  # greyscale to RGB
         res = np.clip(np.array([x, x, x]).transpose((1, 2, 0)), 0, 255)
@@ -214,7 +239,6 @@ def motion_blur(x, severity=1):
 
 
 def zoom_blur(x, severity=1):
-    # NOTE: seems only to work with sqaured images!
     c = [np.arange(1, 1.11, 0.01),
          np.arange(1, 1.16, 0.01),
          np.arange(1, 1.21, 0.02),
@@ -231,25 +255,29 @@ def zoom_blur(x, severity=1):
     return Image.fromarray(res.astype(np.uint8))
 
 
-def gaussian_blur(x, severity=1):
+def gaussian_blur(x, severity=1, reference_resolution=None):
     c = [1, 2, 3, 4, 6][severity - 1]
+    scale = get_resolution_scale(x, reference_resolution)
 
-    x = gaussian(np.array(x) / 255., sigma=c, multichannel=True)
+    x = gaussian(np.array(x) / 255., sigma=c * scale, multichannel=True)
     res = np.clip(x, 0, 1) * 255
     return Image.fromarray(res.astype(np.uint8))
 
 # ----------- wheater function
-def snow(x, severity=1):
-    # NOTE: seems only to work with sqaured images!
+def snow(x, severity=1, reference_resolution=None):
     c = [(0.1, 0.3, 3, 0.5, 10, 4, 0.8),
          (0.2, 0.3, 2, 0.5, 12, 4, 0.7),
          (0.55, 0.3, 4, 0.9, 12, 8, 0.7),
          (0.55, 0.3, 4.5, 0.85, 12, 8, 0.65),
          (0.55, 0.3, 2.5, 0.85, 12, 12, 0.55)][severity - 1]
+    scale = get_resolution_scale(x, reference_resolution)
 
     x = np.array(x, dtype=np.float32) / 255.
+    # snow layer is created in the reference resolution and resized to the image size afterwards
+    layer_shape = (int(round(x.shape[0] / scale)),
+                   int(round(x.shape[1] / scale)))
     snow_layer = np.random.normal(
-        size=x.shape[:2], loc=c[0], scale=c[1])  # [:2] for monochrome
+        size=layer_shape, loc=c[0], scale=c[1])  # [:2] for monochrome
 
     snow_layer = clipped_zoom(snow_layer[..., np.newaxis], c[2])
     snow_layer[snow_layer < c[3]] = 0
@@ -265,6 +293,9 @@ def snow(x, severity=1):
 
     snow_layer = cv2.imdecode(np.fromstring(snow_layer.make_blob(), np.uint8),
                               cv2.IMREAD_UNCHANGED) / 255.
+    if snow_layer.shape != x.shape[:2]:
+        snow_layer = cv2.resize(
+            snow_layer, (x.shape[1], x.shape[0]), interpolation=cv2.INTER_AREA)
     snow_layer = snow_layer[..., np.newaxis]
 
     x = c[6] * x + (1 - c[6]) * np.maximum(x, cv2.cvtColor(x,
@@ -274,65 +305,96 @@ def snow(x, severity=1):
     return Image.fromarray(res.astype(np.uint8))
 
 
-def frost(x, severity=1):
-    # NOTE: Does only work with smaller images (as frost images are also smaller)
+def frost(x, severity=1, reference_resolution=None):
     c = [(1, 0.4),
          (0.8, 0.6),
          (0.7, 0.7),
          (0.65, 0.7),
          (0.6, 0.75)][severity - 1]
     idx = np.random.randint(5)
+    scale = get_resolution_scale(x, reference_resolution)
 
+    x = np.array(x)
     file_dir = os.path.dirname(os.path.abspath(__file__))
     filename = ['./frost1.png', './frost2.png', './frost3.png',
                 './frost4.jpg', './frost5.jpg', './frost6.jpg'][idx]
     frost = cv2.imread(os.path.join(file_dir, filename))
+
+    # size of the crop from the frost image (in reference resolution if provided)
+    crop_h, crop_w = int(round(x.shape[0] / scale)), int(
+        round(x.shape[1] / scale))
+    # frost image must be upscaled if it's not bigger than the crop
+    upscale = max((crop_h + 1) / frost.shape[0],
+                  (crop_w + 1) / frost.shape[1])
+    if upscale > 1:
+        frost = cv2.resize(frost, (int(np.ceil(frost.shape[1] * upscale)),
+                                   int(np.ceil(frost.shape[0] * upscale))))
+
     # randomly crop and convert to rgb
     x_start, y_start = np.random.randint(
-        0, frost.shape[0] - 224), np.random.randint(0, frost.shape[1] - 224)
-    frost = frost[x_start:x_start + 224, y_start:y_start + 224][..., [2, 1, 0]]
+        0, frost.shape[0] - crop_h), np.random.randint(0, frost.shape[1] - crop_w)
+    frost = frost[x_start:x_start + crop_h,
+                  y_start:y_start + crop_w][..., [2, 1, 0]]
+    if frost.shape[:2] != x.shape[:2]:
+        frost = cv2.resize(frost, (x.shape[1], x.shape[0]),
+                           interpolation=cv2.INTER_AREA)
 
-    res = np.clip(c[0] * np.array(x) + c[1] * frost, 0, 255)
+    res = np.clip(c[0] * x + c[1] * frost, 0, 255)
 
     return Image.fromarray(res.astype(np.uint8))
 
 
-def fog(x, severity=1):
+def fog(x, severity=1, reference_resolution=None):
     c = [(1.5, 2), (2, 2), (2.5, 1.7), (2.5, 1.5), (3, 1.4)][severity - 1]
+    scale = get_resolution_scale(x, reference_resolution)
 
     x = np.array(x) / 255.
     max_val = x.max()
-    x += c[0] * plasma_fractal(wibbledecay=c[1]
-                               )[:x.shape[0], :x.shape[1]][..., np.newaxis]
+
+    # fog is cropped from the fractal in the reference resolution and resized to the image size afterwards
+    fog_h, fog_w = int(round(x.shape[0] / scale)), int(
+        round(x.shape[1] / scale))
+    mapsize = max(1024, 2 ** int(np.ceil(np.log2(max(fog_h, fog_w)))))
+    fog_layer = plasma_fractal(mapsize=mapsize, wibbledecay=c[1])[
+        :fog_h, :fog_w]
+    if fog_layer.shape != x.shape[:2]:
+        fog_layer = cv2.resize(fog_layer, (x.shape[1], x.shape[0]),
+                               interpolation=cv2.INTER_AREA)
+
+    x += c[0] * fog_layer[..., np.newaxis]
     res = np.clip(x * max_val / (max_val + c[0]), 0, 1) * 255
 
     return Image.fromarray(res.astype(np.uint8))
 
 
-def spatter(x, severity=1):
+def spatter(x, severity=1, reference_resolution=None):
     c = [(0.65, 0.3, 4, 0.69, 0.6, 0),
          (0.65, 0.3, 3, 0.68, 0.6, 0),
          (0.65, 0.3, 2, 0.68, 0.5, 0),
          (0.65, 0.3, 1, 0.65, 1.5, 1),
          (0.67, 0.4, 1, 0.65, 1.5, 1)][severity - 1]
+    scale = get_resolution_scale(x, reference_resolution)
     x = np.array(x, dtype=np.float32) / 255.
 
     liquid_layer = np.random.normal(size=x.shape[:2], loc=c[0], scale=c[1])
 
-    liquid_layer = gaussian(liquid_layer, sigma=c[2])
+    liquid_layer = gaussian(liquid_layer, sigma=c[2] * scale)
     liquid_layer[liquid_layer < c[3]] = 0
     if c[5] == 0:
+        # truncation distance and blur kernel are in px like the sigmas, thus they are scaled as well (at least 1 px and an odd kernel size)
+        max_dist = max(1, 20 * scale)
+        kernel_size = max(1, 2 * int(round((3 * scale - 1) / 2)) + 1)
         liquid_layer = (liquid_layer * 255).astype(np.uint8)
         dist = 255 - cv2.Canny(liquid_layer, 50, 150)
         dist = cv2.distanceTransform(dist, cv2.DIST_L2, 5)
-        _, dist = cv2.threshold(dist, 20, 20, cv2.THRESH_TRUNC)
-        dist = cv2.blur(dist, (3, 3)).astype(np.uint8)
+        _, dist = cv2.threshold(dist, max_dist, max_dist, cv2.THRESH_TRUNC)
+        dist = cv2.blur(dist, (kernel_size, kernel_size)).astype(np.uint8)
         dist = cv2.equalizeHist(dist)
         #     ker = np.array([[-1,-2,-3],[-2,0,0],[-3,0,1]], dtype=np.float32)
         #     ker -= np.mean(ker)
         ker = np.array([[-2, -1, 0], [-1, 1, 1], [0, 1, 2]])
         dist = cv2.filter2D(dist, cv2.CV_8U, ker)
-        dist = cv2.blur(dist, (3, 3)).astype(np.float32)
+        dist = cv2.blur(dist, (kernel_size, kernel_size)).astype(np.float32)
 
         m = cv2.cvtColor(liquid_layer * dist, cv2.COLOR_GRAY2BGRA)
         m /= np.max(m, axis=(0, 1))
@@ -352,7 +414,7 @@ def spatter(x, severity=1):
         return Image.fromarray(res.astype(np.uint8))
     else:
         m = np.where(liquid_layer > c[3], 1, 0)
-        m = gaussian(m.astype(np.float32), sigma=c[4])
+        m = gaussian(m.astype(np.float32), sigma=c[4] * scale)
         m[m < 0.8] = 0
         #         m = np.abs(m) ** (1/c[4])
 
@@ -369,39 +431,43 @@ def spatter(x, severity=1):
         return Image.fromarray(res.astype(np.uint8))
 
 # ---------- digital
-def brightness(x, severity=1):
-    c = [.1, .2, .3, .4, .5][severity - 1]
+# lookup tables for the digital distortions which only depend on the severity are precomputed once
+# => brightness and saturate are applied to the V or S channel of the uint8 HSV image from OpenCV
+BRIGHTNESS_LUTS = [np.clip(np.arange(256) + c * 255, 0, 255).astype(np.uint8)
+                   for c in [.1, .2, .3, .4, .5]]
+SATURATE_LUTS = [np.clip(np.arange(256) * c[0] + c[1] * 255, 0, 255).astype(np.uint8)
+                 for c in [(0.3, 0), (0.1, 0), (2, 0), (5, 0.1), (20, 0.2)]]
 
-    x = np.array(x) / 255.
-    x = sk.color.rgb2hsv(x)
-    x[:, :, 2] = np.clip(x[:, :, 2] + c, 0, 1)
-    x = sk.color.hsv2rgb(x)
 
-    res = np.clip(x, 0, 1) * 255
+def brightness(x, severity=1):
+    lut = BRIGHTNESS_LUTS[severity - 1]
 
-    return Image.fromarray(res.astype(np.uint8))
+    x = cv2.cvtColor(np.asarray(x), cv2.COLOR_RGB2HSV_FULL)
+    x[:, :, 2] = cv2.LUT(x[:, :, 2], lut)
+    res = cv2.cvtColor(x, cv2.COLOR_HSV2RGB_FULL)
+
+    return Image.fromarray(res)
 
 
 def contrast(x, severity=1):
     c = [0.4, .3, .2, .1, .05][severity - 1]
 
-    x = np.array(x) / 255.
-    means = np.mean(x, axis=(0, 1), keepdims=True)
-    res = np.clip((x - means) * c + means, 0, 1) * 255
+    means = np.asarray(cv2.mean(np.asarray(x))[:3]) / 255.
+    # one lookup table per color channel, as the mean differs between the channels
+    values = np.arange(256)[:, np.newaxis] / 255.
+    lut = (np.clip((values - means) * c + means, 0, 1) * 255).astype(np.uint8)
 
-    return Image.fromarray(res.astype(np.uint8))
+    return x.point(lut.T.flatten().tolist())
 
 
 def saturate(x, severity=1):
-    c = [(0.3, 0), (0.1, 0), (2, 0), (5, 0.1), (20, 0.2)][severity - 1]
+    lut = SATURATE_LUTS[severity - 1]
 
-    x = np.array(x) / 255.
-    x = sk.color.rgb2hsv(x)
-    x[:, :, 1] = np.clip(x[:, :, 1] * c[0] + c[1], 0, 1)
-    x = sk.color.hsv2rgb(x)
+    x = cv2.cvtColor(np.asarray(x), cv2.COLOR_RGB2HSV_FULL)
+    x[:, :, 1] = cv2.LUT(x[:, :, 1], lut)
+    res = cv2.cvtColor(x, cv2.COLOR_HSV2RGB_FULL)
 
-    res = np.clip(x, 0, 1) * 255
-    return Image.fromarray(res.astype(np.uint8))
+    return Image.fromarray(res)
 
 # elastic doesn't work well due to black border around the images
 # # mod of https://gist.github.com/erniejunior/601cdf56d2b424757de5
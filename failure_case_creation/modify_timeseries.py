@@ -2,33 +2,206 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 
-def offset_failure(data, min, max):
-    offset = np.random.uniform(min, max)
+def to_batch(data):
+    """
+        Convert timeseries data to a batch of shape [N, T, C] without copying the data.
+
+        Parameters:
+            - data (np.ndarray): Timeseries data of shape [T], [T, C] or [N, T, C]
+
+        Returns:
+            - (np.ndarray): View of the data with shape [N, T, C]
+    """
+    data = np.asarray(data)
+    if data.ndim == 1:
+        return data.reshape(1, -1, 1)
+    elif data.ndim == 2:
+        return data[np.newaxis]
+    elif data.ndim == 3:
+        return data
+    else:
+        raise Exception(
+            f"Timeseries data must have 1 to 3 dimensions, but data with shape {data.shape} was provided!")
+
+
+# ## Batch API: All functions work on data of shape [N, T, C] and draw the random values independently for every sample
+def offset_failure_batch(data, min, max):
+    """
+        Add a random offset to each sample of the batch.
+
+        Parameters:
+            - data (np.ndarray): Batch of timeseries data with shape [N, T, C]
+            - min (float): Minimum offset
+            - max (float): Maximum offset
+
+        Returns:
+            - (np.ndarray): Modified batch of timeseries data
+    """
+    offset = np.random.uniform(min, max, size=(data.shape[0], 1, 1))
     return data + offset
 
 
-def drifting_failure(data, min, max):
-    modified_data = []
+def drifting_failure_batch(data, min, max):
+    """
+        Add a drift which increases linearly over time to each sample of the batch.
+
+        Parameters:
+            - data (np.ndarray): Batch of timeseries data with shape [N, T, C]
+            - min (float): Minimum drift per time step
+            - max (float): Maximum drift per time step
+
+        Returns:
+            - (np.ndarray): Modified batch of timeseries data
+    """
+    factor = np.random.uniform(min, max, size=(data.shape[0], 1, 1))
+    return data + factor * np.arange(data.shape[1]).reshape(1, -1, 1)
+
+
+def precision_degradation_batch(data, var, per_channel=False):
+    """
+        Add gaussian noise to each time step of the batch.
+
+        Parameters:
+            - data (np.ndarray): Batch of timeseries data with shape [N, T, C]
+            - var (float): Standard deviation of the noise
+            - per_channel (bool): Default = False. Select whether the noise is drawn for each channel separately or once per time step for all channels.
+
+        Returns:
+            - (np.ndarray): Modified batch of timeseries data
+    """
+    size = data.shape if per_channel else (data.shape[0], data.shape[1], 1)
+    return data + np.random.normal(0, var, size=size)
+
+
+def total_failure_batch(data, total_failure_value):
+    """
+        Replace all values of the batch by a constant value.
+
+        Parameters:
+            - data (np.ndarray): Batch of timeseries data with shape [N, T, C]
+            - total_failure_value (float): Value which is used for all time steps
+
+        Returns:
+            - (np.ndarray): Modified batch of timeseries data
+    """
+    return np.full(data.shape, total_failure_value, dtype=np.result_type(data, float))
+
+
+def stuck_at_failure_batch(data, min_duration, max_duration):
+    """
+        Keep the values of each sample of the batch stuck at the value of a random time step for a random duration.
+
+        Parameters:
+            - data (np.ndarray): Batch of timeseries data with shape [N, T, C]
+            - min_duration (int): Minimum number of time steps the values are stuck
+            - max_duration (int): Maximum number of time steps the values are stuck (will be limited to T)
+
+        Returns:
+            - (np.ndarray): Modified batch of timeseries data
+    """
+    num_samples, num_timesteps = data.shape[:2]
+    duration = np.random.randint(np.minimum(min_duration, num_timesteps), np.minimum(
+        max_duration, num_timesteps) + 1, size=num_samples)
+    start = np.random.randint(0, num_timesteps - duration + 1)
+
+    # mask of all time steps where the value of the start is kept
+    timesteps = np.arange(num_timesteps).reshape(1, -1)
+    stuck = (timesteps >= start[:, np.newaxis]) & (
+        timesteps < (start + duration)[:, np.newaxis])
+    stuck_values = data[np.arange(num_samples), start][:, np.newaxis, :]
+
+    return np.where(stuck[..., np.newaxis], stuck_values, data)
+
+
+def dropout_failure_batch(data, probability, dropout_value=0):
+    """
+        Replace random time steps of the batch by a constant value, e.g. to simulate lost sensor messages.
+
+        Parameters:
+            - data (np.ndarray): Batch of timeseries data with shape [N, T, C]
+            - probability (float): Probability for each time step to be dropped
+            - dropout_value (float): Default = 0. Value which is used for dropped time steps
+
+        Returns:
+            - (np.ndarray): Modified batch of timeseries data
+    """
+    dropped = np.random.random_sample(size=(data.shape[0], data.shape[1], 1)) < probability
+    return np.where(dropped, dropout_value, data)
+
+
+# ## Fault trajectories: Additive faults for a complete measurement of shape [L, C] or [L, 1] (same for all channels), which can be sliced for each window
+def offset_trajectory(length, num_channels, min, max):
+    """
+        Create a trajectory with a constant random offset for a complete measurement.
+
+        Parameters:
+            - length (int): Number of time steps of the measurement
+            - num_channels (int): Number of channels of the sensor
+            - min (float): Minimum offset
+            - max (float): Maximum offset
+
+        Returns:
+            - (np.ndarray): Trajectory with shape [length, 1]
+    """
+    return np.full((length, 1), np.random.uniform(min, max))
+
+
+def drifting_trajectory(length, num_channels, min, max):
+    """
+        Create a trajectory with a drift which increases linearly over the complete measurement.
+
+        Parameters:
+            - length (int): Number of time steps of the measurement
+            - num_channels (int): Number of channels of the sensor
+            - min (float): Minimum drift per time step
+            - max (float): Maximum drift per time step
+
+        Returns:
+            - (np.ndarray): Trajectory with shape [length, 1]
+    """
     factor = np.random.uniform(min, max)
+    return factor * np.arange(length).reshape(-1, 1)
 
-    for i in range(np.shape(data)[0]):
-        modified_data.append(data[i] + factor * i)
 
-    return np.asarray(modified_data)
+def precision_degradation_trajectory(length, num_channels, var, per_channel=False):
+    """
+        Create a trajectory with gaussian noise for each time step of the complete measurement.
 
+        Parameters:
+            - length (int): Number of time steps of the measurement
+            - num_channels (int): Number of channels of the sensor
+            - var (float): Standard deviation of the noise
+            - per_channel (bool): Default = False. Select whether the noise is drawn for each channel separately or once per time step for all channels.
 
-def precision_degradation(data, var):
-    modified_data = []
+        Returns:
+            - (np.ndarray): Trajectory with shape [length, num_channels] or [length, 1]
+    """
+    return np.random.normal(0, var, size=(length, num_channels if per_channel else 1))
 
-    for i in range(np.shape(data)[0]):
-        random = np.random.normal(0, var)
-        modified_data.append(data[i] + random)
 
-    return np.asarray(modified_data)
+# ## Single sample API: Wrappers for the batch API which are used in the dataset for a single sample of shape [T] or [T, C]
+def offset_failure(data, min, max):
+    return offset_failure_batch(to_batch(data), min, max).reshape(np.shape(data))
+
+
+def drifting_failure(data, min, max):
+    return drifting_failure_batch(to_batch(data), min, max).reshape(np.shape(data))
+
+
+def precision_degradation(data, var, per_channel=False):
+    return precision_degradation_batch(to_batch(data), var, per_channel).reshape(np.shape(data))
 
 
 def total_failure(data, total_failure_value):
-    return np.zeros(np.shape(data)) + total_failure_value
+    return total_failure_batch(to_batch(data), total_failure_value).reshape(np.shape(data))
+
+
+def stuck_at_failure(data, min_duration, max_duration):
+    return stuck_at_failure_batch(to_batch(data), min_duration, max_duration).reshape(np.shape(data))
+
+
+def dropout_failure(data, probability, dropout_value=0):
+    return dropout_failure_batch(to_batch(data), probability, dropout_value).reshape(np.shape(data))
 
 
 if __name__ == "__main__":
@@ -38,18 +211,33 @@ if __name__ == "__main__":
     test = np.concatenate([test, test2], axis=-1)
     print(test, np.shape(test))
 
-    offset_data = offset_failure(test, 10)
+    offset_data = offset_failure(test, -10, 10)
     print(offset_data, np.shape(offset_data))
 
-    drifting_data = drifting_failure(test, 1)
+    drifting_data = drifting_failure(test, -1, 1)
     print(drifting_data, np.shape(drifting_data))
 
-    deg_data = precision_degradation(test, -1, 1)
+    deg_data = precision_degradation(test, 1, per_channel=True)
     print(deg_data, np.shape(deg_data))
 
     total_data = total_failure(test, 0)
     print(total_data, np.shape(total_data))
 
+    stuck_data = stuck_at_failure(test, 5, 10)
+    print(stuck_data, np.shape(stuck_data))
+
+    dropout_data = dropout_failure(test, 0.2)
+    print(dropout_data, np.shape(dropout_data))
+
+    # trajectory for a measurement which is sliced for overlapping windows (stride 10)
+    trajectory = drifting_trajectory(60, 2, -1, 1)
+    print(test + trajectory[0:20], test + trajectory[10:30])
+
+    # batch API for multiple samples at once
+    batch = np.stack([test] * 8)
+    print(np.shape(drifting_failure_batch(batch, -1, 1)),
+          np.shape(stuck_at_failure_batch(batch, 5, 10)))
+
     # visualize data
     # initialize figure
     # fig = plt.figure(figsize=(20, 13))
@@ -83,4 +271,6 @@ if __name__ == "__main__":
     plt.plot(x, deg_data)
     plt.plot(x, total_data)
     plt.plot(x, offset_data)
+    plt.plot(x, stuck_data)
+    plt.plot(x, dropout_data)
     plt.show()